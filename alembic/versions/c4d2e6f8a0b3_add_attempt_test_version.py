@@ -0,0 +1,41 @@
+"""add_attempt_test_version
+
+Revision ID: c4d2e6f8a0b3
+Revises: a8b5c3d7e9f1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2e6f8a0b3'
+down_revision: Union[str, Sequence[str], None] = 'a8b5c3d7e9f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _attempt_columns() -> set[str] | None:
+    inspector = sa.inspect(op.get_bind())
+    if 'attempts' not in inspector.get_table_names():
+        # Created with the column by init_db
+        return None
+    return {column['name'] for column in inspector.get_columns('attempts')}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = _attempt_columns()
+    if columns is not None and 'test_version' not in columns:
+        op.add_column('attempts', sa.Column('test_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _attempt_columns()
+    if columns is not None and 'test_version' in columns:
+        with op.batch_alter_table('attempts') as batch_op:
+            batch_op.drop_column('test_version')
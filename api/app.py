@@ -6,8 +6,26 @@ from fastapi.staticfiles import StaticFiles
 
 from api.config import STATIC_DIR
 from api.database import init_db
-from api.routes import access, assets, attempts, auth, change_requests, questions, statistics, tests, users
+from api.routes import (
+    access,
+    assets,
+    attempts,
+    auth,
+    change_requests,
+    duplicates,
+    metrics,
+    questions,
+    search,
+    statistics,
+    tests,
+    uploads,
+    users,
+    versions,
+)
+from api.services.asset_gc_service import schedule_asset_gc
+from api.services.asset_tiering_service import schedule_asset_tiering
 from api.services.cleanup_service import schedule_events_cleanup
+from api.services.test_service import payload_buffer
 from core.logging_setup import setup_console_logging
 import logging
 
@@ -31,9 +49,17 @@ def startup_events() -> None:
     logger = logging.getLogger(__name__)
     init_db()
     schedule_events_cleanup()
+    schedule_asset_gc()
+    schedule_asset_tiering()
     logger.info("Application started with SQLite-based attempts storage")
 
 
+@app.on_event("shutdown")
+def shutdown_events() -> None:
+    """Flush buffered payload writes before exit."""
+    payload_buffer.flush_all()
+
+
 # Root endpoint
 @app.get("/")
 def index() -> FileResponse:
@@ -59,3 +85,8 @@ app.include_router(assets.router)
 app.include_router(questions.router)
 app.include_router(attempts.router)
 app.include_router(statistics.router)
+app.include_router(metrics.router)
+app.include_router(search.router)
+app.include_router(duplicates.router)
+app.include_router(versions.router)
+app.include_router(uploads.router)
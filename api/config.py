@@ -27,9 +27,33 @@ def _parse_int_env(name: str, default: int) -> int:
 # Directories
 DATA_DIR = Path(os.environ.get("TEST_DATA_DIR", Path.cwd() / "data" / "tests"))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
+# "sharded" stores new tests as DATA_DIR/ab/cd/<test_id> (first hex digits of
+# the id), "flat" as DATA_DIR/<test_id>; tests in either place are found
+DATA_DIR_LAYOUT = os.environ.get("DATA_DIR_LAYOUT", "sharded").strip().lower()
 
 STATIC_DIR = _resource_path("static")
 
+# Payload saves arriving within this window are coalesced into one write
+# (0 disables buffering and writes every save through)
+SAVE_COALESCE_MS = _parse_int_env("SAVE_COALESCE_MS", 300)
+
+# JSON serialization: "auto" (orjson if installed), "stdlib" or "orjson";
+# payload files are compact unless PAYLOAD_JSON_INDENT=1
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto").strip().lower()
+PAYLOAD_JSON_INDENT = _parse_int_env("PAYLOAD_JSON_INDENT", 0) > 0
+
+# On-disk payload format: "json" (test.json) or "binary" (test.bin container
+# with per-question records, zlib-compressed when PAYLOAD_COMPRESS=1)
+PAYLOAD_FORMAT = os.environ.get("PAYLOAD_FORMAT", "json").strip().lower()
+PAYLOAD_COMPRESS = _parse_int_env("PAYLOAD_COMPRESS", 0) > 0
+# Store payloads normalized (correct answer as option id, repeated blocks
+# interned); readers always get the expanded form
+PAYLOAD_NORMALIZED = _parse_int_env("PAYLOAD_NORMALIZED", 0) > 0
+
+# Test history: every stored version is kept as a delta; a full checkpoint
+# is written every N versions to bound materialization cost
+SNAPSHOT_CHECKPOINT_INTERVAL = max(1, _parse_int_env("SNAPSHOT_CHECKPOINT_INTERVAL", 50))
+
 # Database
 DB_DIR = Path(os.environ.get("DB_DIR", Path.cwd() / "data"))
 DB_DIR.mkdir(parents=True, exist_ok=True)
@@ -37,6 +61,87 @@ DATABASE_URL = os.environ.get(
     "DATABASE_URL", f"sqlite:///{DB_DIR / 'testmaster.db'}"
 )
 
+# Full-text search index over question/option text (separate SQLite file)
+SEARCH_DB_PATH = Path(os.environ.get("SEARCH_DB_PATH", DB_DIR / "search.sqlite3"))
+# MinHash/LSH index for near-duplicate questions (separate SQLite file)
+DUPLICATES_DB_PATH = Path(
+    os.environ.get("DUPLICATES_DB_PATH", DB_DIR / "duplicates.sqlite3")
+)
+
+# Content-addressed asset blobs shared by all tests (DATA_DIR/.blobs/ab/cd/<sha256>)
+# and their reference counts
+BLOBS_DIR = Path(os.environ.get("BLOBS_DIR", DATA_DIR / ".blobs"))
+BLOBS_DB_PATH = Path(os.environ.get("BLOBS_DB_PATH", DB_DIR / "blobs.sqlite3"))
+
+# Orphaned asset collection: assets no question references (nor any version
+# from the last ASSET_GC_HISTORY_DAYS) and older than the grace period are
+# moved to <test>/quarantine/ (ASSET_GC_MODE=delete drops them instead).
+# Runs every ASSET_GC_INTERVAL_HOURS in the background (0 disables).
+ASSET_GC_INTERVAL_HOURS = _parse_int_env("ASSET_GC_INTERVAL_HOURS", 24)
+ASSET_GC_GRACE_HOURS = _parse_int_env("ASSET_GC_GRACE_HOURS", 24)
+ASSET_GC_HISTORY_DAYS = _parse_int_env("ASSET_GC_HISTORY_DAYS", 30)
+ASSET_GC_MODE = os.environ.get("ASSET_GC_MODE", "quarantine").strip().lower()
+# Quarantined assets are deleted by the same job after this many days (0 keeps them)
+ASSET_GC_QUARANTINE_DAYS = _parse_int_env("ASSET_GC_QUARANTINE_DAYS", 30)
+ASSET_GC_STATE_PATH = Path(
+    os.environ.get("ASSET_GC_STATE_PATH", DB_DIR / "asset-gc.json")
+)
+
+# Cold storage: assets of tests not accessed for ASSET_TIER_IDLE_DAYS are
+# packed into one archive per test (0 disables); checked every
+# ASSET_TIER_INTERVAL_HOURS in the background
+ASSET_TIER_IDLE_DAYS = _parse_int_env("ASSET_TIER_IDLE_DAYS", 180)
+ASSET_TIER_INTERVAL_HOURS = _parse_int_env("ASSET_TIER_INTERVAL_HOURS", 24)
+
+# Asset manifests of this many tests are kept in memory for serving assets
+# (0 disables the cache). With ASSET_ACCEL_REDIRECT set (e.g. "/_blobs/"),
+# blobs are handed to nginx via X-Accel-Redirect to <prefix><ab/cd/sha256>
+# instead of being sent by the API process.
+ASSET_MANIFEST_CACHE_SIZE = _parse_int_env("ASSET_MANIFEST_CACHE_SIZE", 1024)
+ASSET_ACCEL_REDIRECT = os.environ.get("ASSET_ACCEL_REDIRECT", "").strip()
+
+# Storage backend publishing payloads and asset blobs so several API nodes
+# can serve the same tests: "local" (data directories only) or "s3"
+# (S3-compatible bucket, needs boto3; credentials from AWS_* variables)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local").strip().lower()
+S3_BUCKET = os.environ.get("S3_BUCKET", "")
+S3_PREFIX = os.environ.get("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None
+S3_REGION = os.environ.get("S3_REGION") or None
+# Local copies of published files are checked against the backend (one
+# HEAD request) at most this often; saves always check
+STORAGE_REVALIDATE_SECONDS = _parse_int_env("STORAGE_REVALIDATE_SECONDS", 2)
+
+# Import-time optimization of images extracted from Word documents:
+# BMP/TIFF -> PNG, PNG recompression, metadata stripping and (when
+# IMAGE_MAX_DIMENSION > 0) downsampling of larger images
+IMAGE_OPTIMIZE = _parse_int_env("IMAGE_OPTIMIZE", 1) > 0
+IMAGE_MAX_DIMENSION = _parse_int_env("IMAGE_MAX_DIMENSION", 0)
+IMAGE_OPTIMIZE_WORKERS = max(1, _parse_int_env("IMAGE_OPTIMIZE_WORKERS", 4))
+
+# Resized/converted image variants (?width=&format= on the assets endpoint):
+# requested widths snap up to this ladder so srcset entries share cache files.
+# The ladder cannot be empty: arbitrary widths would each get a cache entry
+_DEFAULT_VARIANT_WIDTHS = [320, 640, 960, 1280, 1920]
+IMAGE_VARIANT_WIDTHS = sorted(
+    {
+        int(width)
+        for width in os.environ.get("IMAGE_VARIANT_WIDTHS", "").split(",")
+        if width.strip().isdigit() and int(width) > 0
+    }
+) or _DEFAULT_VARIANT_WIDTHS
+IMAGE_VARIANTS_DIR = Path(os.environ.get("IMAGE_VARIANTS_DIR", DATA_DIR / ".variants"))
+IMAGE_VARIANT_CACHE_MB = _parse_int_env("IMAGE_VARIANT_CACHE_MB", 512)
+IMAGE_VARIANT_WORKERS = max(1, _parse_int_env("IMAGE_VARIANT_WORKERS", 2))
+
+# Resumable chunked uploads (/api/uploads): chunks are staged in UPLOADS_DIR
+# (keep it on the DATA_DIR file system); unfinished uploads are dropped after
+# UPLOAD_EXPIRE_HOURS without new chunks
+UPLOADS_DIR = Path(os.environ.get("UPLOADS_DIR", DATA_DIR / ".uploads"))
+UPLOAD_MAX_MB = _parse_int_env("UPLOAD_MAX_MB", 200)
+UPLOAD_CHUNK_MB = max(1, _parse_int_env("UPLOAD_CHUNK_MB", 8))
+UPLOAD_EXPIRE_HOURS = _parse_int_env("UPLOAD_EXPIRE_HOURS", 24)
+
 # Authentication
 SECRET_KEY = os.environ.get(
     "SECRET_KEY",
@@ -12,17 +12,28 @@ from api.models.auth import (
     UserRegister,
     UserResponse,
 )
-from api.models.tests import TestCreate, TestUpdate
+from api.models.tests import (
+    QuestionBatchRequest,
+    QuestionOperation,
+    TestClone,
+    TestCreate,
+    TestUpdate,
+)
+from api.models.uploads import UploadCreate
 
 __all__ = [
     "AttemptEventPayload",
     "AttemptFinalizeRequest",
     "AttemptFinalizeResponse",
     "MessageResponse",
+    "QuestionBatchRequest",
+    "QuestionOperation",
     "RefreshTokenRequest",
+    "TestClone",
     "TestCreate",
     "TestUpdate",
     "TokenResponse",
+    "UploadCreate",
     "UserLogin",
     "UserRegister",
     "UserResponse",
@@ -44,6 +44,8 @@ class Attempt(Base):
         ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
     )
     client_id: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    # Test version the attempt was started on (see snapshot_service)
+    test_version: Mapped[int | None] = mapped_column(nullable=True)
 
     # Timing
     started_at: Mapped[datetime] = mapped_column(
@@ -1,5 +1,7 @@
 """Test-related Pydantic models."""
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 
 class TestCreate(BaseModel):
@@ -13,3 +15,25 @@ class TestUpdate(BaseModel):
     """Model for updating test metadata."""
 
     title: str
+
+
+class TestClone(BaseModel):
+    """Model for cloning a test (defaults: source title, private)."""
+
+    title: str | None = None
+    access_level: str | None = None
+
+
+class QuestionOperation(BaseModel):
+    """Single operation in a question batch."""
+
+    op: Literal["add", "update", "delete", "reorder"]
+    id: int | None = None
+    question: dict[str, object] | None = None
+    order: list[int] | None = None
+
+
+class QuestionBatchRequest(BaseModel):
+    """Model for applying many question operations at once."""
+
+    operations: list[QuestionOperation] = Field(..., min_length=1, max_length=5000)
@@ -0,0 +1,18 @@
+"""Resumable upload Pydantic models."""
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class UploadCreate(BaseModel):
+    """Model for starting a resumable upload.
+
+    ``test`` uploads are Word documents imported as a new test, ``asset``
+    uploads become assets of ``test_id``.
+    """
+
+    kind: Literal["test", "asset"]
+    file_name: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., ge=1)
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    test_id: str | None = None
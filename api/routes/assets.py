@@ -1,35 +1,383 @@
 """Asset management endpoints."""
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+import hashlib
+import io
+import mimetypes
+import os
+from pathlib import Path, PurePosixPath
+from typing import Annotated, BinaryIO
 
-from api.utils import assets_dir, save_upload_file, safe_asset_path, test_dir
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session as DbSession
+
+from api.database import get_db
+from api.dependencies.auth import get_current_user
+from api.models.db.user import User
+from api.services import access_service
+from api.config import ASSET_ACCEL_REDIRECT
+from api.services.asset_store import (
+    AssetRecord,
+    asset_records,
+    blob_key,
+    ingest_assets,
+    iter_packed_asset,
+    lookup_asset,
+    open_packed_asset,
+    resolve_asset,
+)
+from api.services.asset_tiering_service import record_test_access
+from api.services.storage_backend import get_blob_storage, parse_range
+from api.services.image_variants import (
+    VARIANT_FORMATS,
+    get_variant,
+    normalize_format,
+    snap_width,
+)
+from api.services.test_service import load_test_payload, save_test_payload
+from api.services.upload_service import assemble_upload, discard_upload, load_upload
+from api.utils import (
+    assets_dir,
+    save_upload_file,
+    test_dir,
+)
+from core.asset_names import content_hash_name, is_content_hash_name
+from core.serialization import iter_image_inlines
 
 router = APIRouter(prefix="/api/tests/{test_id}/assets", tags=["assets"])
 
+# Content-hashed names never change content: cache for a year without
+# revalidation. Legacy names are revalidated with the ETag on every use.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _cache_headers(name: str, file_path: Path) -> dict[str, str]:
+    """Cache headers of a loose (not yet ingested) file."""
+    if is_content_hash_name(PurePosixPath(name).name):
+        return {
+            "ETag": f'"{PurePosixPath(name).stem}"',
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        }
+    stat = file_path.stat()
+    return {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "Cache-Control": REVALIDATE_CACHE_CONTROL,
+    }
+
+
+def _record_headers(record: AssetRecord) -> dict[str, str]:
+    return {
+        "ETag": record.etag,
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL if record.immutable else REVALIDATE_CACHE_CONTROL
+        ),
+    }
+
+
+_VECTOR_SUFFIXES = {".svg", ".svgz"}
+
+
+def _source_format(asset_path: str) -> str:
+    """Variant format for a resize without conversion (keeps JPEG/PNG)."""
+    suffix = PurePosixPath(asset_path).suffix.lower().lstrip(".")
+    name = {"jpg": "jpeg"}.get(suffix, suffix)
+    return name if name in VARIANT_FORMATS else "png"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _variant_request(
+    asset_path: str, headers: dict[str, str], width: int | None, image_format: str | None
+) -> tuple[int | None, str | None]:
+    """Resolve variant width/format and give the variant its own ETag."""
+    width = snap_width(width)
+    if PurePosixPath(asset_path).suffix.lower() in _VECTOR_SUFFIXES:
+        # Vector images scale on their own
+        return None, None
+    if width is None and image_format is None:
+        return None, None
+    image_format = image_format or _source_format(asset_path)
+    variant = f"w{width}" if width is not None else "full"
+    headers["ETag"] = f'{headers["ETag"][:-1]}-{variant}.{image_format}"'
+    if width is not None:
+        headers["X-Image-Width"] = str(width)
+    return width, image_format
+
+
+def _packed_asset_response(
+    asset_path: str,
+    record: AssetRecord,
+    pack: BinaryIO,
+    request: Request,
+    width: int | None,
+    image_format: str | None,
+) -> Response:
+    headers = _record_headers(record)
+    width, image_format = _variant_request(asset_path, headers, width, image_format)
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        pack.close()
+        return Response(status_code=304, headers=headers)
+
+    if image_format is not None:
+        with pack:
+            variant_path = get_variant(
+                lambda: io.BytesIO(b"".join(iter_packed_asset(pack, record))),
+                record.sha256,
+                width,
+                image_format,
+            )
+        return FileResponse(
+            variant_path, media_type=VARIANT_FORMATS[image_format][1], headers=headers
+        )
+    headers["Content-Length"] = str(record.size)
+    return StreamingResponse(
+        iter_packed_asset(pack, record), media_type=record.media_type, headers=headers
+    )
+
+
+def _remote_asset_response(
+    record: AssetRecord, request: Request, headers: dict[str, str]
+) -> Response:
+    """Stream a blob from the remote storage backend (honours ``Range``)."""
+    storage = get_blob_storage()
+    info = storage.head(blob_key(record.sha256))
+    if info is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    headers["Accept-Ranges"] = "bytes"
+    byte_range = parse_range(request.headers.get("range"), info.size)
+    if byte_range is None:
+        headers["Content-Length"] = str(info.size)
+        return StreamingResponse(
+            storage.stream(blob_key(record.sha256)),
+            media_type=record.media_type,
+            headers=headers,
+        )
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.stream(blob_key(record.sha256), start, end),
+        status_code=206,
+        media_type=record.media_type,
+        headers=headers,
+    )
+
+
+def _blob_stat(record: AssetRecord) -> os.stat_result | None:
+    """Stat the local blob of a record (None when it is not there)."""
+    try:
+        return record.path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _blob_response(
+    asset_path: str,
+    record: AssetRecord,
+    stat: os.stat_result | None,
+    request: Request,
+    width: int | None,
+    image_format: str | None,
+) -> Response:
+    """Serve an asset of the blob store from its manifest record.
+
+    ``stat`` is the local blob's (None when only the remote storage has it).
+    """
+    headers = _record_headers(record)
+    width, image_format = _variant_request(asset_path, headers, width, image_format)
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    storage = get_blob_storage()
+    if stat is None:
+        if not storage.remote:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        # Blob of a test imported on another node
+        if image_format is None:
+            return _remote_asset_response(record, request, headers)
+        # Variants are rendered from a local copy
+        if not storage.fetch_file(blob_key(record.sha256), record.path):
+            raise HTTPException(status_code=404, detail="Asset not found")
+
+    if image_format is not None:
+        variant_path = get_variant(record.path, record.sha256, width, image_format)
+        return FileResponse(
+            variant_path, media_type=VARIANT_FORMATS[image_format][1], headers=headers
+        )
+    if ASSET_ACCEL_REDIRECT:
+        # nginx sends the file itself (sendfile) from its internal location
+        headers["X-Accel-Redirect"] = f"{ASSET_ACCEL_REDIRECT}{blob_key(record.sha256)}"
+        return Response(media_type=record.media_type, headers=headers)
+    # Servers supporting the ASGI pathsend extension send the file themselves
+    return FileResponse(
+        record.path, media_type=record.media_type, headers=headers, stat_result=stat
+    )
+
+
+def _content_key(file_path: Path) -> str:
+    stat = file_path.stat()
+    return hashlib.sha256(
+        f"{file_path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8")
+    ).hexdigest()
+
 
 @router.get("/{asset_path:path}")
-def get_asset(test_id: str, asset_path: str) -> FileResponse:
-    """Get test asset file."""
-    assets_directory = assets_dir(test_id)
-    file_path = safe_asset_path(assets_directory, asset_path)
+def get_asset(
+    test_id: str,
+    asset_path: str,
+    request: Request,
+    width: int | None = Query(None, ge=1, le=10000),
+    image_format: str | None = Query(None, alias="format"),
+) -> Response:
+    """Get test asset file (304 when the client copy is current).
 
-    if not file_path.exists() or not file_path.is_file():
+    With ``width`` and/or ``format`` (webp, png, jpeg) a resized/converted
+    image variant is served; widths snap up to ``IMAGE_VARIANT_WIDTHS``.
+    Assets of tests in cold storage are read from the test's archive.
+    Assets of the blob store are served from the cached manifest, without
+    touching the file system for path checks.
+    """
+    image_format = normalize_format(image_format)
+    record_test_access(test_id)
+    record = lookup_asset(test_id, asset_path)
+    stat = None
+    if record is not None and record.pack is None:
+        stat = _blob_stat(record)
+        if stat is None and not get_blob_storage().remote:
+            # Cached record of a blob removed meanwhile (test packed or
+            # the asset replaced): serve what the manifest says now
+            record = asset_records(test_id, refresh=True).get(
+                PurePosixPath(asset_path).as_posix()
+            )
+            if record is not None and record.pack is None:
+                stat = _blob_stat(record)
+    if record is not None and record.pack is not None:
+        packed = open_packed_asset(test_id, asset_path)
+        if packed is not None:
+            record, pack = packed
+            try:
+                return _packed_asset_response(
+                    asset_path, record, pack, request, width, image_format
+                )
+            except BaseException:
+                pack.close()
+                raise
+        record = lookup_asset(test_id, asset_path)
+        if record is not None and record.pack is None:
+            stat = _blob_stat(record)
+    if record is not None and record.pack is None:
+        return _blob_response(asset_path, record, stat, request, width, image_format)
+
+    # Loose file not ingested yet (or a test still being unpacked)
+    file_path = resolve_asset(test_id, asset_path)
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    return FileResponse(file_path)
+    headers = _cache_headers(asset_path, file_path)
+    width, image_format = _variant_request(asset_path, headers, width, image_format)
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if image_format is not None:
+        variant_path = get_variant(file_path, _content_key(file_path), width, image_format)
+        return FileResponse(
+            variant_path, media_type=VARIANT_FORMATS[image_format][1], headers=headers
+        )
+    media_type = mimetypes.guess_type(asset_path)[0] or "application/octet-stream"
+    return FileResponse(file_path, media_type=media_type, headers=headers)
 
 
 @router.post("")
 def upload_asset(test_id: str, file: UploadFile = File(...)) -> dict[str, str]:
-    """Upload asset to test."""
+    """Upload asset to test (stored under its content-hashed name)."""
     assets_directory = assets_dir(test_id)
     if not test_dir(test_id).exists():
         raise HTTPException(status_code=404, detail="Test not found")
 
     saved_path = save_upload_file(file, assets_directory)
+    ingest_assets(test_id)
 
     return {
         "src": saved_path.relative_to(assets_directory).as_posix(),
         "name": saved_path.name,
         "id": saved_path.stem,
     }
+
+
+@router.post("/upload/{upload_id}")
+def finalize_asset_upload(
+    test_id: str,
+    upload_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, str]:
+    """Store an asset sent as a resumable upload (like ``POST`` of a file)."""
+    state = load_upload(upload_id, current_user.id, "asset")
+    if state["testId"] != test_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if not test_dir(test_id).exists():
+        raise HTTPException(status_code=404, detail="Test not found")
+
+    assets_directory = assets_dir(test_id)
+    # The content hash is known up front: it is checked while assembling
+    name = content_hash_name(state["sha256"], PurePosixPath(state["fileName"]).suffix)
+    assemble_upload(state, assets_directory / name)
+    discard_upload(upload_id)
+    ingest_assets(test_id)
+
+    return {
+        "src": name,
+        "name": name,
+        "id": PurePosixPath(name).stem,
+    }
+
+
+@router.put("/{asset_path:path}")
+def replace_asset(
+    test_id: str,
+    asset_path: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    file: UploadFile = File(...),
+) -> dict[str, str]:
+    """Replace contents of an existing asset.
+
+    Asset URLs are immutable, so the new content is stored under its own
+    content-hashed name and the test's image references are switched to
+    it. The old content is left untouched, so cloned tests sharing it and
+    cached copies of the old URL stay valid.
+    """
+    if not test_dir(test_id).exists():
+        raise HTTPException(status_code=404, detail="Test not found")
+    if not access_service.can_edit_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Only owner can edit test")
+
+    assets_directory = assets_dir(test_id)
+    if not resolve_asset(test_id, asset_path).is_file():
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    old_src = PurePosixPath(asset_path).as_posix()
+    saved_path = save_upload_file(file, assets_directory / PurePosixPath(old_src).parent)
+    new_src = saved_path.relative_to(assets_directory).as_posix()
+    ingest_assets(test_id)
+
+    if new_src != old_src:
+        payload = load_test_payload(test_id)
+        references = 0
+        for inline in iter_image_inlines(payload.get("questions")):
+            if inline.get("src") == old_src:
+                inline["src"] = new_src
+                references += 1
+        if references:
+            save_test_payload(test_id, payload)
+
+    return {
+        "src": new_src,
+        "name": saved_path.name,
+        "id": saved_path.stem,
+        "previousSrc": old_src,
+    }
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session as DbSession
 from api.database import get_db
 from api.dependencies.auth import get_optional_user
 from api.models.db.user import User
+from api.services import access_service
 from api.services.attempt_service import (
     start_attempt,
     record_answer,
@@ -16,6 +17,9 @@ from api.services.attempt_service import (
     abandon_attempt,
     get_attempt,
 )
+from api.services.question_index import answer_free_fields, project_question
+from api.services.sampling_service import draw_questions
+from api.services.test_metadata import load_test_metadata
 from api.utils import validate_id, validate_test_exists
 
 
@@ -31,6 +35,18 @@ class StartAttemptRequest(BaseModel):
     questions: list[dict[str, Any]] | None = None
 
 
+class DrawAttemptRequest(BaseModel):
+    """Request to draw questions server-side and start an attempt."""
+    attemptId: str = Field(..., min_length=1)
+    testId: str = Field(..., min_length=1)
+    clientId: str = Field(..., min_length=1)
+    settings: dict[str, Any] | None = None
+    count: int = Field(..., ge=1, le=1000)
+    seed: int | None = None
+    strata: int = Field(1, ge=1, le=100)
+    shuffleOptions: bool = True
+
+
 class RecordAnswerRequest(BaseModel):
     """Request to record an answer."""
     testId: str = Field(..., min_length=1)
@@ -75,16 +91,80 @@ def start_new_attempt(
         user_id=user_id,
         settings=payload.settings,
         questions=payload.questions,
+        test_version=load_test_metadata(test_id).get("version"),
     )
 
     return {
         "status": "started",
         "attemptId": attempt.id,
         "testId": attempt.test_id,
+        "testVersion": attempt.test_version,
         "questionCount": attempt.question_count,
     }
 
 
+@router.post("/draw")
+def draw_attempt(
+    payload: DrawAttemptRequest,
+    db: Annotated[DbSession, Depends(get_db)],
+    current_user: Annotated[User | None, Depends(get_optional_user)] = None,
+) -> dict[str, Any]:
+    """
+    Sample questions server-side and start an attempt in one call.
+
+    Replaces downloading the whole test and posting the selected questions
+    back to /start. The same seed reproduces the same draw and option order.
+    Answers stay in the attempt snapshot and are returned only to users who
+    can edit the test; answers of the others are graded on the server.
+    """
+    attempt_id = validate_id("attemptId", payload.attemptId)
+    test_id = validate_id("testId", payload.testId)
+    client_id = validate_id("clientId", payload.clientId)
+    validate_test_exists(test_id)
+
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    questions, seed = draw_questions(
+        test_id,
+        payload.count,
+        seed=payload.seed,
+        strata=payload.strata,
+        shuffle_options=payload.shuffleOptions,
+    )
+
+    settings = dict(payload.settings or {})
+    settings.update({"seed": seed, "strata": payload.strata, "drawCount": payload.count})
+
+    attempt = start_attempt(
+        db=db,
+        attempt_id=attempt_id,
+        test_id=test_id,
+        client_id=client_id,
+        user_id=current_user.id if current_user else None,
+        settings=settings,
+        questions=[
+            {"questionId": question.get("id"), "question": question}
+            for question in questions
+        ],
+        test_version=load_test_metadata(test_id).get("version"),
+    )
+
+    if current_user is None or not access_service.can_edit_test(db, test_id, current_user):
+        fields = answer_free_fields(None)
+        questions = [project_question(question, fields) for question in questions]
+
+    return {
+        "status": "started",
+        "attemptId": attempt.id,
+        "testId": attempt.test_id,
+        "testVersion": attempt.test_version,
+        "questionCount": attempt.question_count,
+        "seed": seed,
+        "questions": questions,
+    }
+
+
 @router.post("/{attempt_id}/answer")
 def record_attempt_answer(
     attempt_id: str,
@@ -93,6 +173,9 @@ def record_attempt_answer(
 ) -> dict[str, Any]:
     """
     Record an answer for a question in the attempt.
+
+    Questions with a stored snapshot (drawn or sent to /start) are graded
+    on the server; ``isCorrect`` is used only for questions without one.
     """
     attempt_id = validate_id("attemptId", attempt_id)
     test_id = validate_id("testId", payload.testId)
@@ -0,0 +1,63 @@
+"""Near-duplicate question report endpoints."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session as DbSession
+
+from api.database import get_db
+from api.dependencies.auth import get_current_user
+from api.models.db.user import User
+from api.services import access_service
+from api.services.duplicate_service import (
+    DEFAULT_THRESHOLD,
+    MIN_THRESHOLD,
+    report_duplicates,
+)
+from api.services.test_service import flush_test_payload
+from api.utils import payload_exists
+
+router = APIRouter(prefix="/api/duplicates", tags=["duplicates"])
+
+MAX_REPORT_TESTS = 200
+
+
+@router.get("")
+def get_duplicate_report(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    test_ids: str = Query(..., alias="testIds"),
+    threshold: float = Query(DEFAULT_THRESHOLD, ge=MIN_THRESHOLD, le=1.0),
+) -> dict[str, object]:
+    """Report groups of near-duplicate questions across given tests.
+
+    Args:
+        test_ids: Comma-separated test IDs (one test finds duplicates within it)
+        threshold: Minimum estimated Jaccard similarity of question text;
+                   at least 0.5, below that LSH bands rarely propose pairs
+
+    Returns:
+        Dictionary with duplicate groups, largest first
+    """
+    ids = list(dict.fromkeys(part.strip() for part in test_ids.split(",") if part.strip()))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Test ids are required")
+    if len(ids) > MAX_REPORT_TESTS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_REPORT_TESTS} tests per report"
+        )
+    for test_id in ids:
+        if not payload_exists(test_id):
+            raise HTTPException(status_code=404, detail=f"Test not found: {test_id}")
+        if not access_service.can_view_test(db, test_id, current_user):
+            raise HTTPException(status_code=403, detail=f"Access denied: {test_id}")
+
+    # Duplicate entries are updated on physical writes
+    for test_id in ids:
+        flush_test_payload(test_id)
+    groups = report_duplicates(ids, threshold)
+    return {
+        "testIds": ids,
+        "threshold": threshold,
+        "groups": groups,
+        "duplicateQuestions": sum(group["size"] for group in groups),
+    }
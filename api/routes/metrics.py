@@ -0,0 +1,18 @@
+"""Operational metrics endpoints."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from api.dependencies.auth import get_current_user
+from api.models.db.user import User
+from api.services.test_service import payload_buffer
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("/storage")
+def get_storage_metrics(
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, object]:
+    """Get payload write metrics (coalesced vs physical writes)."""
+    return {"payloadWrites": payload_buffer.metrics()}
@@ -1,151 +1,351 @@
 """Question management endpoints."""
-from fastapi import APIRouter, Body, HTTPException
-
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from sqlalchemy.orm import Session as DbSession
+
+from api.database import get_db
+from api.dependencies.auth import get_optional_user
+from api.models import QuestionBatchRequest
+from api.models.db.user import User
+from api.services import access_service
+from api.services.duplicate_service import (
+    DEFAULT_THRESHOLD,
+    MIN_THRESHOLD,
+    find_similar_questions,
+)
+from api.services.question_index import (
+    answer_free_fields,
+    load_question_index,
+    parse_fields,
+    project_question,
+    read_questions,
+)
 from api.services.test_service import (
-    extract_blocks,
+    apply_question_update,
+    build_question,
     find_question,
     load_test_payload,
+    next_question_id,
     save_test_payload,
-    text_to_blocks,
+    validate_question,
 )
+from api.utils import JsonPatchError, JsonPatchTestFailed, apply_json_patch
+from core.serialization import serialize_metadata
 
 router = APIRouter(prefix="/api/tests/{test_id}/questions", tags=["questions"])
 
+DELTA_MODE = "delta"
+
+
+def _mutation_response(
+    test_payload: dict[str, object],
+    question: dict[str, object],
+    mode: str | None,
+    deleted: bool = False,
+) -> dict[str, object]:
+    """Build full (default) or delta response for a question mutation.
+
+    Delta responses carry only the affected question, its ordinal position
+    and the new payload version instead of the whole test.
+    """
+    if mode != DELTA_MODE:
+        return {"payload": test_payload, "question": question}
+
+    questions = test_payload.get("questions", [])
+    delta: dict[str, object] = {
+        "version": test_payload.get("version"),
+        "total": len(questions),
+    }
+    if deleted:
+        delta["deletedId"] = question.get("id")
+    else:
+        delta["question"] = question
+        delta["index"] = next(
+            index for index, item in enumerate(questions) if item is question
+        )
+    return delta
+
+
+def _visible_fields(
+    db: DbSession, test_id: str, user: User | None, fields: set[str] | None
+) -> set[str] | None:
+    """Narrow a projection to what the user may see.
+
+    Answers (``correct`` and the options' ``isCorrect`` flags) are returned
+    only to users who can edit the test.
+    """
+    if user is not None and access_service.can_edit_test(db, test_id, user):
+        return fields
+    return answer_free_fields(fields)
+
+
+def _parse_ids(raw: str) -> list[int]:
+    """Parse comma-separated question IDs."""
+    try:
+        return [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid question ids")
+
+
+@router.get("")
+def list_questions(
+    test_id: str,
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=500),
+    ids: str | None = Query(None),
+    fields: str | None = Query(None),
+) -> dict[str, object]:
+    """Get a page of questions (or questions by ID) without the full test.
+
+    Args:
+        offset: Number of questions to skip
+        limit: Maximum number of questions to return
+        ids: Comma-separated question IDs; overrides offset/limit
+        fields: Comma-separated projection, e.g. "id" or
+                "id,question,options.content" (options without isCorrect);
+                answers are left out unless the user can edit the test
+
+    Returns:
+        Dictionary with selected questions and pagination info
+    """
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    projection = _visible_fields(db, test_id, current_user, parse_fields(fields))
+    index = load_question_index(test_id)
+
+    if ids is not None:
+        positions = []
+        for question_id in _parse_ids(ids):
+            position = index.position_of(question_id)
+            if position is not None:
+                positions.append(position)
+    else:
+        end = index.total if limit is None else min(index.total, offset + limit)
+        positions = list(range(min(offset, index.total), end))
+
+    if projection == {"id"}:
+        questions = [{"id": index.ids[position]} for position in positions]
+    else:
+        questions = [
+            project_question(question, projection)
+            for question in read_questions(test_id, index, positions)
+        ]
+
+    return {
+        "testId": test_id,
+        "questions": questions,
+        "total": index.total,
+        "offset": offset,
+        "limit": limit,
+    }
+
+
+@router.get("/{question_id}")
+def get_question(
+    test_id: str,
+    question_id: int,
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    fields: str | None = Query(None),
+) -> dict[str, object]:
+    """Get single question by ID (answers only for users who can edit)."""
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    projection = _visible_fields(db, test_id, current_user, parse_fields(fields))
+    index = load_question_index(test_id)
+
+    position = index.position_of(question_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    (question,) = read_questions(test_id, index, [position])
+    return {
+        "question": project_question(question, projection),
+        "index": position,
+        "total": index.total,
+    }
+
+
+@router.get("/{question_id}/duplicates")
+def get_question_duplicates(
+    test_id: str,
+    question_id: int,
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    threshold: float = Query(DEFAULT_THRESHOLD, ge=MIN_THRESHOLD, le=1.0),
+    limit: int = Query(20, ge=1, le=100),
+) -> dict[str, object]:
+    """Find near-duplicates of a question in all tests visible to the user.
+
+    Candidates come from LSH bands, so ``threshold`` starts at 0.5: pairs
+    less similar than that are rarely proposed, and matches close to it may
+    be missed (about half at 0.5, a few percent at 0.7).
+    """
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    # Flushes this test's pending save, so its duplicate entries are current;
+    # other tests' buffered edits show up once written (SAVE_COALESCE_MS)
+    index = load_question_index(test_id)
+    if index.position_of(question_id) is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    visible = set(access_service.get_accessible_test_ids(db, current_user))
+    controlled = set(access_service.get_controlled_test_ids(db))
+    matches = [
+        match
+        for match in find_similar_questions(test_id, question_id, threshold, limit=500)
+        if match["testId"] in visible or match["testId"] not in controlled
+    ]
+    return {
+        "testId": test_id,
+        "questionId": question_id,
+        "threshold": threshold,
+        "duplicates": matches[:limit],
+    }
+
 
 @router.post("")
 def add_question(
     test_id: str,
     payload: dict[str, object] = Body(...),
+    mode: str | None = Query(None),
 ) -> dict[str, object]:
-    """Add new question to test."""
+    """Add new question to test. Pass ``mode=delta`` for a compact response."""
     test_payload = load_test_payload(test_id)
     questions = test_payload.get("questions", [])
     if not isinstance(questions, list):
         raise HTTPException(status_code=400, detail="Invalid test payload")
 
-    question_blocks = extract_blocks(payload.get("question"))
-    question_text = payload.get("questionText")
-    if question_blocks is None:
-        if not isinstance(question_text, str) or not question_text.strip():
-            raise HTTPException(
-                status_code=400, detail="Question text is required"
-            )
-        question_blocks = text_to_blocks(question_text)
-
-    options_payload = payload.get("options")
-    if not isinstance(options_payload, list) or not options_payload:
-        raise HTTPException(status_code=400, detail="Options are required")
-
-    next_id = max((q.get("id", 0) for q in questions if isinstance(q, dict)), default=0) + 1
-    options = []
-    correct_blocks = extract_blocks(payload.get("correct"))
-
-    for index, option in enumerate(options_payload, start=1):
-        if not isinstance(option, dict):
-            raise HTTPException(status_code=400, detail="Invalid option format")
-
-        content_blocks = extract_blocks(option.get("content"))
-        if content_blocks is None:
-            option_text = str(option.get("text", ""))
-            content_blocks = text_to_blocks(option_text)
-
-        is_correct = bool(option.get("isCorrect"))
-        if is_correct and correct_blocks is None:
-            correct_blocks = content_blocks
-
-        options.append(
-            {
-                "id": index,
-                "content": {"blocks": content_blocks},
-                "isCorrect": is_correct,
-            }
-        )
+    new_question = build_question(payload, next_question_id(questions))
+    questions.append(new_question)
+    test_payload["questions"] = questions
+    save_test_payload(test_id, test_payload)
 
-    new_question = {
-        "id": next_id,
-        "question": {"blocks": question_blocks},
-        "options": options,
-        "correct": {"blocks": correct_blocks or text_to_blocks("")},
-    }
+    return _mutation_response(test_payload, new_question, mode)
 
-    objects_payload = payload.get("objects")
-    if isinstance(objects_payload, list):
-        new_question["objects"] = objects_payload
 
-    questions.append(new_question)
+@router.post(":batch")
+def batch_questions(
+    test_id: str,
+    batch: QuestionBatchRequest,
+) -> dict[str, object]:
+    """Apply many question operations with a single load/save cycle.
+
+    Operations are applied in order to an in-memory copy of the test. If any
+    operation fails, nothing is saved and the response lists per-operation
+    results with the errors.
+    """
+    test_payload = load_test_payload(test_id)
+    questions = test_payload.get("questions", [])
+    if not isinstance(questions, list):
+        raise HTTPException(status_code=400, detail="Invalid test payload")
+
+    next_id = next_question_id(questions)
+    results: list[dict[str, object]] = []
+    failed = False
+
+    for index, operation in enumerate(batch.operations):
+        result: dict[str, object] = {"index": index, "op": operation.op}
+        try:
+            if operation.op == "add":
+                new_question = build_question(operation.question or {}, next_id)
+                next_id += 1
+                questions.append(new_question)
+                result["id"] = new_question["id"]
+            elif operation.op == "update":
+                question, _ = find_question(
+                    test_payload, _require_id(operation.id)
+                )
+                apply_question_update(question, operation.question or {})
+                result["id"] = question["id"]
+            elif operation.op == "delete":
+                _, position = find_question(
+                    test_payload, _require_id(operation.id)
+                )
+                result["id"] = questions.pop(position)["id"]
+            elif operation.op == "reorder":
+                questions[:] = _reorder(questions, operation.order)
+            result["status"] = "ok"
+        except HTTPException as exc:
+            failed = True
+            result["status"] = "error"
+            result["detail"] = exc.detail
+        results.append(result)
+
+    if failed:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Batch rejected, no changes saved", "results": results},
+        )
+
     test_payload["questions"] = questions
     save_test_payload(test_id, test_payload)
 
-    return {"payload": test_payload, "question": new_question}
+    return {"metadata": serialize_metadata(test_payload), "results": results}
+
+
+def _require_id(question_id: int | None) -> int:
+    if question_id is None:
+        raise HTTPException(status_code=400, detail="Question id is required")
+    return question_id
+
+
+def _reorder(
+    questions: list[dict[str, object]], order: list[int] | None
+) -> list[dict[str, object]]:
+    """Reorder questions; order must list every question ID exactly once."""
+    by_id = {q.get("id"): q for q in questions if isinstance(q, dict)}
+    if order is None or len(order) != len(by_id) or set(order) != set(by_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Order must contain every question id exactly once",
+        )
+    return [by_id[question_id] for question_id in order]
 
 
 @router.patch("/{question_id}")
 def update_question(
     test_id: str,
     question_id: int,
-    payload: dict[str, object] = Body(...),
+    payload: dict[str, object] | list[dict[str, object]] = Body(...),
+    mode: str | None = Query(None),
 ) -> dict[str, object]:
-    """Update existing question."""
+    """Update existing question.
+
+    Accepts either the regular update object or an RFC 6902 JSON Patch
+    (a list of operations, ``Content-Type: application/json-patch+json``)
+    applied to the stored question, e.g.
+    ``[{"op": "replace", "path": "/options/1/content/blocks/0/inlines/0/text", "value": "..."}]``.
+    """
     test_payload = load_test_payload(test_id)
-    question, _ = find_question(test_payload, question_id)
-
-    question_blocks = extract_blocks(payload.get("question"))
-    question_text = payload.get("questionText")
-    if question_blocks is not None:
-        question["question"] = {"blocks": question_blocks}
-    elif question_text is not None:
-        question["question"] = {"blocks": text_to_blocks(str(question_text))}
-
-    options_payload = payload.get("options")
-    if options_payload is not None:
-        if not isinstance(options_payload, list) or not options_payload:
-            raise HTTPException(status_code=400, detail="Options are required")
-
-        options = []
-        correct_blocks = extract_blocks(payload.get("correct"))
-
-        for index, option in enumerate(options_payload, start=1):
-            if not isinstance(option, dict):
-                raise HTTPException(
-                    status_code=400, detail="Invalid option format"
-                )
+    question, index = find_question(test_payload, question_id)
 
-            content_blocks = extract_blocks(option.get("content"))
-            if content_blocks is None:
-                option_text = str(option.get("text", ""))
-                content_blocks = text_to_blocks(option_text)
-
-            is_correct = bool(option.get("isCorrect"))
-            if is_correct and correct_blocks is None:
-                correct_blocks = content_blocks
-
-            options.append(
-                {
-                    "id": index,
-                    "content": {"blocks": content_blocks},
-                    "isCorrect": is_correct,
-                }
-            )
-
-        question["options"] = options
-        question["correct"] = {
-            "blocks": correct_blocks or text_to_blocks("")
-        }
-
-    objects_payload = payload.get("objects")
-    if objects_payload is not None:
-        if not isinstance(objects_payload, list):
-            raise HTTPException(
-                status_code=400, detail="Invalid objects format"
-            )
-        question["objects"] = objects_payload
+    if isinstance(payload, list):
+        try:
+            patched = apply_json_patch(question, payload)
+        except JsonPatchTestFailed as exc:
+            raise HTTPException(status_code=409, detail=str(exc))
+        except JsonPatchError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        validate_question(patched, question_id)
+        test_payload["questions"][index] = patched
+        question = patched
+    else:
+        apply_question_update(question, payload)
 
     save_test_payload(test_id, test_payload)
-    return {"payload": test_payload, "question": question}
+    return _mutation_response(test_payload, question, mode)
 
 
 @router.delete("/{question_id}")
-def delete_question(test_id: str, question_id: int) -> dict[str, object]:
+def delete_question(
+    test_id: str,
+    question_id: int,
+    mode: str | None = Query(None),
+) -> dict[str, object]:
     """Delete question from test."""
     test_payload = load_test_payload(test_id)
     question, index = find_question(test_payload, question_id)
@@ -158,4 +358,4 @@ def delete_question(test_id: str, question_id: int) -> dict[str, object]:
     test_payload["questions"] = questions
     save_test_payload(test_id, test_payload)
 
-    return {"payload": test_payload, "question": question}
+    return _mutation_response(test_payload, question, mode, deleted=True)
@@ -0,0 +1,49 @@
+"""Question search endpoints."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session as DbSession
+
+from api.database import get_db
+from api.dependencies.auth import get_optional_user
+from api.models.db.user import User
+from api.services import access_service
+from api.services.search_service import build_match_query, search_questions
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/questions")
+def search(
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    q: str = Query(..., min_length=1, max_length=200),
+    test_id: str | None = Query(None, alias="testId"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+) -> dict[str, object]:
+    """Search question and option text across tests visible to the user.
+
+    Results are ranked by relevance (question text weighs more than
+    options) and carry HTML snippets with matches wrapped in ``<mark>``.
+    Edits still buffered for coalescing are not searchable yet.
+    """
+    if build_match_query(q) is None:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+
+    # The index is updated on physical writes: a pending save becomes
+    # searchable when the write-behind buffer flushes it (SAVE_COALESCE_MS)
+    total, results = search_questions(
+        q,
+        access_service.get_accessible_test_ids(db, current_user),
+        access_service.get_controlled_test_ids(db),
+        test_id=test_id,
+        limit=limit,
+        offset=offset,
+    )
+    return {
+        "results": results,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+    }
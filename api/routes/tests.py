@@ -5,17 +5,34 @@ from pathlib import Path
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session as DbSession
 
-from api.config import DATA_DIR
+from api.config import IMAGE_MAX_DIMENSION, IMAGE_OPTIMIZE, IMAGE_OPTIMIZE_WORKERS
 from api.database import get_db
 from api.dependencies.auth import get_current_user, get_optional_user
-from api.models import TestCreate, TestUpdate
+from api.models import TestClone, TestCreate, TestUpdate
 from api.models.db.user import User
 from api.models.db.test_collection import AccessLevel
 from api.services import access_service
-from api.utils import assets_dir, json_load, payload_path, test_dir
-from api.services.test_service import load_test_payload, save_test_payload
+from api.services.asset_store import copy_test_assets, ingest_assets, release_test_assets
+from api.services.asset_tiering_service import record_test_access
+from api.services.bundle_service import import_bundle, iter_export_bundle
+from api.utils import assets_dir, iter_test_dirs, payload_exists, test_dir
+from api.services.duplicate_service import remove_test_duplicates
+from api.services.question_index import invalidate_question_index
+from api.services.search_service import remove_test_from_index
+from api.services.stats_service import get_test_owner_stats
+from api.services.storage_backend import unpublish_test_files
+from api.services.test_metadata import load_test_metadata
+from api.services.upload_service import assemble_upload, discard_upload, load_upload
+from api.services.test_service import (
+    PUBLISHED_FILES,
+    discard_test_payload,
+    load_test_payload,
+    save_test_payload,
+    sync_stored_payload,
+)
 from core.serialization import serialize_metadata, serialize_test_payload
 from core.word_extract import WordTestExtractor
 
@@ -45,16 +62,9 @@ def list_tests(
     accessible_ids = set(access_service.get_accessible_test_ids(db, current_user))
 
     tests = []
-    for test_directory in sorted(DATA_DIR.iterdir()):
-        if not test_directory.is_dir():
-            continue
-        payload_file = test_directory / "test.json"
-        if not payload_file.exists():
-            continue
-
+    for test_directory in iter_test_dirs():
         test_id = test_directory.name
-        payload = payload_file.read_text(encoding="utf-8")
-        metadata = serialize_metadata(json_load(payload))
+        metadata = load_test_metadata(test_id)
 
         # Get access info from database
         collection = access_service.get_test_collection_with_owner(db, test_id)
@@ -107,6 +117,74 @@ def list_tests(
     }
 
 
+def _export_response(
+    db: DbSession,
+    current_user: User | None,
+    test_ids: list[str],
+    include_statistics: bool,
+    filename: str,
+) -> StreamingResponse:
+    """Check access and stream a zip bundle of tests.
+
+    Attempt statistics are included only for tests the user owns.
+    """
+    statistics = {}
+    for test_id in test_ids:
+        if not payload_exists(test_id):
+            raise HTTPException(status_code=404, detail=f"Test not found: {test_id}")
+        if not access_service.can_view_test(db, test_id, current_user):
+            raise HTTPException(status_code=403, detail=f"Access denied: {test_id}")
+        if (
+            include_statistics
+            and current_user
+            and access_service.can_edit_test(db, test_id, current_user)
+        ):
+            # Collected up front: the DB session is closed while streaming
+            statistics[test_id] = get_test_owner_stats(db, test_id, limit=100000)
+
+    return StreamingResponse(
+        iter_export_bundle(test_ids, statistics),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/export")
+def export_tests(
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    test_ids: str = Query(..., alias="testIds"),
+    statistics: bool = Query(False),
+) -> StreamingResponse:
+    """Export several tests as one zip bundle (comma-separated ``testIds``)."""
+    ids = list(dict.fromkeys(part.strip() for part in test_ids.split(",") if part.strip()))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Test ids are required")
+    return _export_response(db, current_user, ids, statistics, "tests-bundle.zip")
+
+
+@router.post("/import")
+def import_tests(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    file: UploadFile = File(...),
+    access_level: str = Form("private"),
+    keep_ids: bool = Form(False),
+) -> dict[str, object]:
+    """Import tests from a zip bundle; the current user becomes the owner."""
+    try:
+        parsed_access_level = AccessLevel(access_level)
+    except ValueError:
+        parsed_access_level = AccessLevel.PRIVATE
+
+    imported = import_bundle(file.file, keep_ids=keep_ids)
+    for test in imported:
+        access_service.get_or_create_collection(
+            db, test["id"], current_user.id, parsed_access_level
+        )
+    return {"tests": imported}
+
+
 @router.post("")
 def create_test(
     payload: TestCreate,
@@ -126,7 +204,7 @@ def create_test(
     assets_directory.mkdir(parents=True, exist_ok=True)
 
     test_payload = serialize_test_payload(test_id, title, [], assets_directory)
-    save_test_payload(test_id, test_payload)
+    save_test_payload(test_id, test_payload, coalesce=False)
 
     # Create TestCollection record with ownership
     access_level = AccessLevel.PRIVATE
@@ -147,16 +225,16 @@ def get_test(
     db: Annotated[DbSession, Depends(get_db)],
 ) -> dict[str, object]:
     """Get test payload."""
-    payload_file = payload_path(test_id)
-    if not payload_file.exists():
+    sync_stored_payload(test_id)
+    if not payload_exists(test_id):
         raise HTTPException(status_code=404, detail="Test not found")
 
     # Check access permission
     if not access_service.can_view_test(db, test_id, current_user):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    payload = payload_file.read_text(encoding="utf-8")
-    result = json_load(payload)
+    record_test_access(test_id)
+    result = load_test_payload(test_id)
 
     # Add ownership info
     collection = access_service.get_test_collection_with_owner(db, test_id)
@@ -174,6 +252,78 @@ def get_test(
     return result
 
 
+@router.get("/{test_id}/metadata")
+def get_test_metadata(
+    test_id: str,
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> dict[str, object]:
+    """Get test metadata without loading the payload."""
+    if not payload_exists(test_id):
+        raise HTTPException(status_code=404, detail="Test not found")
+
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return load_test_metadata(test_id)
+
+
+@router.post("/{test_id}/clone")
+def clone_test(
+    test_id: str,
+    payload: TestClone,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> dict[str, object]:
+    """Clone test into a new one owned by the current user.
+
+    Assets are shared through the blob store, not copied: the clone costs
+    no extra disk space (replacing an asset stores new content separately).
+    """
+    if not payload_exists(test_id):
+        raise HTTPException(status_code=404, detail="Test not found")
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    test_payload = load_test_payload(test_id)
+    title = (payload.title or "").strip() or f"{test_payload.get('title') or ''} (копия)".strip()
+
+    clone_id = uuid.uuid4().hex
+    test_dir(clone_id).mkdir(parents=True)
+    assets = copy_test_assets(test_id, clone_id)
+
+    test_payload["id"] = clone_id
+    test_payload["assetsBaseUrl"] = f"/api/tests/{clone_id}/assets"
+    test_payload["title"] = title
+    test_payload["version"] = 0
+    save_test_payload(clone_id, test_payload, coalesce=False)
+
+    access_level = AccessLevel.PRIVATE
+    if payload.access_level:
+        try:
+            access_level = AccessLevel(payload.access_level)
+        except ValueError:
+            pass  # Use default if invalid
+    access_service.get_or_create_collection(db, clone_id, current_user.id, access_level)
+
+    return {
+        "metadata": serialize_metadata(test_payload),
+        "sourceId": test_id,
+        "assets": assets,
+    }
+
+
+@router.get("/{test_id}/export")
+def export_test(
+    test_id: str,
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    statistics: bool = Query(False),
+) -> StreamingResponse:
+    """Export test with assets as a zip bundle."""
+    return _export_response(db, current_user, [test_id], statistics, f"{test_id}.zip")
+
+
 @router.patch("/{test_id}")
 def update_test(
     test_id: str,
@@ -182,8 +332,7 @@ def update_test(
     db: Annotated[DbSession, Depends(get_db)],
 ) -> dict[str, object]:
     """Update test metadata."""
-    payload_file = payload_path(test_id)
-    if not payload_file.exists():
+    if not payload_exists(test_id):
         raise HTTPException(status_code=404, detail="Test not found")
 
     # Check edit permission
@@ -194,11 +343,9 @@ def update_test(
     if not title:
         raise HTTPException(status_code=400, detail="Title is required")
 
-    from api.utils import json_dump
-
-    payload = json_load(payload_file.read_text(encoding="utf-8"))
+    payload = load_test_payload(test_id)
     payload["title"] = title
-    payload_file.write_text(json_dump(payload), encoding="utf-8")
+    save_test_payload(test_id, payload)
 
     return serialize_metadata(payload)
 
@@ -221,51 +368,47 @@ def delete_test(
     # Delete TestCollection record
     access_service.delete_test_collection(db, test_id)
 
+    discard_test_payload(test_id)
+    release_test_assets(test_id)
     shutil.rmtree(test_directory)
+    unpublish_test_files(test_id, PUBLISHED_FILES)
+    invalidate_question_index(test_id)
+    remove_test_from_index(test_id)
+    remove_test_duplicates(test_id)
     return {"status": "deleted"}
 
 
-@router.post("/upload")
-def upload_test(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[DbSession, Depends(get_db)],
-    file: UploadFile = File(...),
-    symbol: str = Form("*"),
-    log_small_tables: bool = Form(False),
-    access_level: str = Form("private"),
+def _import_word_document(
+    db: DbSession,
+    current_user: User,
+    test_id: str,
+    file_path: Path,
+    symbol: str,
+    log_small_tables: bool,
+    access_level: str,
 ) -> dict[str, object]:
-    """Upload test from Word document."""
-    file_name = file.filename or ""
-    if Path(file_name).suffix.lower() == ".doc":
-        raise HTTPException(status_code=400, detail="Поддерживаются только .docx")
-
-    test_id = uuid.uuid4().hex
-    test_directory = test_dir(test_id)
-    test_directory.mkdir(parents=True, exist_ok=True)
-
+    """Extract questions of a Word document saved in a new test's directory."""
     assets_directory = assets_dir(test_id)
     assets_directory.mkdir(parents=True, exist_ok=True)
 
-    safe_name = Path(file.filename or f"upload_{test_id}.docx").name
-    file_path = test_directory / safe_name
-    file_path.write_bytes(file.file.read())
-
     extractor = WordTestExtractor(
         file_path,
         symbol,
         log_small_tables,
         assets_directory,
+        image_optimization=IMAGE_OPTIMIZE,
+        max_image_dimension=IMAGE_MAX_DIMENSION,
+        image_workers=IMAGE_OPTIMIZE_WORKERS,
     )
     try:
         tests = extractor.extract()
         test_payload = serialize_test_payload(
             test_id, file_path.stem, tests, assets_directory
         )
-        from api.utils import json_dump
-
-        payload_path(test_id).write_text(json_dump(test_payload), encoding="utf-8")
+        save_test_payload(test_id, test_payload, coalesce=False)
     finally:
         extractor.cleanup()
+    ingest_assets(test_id)
 
     # Create TestCollection record with ownership
     try:
@@ -279,3 +422,61 @@ def upload_test(
         "payload": test_payload,
         "logs": extractor.logs,
     }
+
+
+@router.post("/upload")
+def upload_test(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    file: UploadFile = File(...),
+    symbol: str = Form("*"),
+    log_small_tables: bool = Form(False),
+    access_level: str = Form("private"),
+) -> dict[str, object]:
+    """Upload test from Word document."""
+    file_name = file.filename or ""
+    if Path(file_name).suffix.lower() == ".doc":
+        raise HTTPException(status_code=400, detail="Поддерживаются только .docx")
+
+    test_id = uuid.uuid4().hex
+    test_directory = test_dir(test_id)
+    test_directory.mkdir(parents=True, exist_ok=True)
+
+    safe_name = Path(file.filename or f"upload_{test_id}.docx").name
+    file_path = test_directory / safe_name
+    with file_path.open("wb") as target:
+        shutil.copyfileobj(file.file, target)
+
+    return _import_word_document(
+        db, current_user, test_id, file_path, symbol, log_small_tables, access_level
+    )
+
+
+@router.post("/upload/{upload_id}")
+def finalize_test_upload(
+    upload_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    symbol: str = Form("*"),
+    log_small_tables: bool = Form(False),
+    access_level: str = Form("private"),
+) -> dict[str, object]:
+    """Create test from a Word document sent as a resumable upload.
+
+    The chunks are assembled and checked against the upload's SHA-256
+    (409 while chunks are missing, 422 on a hash mismatch).
+    """
+    state = load_upload(upload_id, current_user.id, "test")
+    test_id = uuid.uuid4().hex
+    test_directory = test_dir(test_id)
+    file_path = test_directory / state["fileName"]
+    try:
+        assemble_upload(state, file_path)
+    except BaseException:
+        shutil.rmtree(test_directory, ignore_errors=True)
+        raise
+    discard_upload(upload_id)
+
+    return _import_word_document(
+        db, current_user, test_id, file_path, symbol, log_small_tables, access_level
+    )
@@ -0,0 +1,93 @@
+"""Resumable upload endpoints.
+
+A large file is uploaded as a session: ``POST /api/uploads`` starts it,
+``PUT /api/uploads/{upload_id}?offset=N`` sends chunks and the upload is
+finalized by the endpoint of its kind:
+
+- ``test``: ``POST /api/tests/upload/{upload_id}`` (like ``/api/tests/upload``);
+- ``asset``: ``POST /api/tests/{test_id}/assets/upload/{upload_id}``.
+"""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session as DbSession
+
+from api.database import get_db
+from api.dependencies.auth import get_current_user
+from api.models import UploadCreate
+from api.models.db.user import User
+from api.services import access_service
+from api.services.upload_service import (
+    create_upload,
+    discard_upload,
+    load_upload,
+    upload_status,
+    write_chunk,
+)
+from api.utils import test_dir
+
+router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+
+@router.post("")
+def start_upload(
+    request: UploadCreate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> dict[str, object]:
+    """Start a resumable upload of a Word document or an asset."""
+    if request.kind == "test":
+        if request.file_name.lower().endswith(".doc"):
+            raise HTTPException(status_code=400, detail="Поддерживаются только .docx")
+    else:
+        if not request.test_id or not test_dir(request.test_id).exists():
+            raise HTTPException(status_code=404, detail="Test not found")
+        if not access_service.can_edit_test(db, request.test_id, current_user):
+            raise HTTPException(status_code=403, detail="Only owner can edit test")
+    return create_upload(
+        current_user.id,
+        request.kind,
+        request.file_name,
+        request.size,
+        request.sha256,
+        request.test_id if request.kind == "asset" else None,
+    )
+
+
+@router.get("/{upload_id}")
+def get_upload(
+    upload_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, object]:
+    """Get received ranges of an upload (to resume it)."""
+    return upload_status(load_upload(upload_id, current_user.id))
+
+
+@router.put("/{upload_id}")
+def put_upload_chunk(
+    upload_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    offset: int = Query(..., ge=0),
+    chunk: UploadFile = File(...),
+    chunk_sha256: str | None = Header(None, alias="X-Chunk-SHA256"),
+) -> dict[str, object]:
+    """Store a chunk of an upload starting at byte ``offset``.
+
+    ``offset`` is a multiple of the upload's ``chunkSize`` and the chunk is
+    ``chunkSize`` bytes (the last one ends at the file size). Sending a
+    chunk again replaces it. With the ``X-Chunk-SHA256`` header a
+    damaged chunk is rejected with 422.
+    """
+    state = load_upload(upload_id, current_user.id)
+    return write_chunk(state, offset, chunk.file, chunk_sha256)
+
+
+@router.delete("/{upload_id}")
+def cancel_upload(
+    upload_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, str]:
+    """Cancel an upload and drop its chunks."""
+    load_upload(upload_id, current_user.id)
+    discard_upload(upload_id)
+    return {"status": "deleted"}
@@ -0,0 +1,99 @@
+"""Test version history endpoints."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session as DbSession
+
+from api.database import get_db
+from api.dependencies.auth import get_current_user, get_optional_user
+from api.models.db.user import User
+from api.services import access_service
+from api.services.snapshot_service import (
+    diff_versions,
+    list_versions,
+    materialize_version,
+)
+from api.services.test_service import load_test_payload, payload_buffer, save_test_payload
+from api.utils import payload_exists
+from core.serialization import serialize_metadata
+
+router = APIRouter(prefix="/api/tests", tags=["versions"])
+
+
+def _check_view_access(db: DbSession, test_id: str, current_user: User | None) -> None:
+    if not payload_exists(test_id):
+        raise HTTPException(status_code=404, detail="Test not found")
+    if not access_service.can_view_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Access denied")
+    # Pending save is recorded only when written
+    payload_buffer.flush(test_id)
+
+
+def _check_edit_access(db: DbSession, test_id: str, current_user: User) -> None:
+    """Old versions and diffs carry the answers, so only editors see them."""
+    if not payload_exists(test_id):
+        raise HTTPException(status_code=404, detail="Test not found")
+    if not access_service.can_edit_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Only owner can view test history")
+    payload_buffer.flush(test_id)
+
+
+@router.get("/{test_id}/versions")
+def get_versions(
+    test_id: str,
+    current_user: Annotated[User | None, Depends(get_optional_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> dict[str, object]:
+    """List recorded versions of a test, oldest first."""
+    _check_view_access(db, test_id, current_user)
+    return {"testId": test_id, "versions": list_versions(test_id)}
+
+
+@router.get("/{test_id}/versions/diff")
+def get_versions_diff(
+    test_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+    from_version: int = Query(..., alias="from"),
+    to_version: int = Query(..., alias="to"),
+) -> dict[str, object]:
+    """Compare two versions: added, removed and changed questions (owner only)."""
+    _check_edit_access(db, test_id, current_user)
+    return diff_versions(test_id, from_version, to_version)
+
+
+@router.get("/{test_id}/versions/{version}")
+def get_version(
+    test_id: str,
+    version: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> dict[str, object]:
+    """Get full payload of a recorded version (owner only)."""
+    _check_edit_access(db, test_id, current_user)
+    return materialize_version(test_id, version)
+
+
+@router.post("/{test_id}/versions/{version}/restore")
+def restore_version(
+    test_id: str,
+    version: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[DbSession, Depends(get_db)],
+) -> dict[str, object]:
+    """Restore an old version by saving it as the newest one.
+
+    History is immutable: the restored content gets a new version number.
+    """
+    if not payload_exists(test_id):
+        raise HTTPException(status_code=404, detail="Test not found")
+    if not access_service.can_edit_test(db, test_id, current_user):
+        raise HTTPException(status_code=403, detail="Only owner can edit test")
+
+    payload_buffer.flush(test_id)
+    restored = materialize_version(test_id, version)
+    restored["id"] = test_id
+    restored["version"] = load_test_payload(test_id).get("version")
+    save_test_payload(test_id, restored, coalesce=False)
+
+    return {"restoredFrom": version, "metadata": serialize_metadata(restored)}
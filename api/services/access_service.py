@@ -218,6 +218,14 @@ def get_accessible_test_ids(
     return list(result)
 
 
+def get_controlled_test_ids(db: DbSession) -> list[str]:
+    """Get test_ids that have an access control record.
+
+    Tests without one are legacy tests visible to everyone.
+    """
+    return list(db.execute(select(TestCollection.test_id)).scalars().all())
+
+
 def delete_test_collection(db: DbSession, test_id: str) -> bool:
     """Delete test collection and all its shares."""
     collection = get_test_collection(db, test_id)
@@ -0,0 +1,300 @@
+"""Collection of orphaned test assets.
+
+An asset is orphaned when no image inline of the test references it -
+neither in the current payload nor in any version recorded during the last
+``ASSET_GC_HISTORY_DAYS`` (so restoring a recent version keeps its
+images). Orphans younger than ``ASSET_GC_GRACE_HOURS`` are kept: they may
+be fresh uploads whose question is still being written.
+
+Quarantined assets are deleted after ``ASSET_GC_QUARANTINE_DAYS``.
+
+Runs are incremental: a test is scanned again only when its payload or
+assets changed since the last run, or when an asset kept back by the grace
+period or history window may have become collectable.
+"""
+import logging
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path, PurePosixPath
+
+from api.config import (
+    ASSET_GC_GRACE_HOURS,
+    ASSET_GC_HISTORY_DAYS,
+    ASSET_GC_INTERVAL_HOURS,
+    ASSET_GC_MODE,
+    ASSET_GC_QUARANTINE_DAYS,
+    ASSET_GC_STATE_PATH,
+)
+from api.services.asset_store import (
+    collect_garbage,
+    iter_test_assets,
+    load_manifest,
+    manifest_path,
+    pack_path,
+    remove_assets,
+)
+from api.services.snapshot_service import iter_history_records
+from api.services.test_service import flush_test_payload, load_test_payload
+from api.utils import (
+    assets_dir,
+    binary_payload_path,
+    iter_test_dirs,
+    json_dump_bytes,
+    json_load,
+    payload_path,
+    test_dir,
+    write_bytes_atomic,
+)
+from core.serialization import iter_image_inlines
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+QUARANTINE_DIR_NAME = "quarantine"
+_STAMP_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def _load_state() -> dict[str, dict[str, object]]:
+    try:
+        state = json_load(ASSET_GC_STATE_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get("stateVersion") != STATE_VERSION:
+        return {}
+    return state.get("tests") or {}
+
+
+def _save_state(tests: dict[str, dict[str, object]]) -> None:
+    write_bytes_atomic(
+        ASSET_GC_STATE_PATH,
+        json_dump_bytes({"stateVersion": STATE_VERSION, "tests": tests}, pretty=False),
+    )
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _signature(test_id: str) -> str:
+    """Cheap fingerprint of everything that can change a test's orphans."""
+    return ":".join(
+        str(_mtime_ns(path))
+        for path in (
+            payload_path(test_id),
+            binary_payload_path(test_id),
+            manifest_path(test_id),
+            assets_dir(test_id),
+        )
+    )
+
+
+def _referenced_sources(test_id: str, history_since: str) -> tuple[set[str], set[str]]:
+    """Get srcs referenced by the current payload and by recent history."""
+    current = {
+        PurePosixPath(inline["src"]).as_posix()
+        for inline in iter_image_inlines(load_test_payload(test_id).get("questions"))
+        if isinstance(inline.get("src"), str)
+    }
+    history = {
+        PurePosixPath(inline["src"]).as_posix()
+        for record in iter_history_records(test_id, history_since)
+        for inline in iter_image_inlines(record)
+        if isinstance(inline.get("src"), str)
+    }
+    return current, history - current
+
+
+def _asset_ages(test_id: str) -> dict[str, tuple[float, int]]:
+    """Map asset name -> (added Unix time, size)."""
+    manifest = load_manifest(test_id)
+    ages = {}
+    for name, path in iter_test_assets(test_id):
+        entry = manifest.get(name)
+        if entry is not None:
+            ages[name] = (entry.get("added") or 0, entry["size"])
+        else:
+            stat = path.stat()
+            ages[name] = (stat.st_mtime, stat.st_size)
+    return ages
+
+
+def _scan_test(test_id: str, now: float, history_since: str) -> dict[str, object]:
+    """Find collectable orphans of one test and when to look again."""
+    flush_test_payload(test_id)
+    current, history_only = _referenced_sources(test_id, history_since)
+    grace = ASSET_GC_GRACE_HOURS * 3600
+    orphans = []
+    recheck_at = None
+    for name, (added, size) in sorted(_asset_ages(test_id).items()):
+        if name in current:
+            continue
+        if name in history_only:
+            # Becomes collectable once the versions using it age out; the
+            # exact version is unknown, so look again after a day
+            candidate = now + 24 * 3600
+        elif added > now - grace:
+            candidate = added + grace
+        else:
+            orphans.append({"name": name, "size": size})
+            continue
+        recheck_at = candidate if recheck_at is None else min(recheck_at, candidate)
+    return {"orphans": orphans, "recheckAt": recheck_at}
+
+
+def _purge_quarantine(test_id: str, cutoff: datetime, dry_run: bool) -> tuple[int, int]:
+    """Delete quarantine folders of a test stamped before ``cutoff``.
+
+    Returns the number of folders and the bytes freed (files still linked
+    elsewhere free nothing).
+    """
+    base = test_dir(test_id) / QUARANTINE_DIR_NAME
+    if not base.is_dir():
+        return 0, 0
+    purged = freed = 0
+    for directory in sorted(base.iterdir()):
+        try:
+            stamp = datetime.strptime(directory.name, _STAMP_FORMAT).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        if stamp >= cutoff or not directory.is_dir():
+            continue
+        for path in directory.rglob("*"):
+            if path.is_file():
+                stat = path.stat()
+                if stat.st_nlink == 1:
+                    freed += stat.st_size
+        purged += 1
+        if not dry_run:
+            shutil.rmtree(directory)
+    if not dry_run and not any(base.iterdir()):
+        base.rmdir()
+    return purged, freed
+
+
+def collect_orphaned_assets(
+    test_ids: list[str] | None = None,
+    dry_run: bool = False,
+    full: bool = False,
+    mode: str | None = None,
+) -> dict[str, object]:
+    """Remove or quarantine orphaned assets and purge old quarantines.
+
+    Without ``test_ids`` all tests are considered, but only those changed
+    since the last run are scanned unless ``full`` is set. ``dry_run``
+    reports orphans without touching files or the incremental state.
+    The report separates bytes moved to quarantine (still on disk) from
+    bytes actually freed.
+    """
+    mode = mode or ASSET_GC_MODE
+    if mode not in ("quarantine", "delete"):
+        raise ValueError(f"Unknown asset GC mode: {mode}")
+
+    now = time.time()
+    history_since = (
+        datetime.now(timezone.utc) - timedelta(days=ASSET_GC_HISTORY_DAYS)
+    ).isoformat()
+    state = _load_state()
+    if test_ids is None:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    report: dict[str, object] = {
+        "dryRun": dry_run,
+        "mode": mode,
+        "scanned": 0,
+        "skipped": 0,
+        "orphans": [],
+        "quarantinedBytes": 0,
+        "freedBytes": 0,
+        "purgedQuarantines": 0,
+    }
+    quarantine_stamp = datetime.now(timezone.utc).strftime(_STAMP_FORMAT)
+    quarantine_cutoff = datetime.now(timezone.utc) - timedelta(days=ASSET_GC_QUARANTINE_DAYS)
+    for test_id in test_ids:
+        if ASSET_GC_QUARANTINE_DAYS > 0:
+            purged, freed = _purge_quarantine(test_id, quarantine_cutoff, dry_run)
+            report["purgedQuarantines"] += purged
+            report["freedBytes"] += freed
+
+    for test_id in test_ids:
+        if pack_path(test_id).exists():
+            # Packed tests are idle: nothing changed since they were scanned
+            report["skipped"] += 1
+            continue
+        signature = _signature(test_id)
+        previous = state.get(test_id)
+        if (
+            not full
+            and previous is not None
+            and previous.get("signature") == signature
+            and (previous.get("recheckAt") is None or previous["recheckAt"] > now)
+        ):
+            report["skipped"] += 1
+            continue
+
+        try:
+            scan = _scan_test(test_id, now, history_since)
+        except Exception:
+            logger.exception("Asset GC failed to scan test %s", test_id)
+            continue
+        report["scanned"] += 1
+        orphans = scan["orphans"]
+        report["orphans"].extend({"testId": test_id, **orphan} for orphan in orphans)
+        if dry_run:
+            continue
+
+        if orphans:
+            quarantine_dir = None
+            if mode == "quarantine":
+                quarantine_dir = test_dir(test_id) / QUARANTINE_DIR_NAME / quarantine_stamp
+            removed, freed = remove_assets(
+                test_id, [orphan["name"] for orphan in orphans], quarantine_dir
+            )
+            if quarantine_dir is not None:
+                report["quarantinedBytes"] += removed
+            report["freedBytes"] += freed
+            logger.info("Asset GC: %s %d orphaned assets of test %s",
+                        "quarantined" if quarantine_dir else "deleted", len(orphans), test_id)
+        state[test_id] = {"signature": _signature(test_id), "recheckAt": scan["recheckAt"]}
+
+    if not dry_run:
+        existing = {test_directory.name for test_directory in iter_test_dirs()}
+        _save_state({test_id: entry for test_id, entry in state.items() if test_id in existing})
+        blobs = collect_garbage()
+        report["deletedBlobs"] = blobs["blobs"]
+        report["freedBytes"] += blobs["bytes"]
+    return report
+
+
+def schedule_asset_gc() -> None:
+    """Schedule periodic orphaned asset collection."""
+    if ASSET_GC_INTERVAL_HOURS <= 0:
+        return
+    interval = ASSET_GC_INTERVAL_HOURS * 60 * 60
+
+    def _worker() -> None:
+        # Initial delay before the first run
+        time.sleep(5 * 60)
+        while True:
+            try:
+                report = collect_orphaned_assets()
+                logger.info(
+                    "Asset GC: scanned %d tests (%d unchanged), %d orphans, "
+                    "%d bytes quarantined, %d bytes freed",
+                    report["scanned"], report["skipped"], len(report["orphans"]),
+                    report["quarantinedBytes"], report["freedBytes"],
+                )
+            except Exception:
+                logger.exception("Asset GC run failed")
+            time.sleep(interval)
+
+    thread = threading.Thread(
+        target=_worker,
+        name="asset_gc",
+        daemon=True,
+    )
+    thread.start()
@@ -0,0 +1,730 @@
+"""Content-addressed asset store shared by all tests.
+
+Asset files live once in ``BLOBS_DIR/ab/cd/<sha256>``; a test keeps only a
+manifest (``<test>/assets.json``) mapping its asset names to blob hashes.
+The same logo or formula image used by a hundred tests is stored once.
+
+Reference counts (one per manifest entry) are kept in a small SQLite file
+(``BLOBS_DB_PATH``); a blob is deleted by :func:`collect_garbage` once its
+count reaches zero. Updates are ordered so that a crash can only leak a
+blob, never drop a referenced one: new references are counted before the
+manifest is written and released only after it; :func:`rebuild_refcounts`
+recounts from the manifests.
+
+Files written into ``<test>/assets/`` (Word extraction, uploads, bundle
+import) are moved into the store by :func:`ingest_assets`; loose files not
+ingested yet are still served directly.
+
+Blobs only an idle test uses can be moved into one archive per test
+(``<test>/assets.pack``, see :func:`pack_assets`); their manifest entries
+then hold the member location (``pack``) and no reference. Anything that
+needs the test's assets as files unpacks it first.
+"""
+import logging
+import mimetypes
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException
+
+from api.config import ASSET_MANIFEST_CACHE_SIZE, BLOBS_DB_PATH, BLOBS_DIR
+from api.utils import (
+    assets_dir,
+    iter_test_dirs,
+    json_dump_bytes,
+    json_load,
+    link_tree,
+    safe_asset_path,
+    test_dir,
+    write_bytes_atomic,
+)
+from api.services.storage_backend import (
+    get_blob_storage,
+    publish_test_file,
+    sync_test_file,
+)
+from core.asset_names import file_digest, is_content_hash_name
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+PACK_NAME = "assets.pack"
+# Already compressed formats are stored in the archive as is
+_STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+# Cached manifests are revalidated (one stat of assets.json) at most this often
+_MANIFEST_REVALIDATE_SECONDS = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_unreferenced ON blobs (refcount) WHERE refcount <= 0;
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    global _schema_ready
+    BLOBS_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit mode: transactions are opened explicitly (see _transaction)
+    conn = sqlite3.connect(BLOBS_DB_PATH, timeout=30, isolation_level=None)
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _schema_ready = True
+    return conn
+
+
+@contextmanager
+def _transaction() -> Iterator[sqlite3.Connection]:
+    # BEGIN IMMEDIATE takes the write lock up front, so placing a blob and
+    # counting it cannot interleave with garbage collection
+    with closing(_connect()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _test_lock(test_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(test_id, threading.Lock())
+
+
+def blob_path(digest: str) -> Path:
+    """Get path of a blob by its SHA-256 hex digest."""
+    return BLOBS_DIR / digest[:2] / digest[2:4] / digest
+
+
+def blob_key(digest: str) -> str:
+    """Get storage backend key of a blob."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def manifest_path(test_id: str) -> Path:
+    """Get path to asset manifest of a test."""
+    return test_dir(test_id) / "assets.json"
+
+
+def pack_path(test_id: str) -> Path:
+    """Get path to the archive of a packed test's assets."""
+    return test_dir(test_id) / PACK_NAME
+
+
+def load_manifest(test_id: str) -> dict[str, dict[str, object]]:
+    """Load asset name -> {"sha256", "size", "added", "type"} map of a test.
+
+    ``added`` is the Unix time the name got its content, ``type`` its media
+    type (missing in older manifests). Packed entries also have ``pack``:
+    {"offset", "length", "deflated"} of the member.
+    """
+    path = manifest_path(test_id)
+    # Throttled: a manifest missing remotely too is not asked for again soon
+    sync_test_file(test_id, path.name)
+    try:
+        data = json_load(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("manifestVersion") != MANIFEST_VERSION:
+        return {}
+    assets = data.get("assets")
+    return assets if isinstance(assets, dict) else {}
+
+
+def _write_manifest(test_id: str, assets: dict[str, dict[str, object]]) -> None:
+    path = manifest_path(test_id)
+    write_bytes_atomic(
+        path,
+        json_dump_bytes({"manifestVersion": MANIFEST_VERSION, "assets": assets}, pretty=False),
+    )
+    if not publish_test_file(test_id, path.name):
+        logger.warning("Assets of test %s were changed on another node; keeping theirs", test_id)
+        sync_test_file(test_id, path.name, force=True)
+        assets = load_manifest(test_id)
+    _cache_records(test_id, _manifest_key(test_id), assets)
+
+
+def _media_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+@dataclass
+class AssetRecord:
+    """Everything needed to serve an asset, precomputed from its manifest entry."""
+
+    sha256: str
+    size: int
+    added: int
+    media_type: str
+    etag: str  # quoted, ready for the ETag header
+    immutable: bool  # content-hashed name: the URL never changes content
+    pack: dict[str, object] | None = None
+    path: Path = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.path = blob_path(self.sha256)
+
+
+def _asset_record(name: str, entry: dict[str, object]) -> AssetRecord:
+    path = PurePosixPath(name)
+    immutable = is_content_hash_name(path.name)
+    # Hashed names carry the content hash; legacy names use the blob's
+    etag = f'"{path.stem}"' if immutable else f'"{entry["sha256"][:16]}-{entry["size"]:x}"'
+    return AssetRecord(
+        entry["sha256"],
+        entry["size"],
+        entry.get("added", 0),
+        entry.get("type") or _media_type(name),
+        etag,
+        immutable,
+        entry.get("pack"),
+    )
+
+
+_manifest_cache: OrderedDict[str, tuple[float, tuple[int, int] | None, dict[str, AssetRecord]]] = (
+    OrderedDict()
+)
+_manifest_cache_lock = threading.Lock()
+
+
+def _manifest_key(test_id: str) -> tuple[int, int] | None:
+    try:
+        stat = manifest_path(test_id).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _cache_records(
+    test_id: str, key: tuple[int, int] | None, assets: dict[str, dict[str, object]]
+) -> dict[str, AssetRecord]:
+    records = {name: _asset_record(name, entry) for name, entry in assets.items()}
+    if ASSET_MANIFEST_CACHE_SIZE <= 0:
+        return records
+    with _manifest_cache_lock:
+        _manifest_cache[test_id] = (time.monotonic(), key, records)
+        _manifest_cache.move_to_end(test_id)
+        while len(_manifest_cache) > ASSET_MANIFEST_CACHE_SIZE:
+            _manifest_cache.popitem(last=False)
+    return records
+
+
+def _forget_records(test_id: str) -> None:
+    with _manifest_cache_lock:
+        _manifest_cache.pop(test_id, None)
+
+
+def asset_records(test_id: str, refresh: bool = False) -> dict[str, AssetRecord]:
+    """Get asset name -> :class:`AssetRecord` map of a test.
+
+    Maps are kept in memory (LRU of ``ASSET_MANIFEST_CACHE_SIZE`` tests)
+    and revalidated against ``assets.json`` - one stat - at most once a
+    second, or on every call with ``refresh``. Writes of this process
+    update the cache directly.
+    """
+    now = time.monotonic()
+    with _manifest_cache_lock:
+        cached = _manifest_cache.get(test_id)
+        if cached is not None:
+            _manifest_cache.move_to_end(test_id)
+    if cached is not None and not refresh and now - cached[0] < _MANIFEST_REVALIDATE_SECONDS:
+        return cached[2]
+    sync_test_file(test_id, manifest_path(test_id).name)
+    # Taken before loading: a manifest replaced meanwhile is reloaded next time
+    key = _manifest_key(test_id)
+    if cached is not None and key is not None and key == cached[1]:
+        with _manifest_cache_lock:
+            if test_id in _manifest_cache:
+                _manifest_cache[test_id] = (now, key, cached[2])
+        return cached[2]
+    return _cache_records(test_id, key, load_manifest(test_id))
+
+
+def lookup_asset(test_id: str, asset_path: str) -> AssetRecord | None:
+    """Get record of an asset in the blob store (None for loose/unknown names)."""
+    name = PurePosixPath(asset_path).as_posix()
+    record = asset_records(test_id).get(name)
+    if record is None:
+        # The name may have been added by another process just now
+        record = asset_records(test_id, refresh=True).get(name)
+    return record
+
+
+def _publish_blobs(digests: list[str]) -> None:
+    """Upload new blobs to a remote backend (before any manifest uses them)."""
+    storage = get_blob_storage()
+    if not storage.remote:
+        return
+    for digest in digests:
+        if storage.head(blob_key(digest)) is None:
+            storage.put_file(blob_key(digest), blob_path(digest))
+
+
+def _change_refcounts(conn: sqlite3.Connection, changes: dict[str, tuple[int, int]]) -> None:
+    """Apply hash -> (size, delta) reference count changes."""
+    conn.executemany(
+        "INSERT INTO blobs (hash, size, refcount) VALUES (?, ?, ?) "
+        "ON CONFLICT(hash) DO UPDATE SET refcount = refcount + excluded.refcount",
+        [(digest, size, delta) for digest, (size, delta) in changes.items() if delta],
+    )
+
+
+def _release(entries: list[dict[str, object]]) -> None:
+    changes: dict[str, tuple[int, int]] = {}
+    for entry in entries:
+        if "pack" in entry:
+            continue  # packed entries hold no reference
+        size, delta = changes.get(entry["sha256"], (entry["size"], 0))
+        changes[entry["sha256"]] = (size, delta - 1)
+    if not changes:
+        return
+    with _transaction() as conn:
+        _change_refcounts(conn, changes)
+
+
+def _loose_files(test_id: str) -> list[Path]:
+    directory = assets_dir(test_id)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path
+        for path in directory.rglob("*")
+        if path.is_file() and not path.name.startswith(".")
+    )
+
+
+def _place_blob(path: Path, digest: str) -> int:
+    """Make sure the blob exists; returns bytes freed by dropping ``path``."""
+    target = blob_path(digest)
+    stat = path.stat()
+    if target.exists():
+        same_file = target.stat().st_ino == stat.st_ino
+        return 0 if same_file or stat.st_nlink > 1 else stat.st_size
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{digest}.tmp")
+    try:
+        os.link(path, tmp_path)
+        freed = 0
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+        freed = stat.st_size if stat.st_nlink == 1 else 0
+    os.chmod(tmp_path, 0o444)
+    os.replace(tmp_path, target)
+    return freed
+
+
+def ingest_assets(test_id: str) -> dict[str, int]:
+    """Move loose files of ``<test>/assets/`` into the blob store.
+
+    Returns counts of ingested files, their bytes and the bytes of disk
+    space freed because the content was already stored.
+    """
+    stats = {"files": 0, "bytes": 0, "reclaimed": 0}
+    with _test_lock(test_id):
+        loose = _loose_files(test_id)
+        if not loose:
+            return stats
+
+        base = assets_dir(test_id)
+        manifest = load_manifest(test_id)
+        released: list[dict[str, object]] = []
+        acquired: dict[str, tuple[int, int]] = {}
+        with _transaction() as conn:
+            for path in loose:
+                digest = file_digest(path)
+                stat = path.stat()
+                size = stat.st_size
+                stats["reclaimed"] += _place_blob(path, digest)
+                stats["files"] += 1
+                stats["bytes"] += size
+
+                name = path.relative_to(base).as_posix()
+                previous = manifest.get(name)
+                if previous is not None and previous["sha256"] == digest:
+                    continue
+                if previous is not None:
+                    released.append(previous)
+                _, delta = acquired.get(digest, (size, 0))
+                acquired[digest] = (size, delta + 1)
+                manifest[name] = {
+                    "sha256": digest,
+                    "size": size,
+                    "added": int(stat.st_mtime),
+                    "type": _media_type(name),
+                }
+            _change_refcounts(conn, acquired)
+
+        _publish_blobs(list(acquired))
+        _write_manifest(test_id, manifest)
+        _release(released)
+        for path in loose:
+            path.unlink(missing_ok=True)
+        for directory in sorted(base.rglob("*"), reverse=True):
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
+    return stats
+
+
+def resolve_asset(test_id: str, asset_path: str) -> Path:
+    """Get file serving an asset name: its blob, or a loose file."""
+    name = PurePosixPath(asset_path)
+    if name.is_absolute() or ".." in name.parts:
+        raise HTTPException(status_code=400, detail="Invalid asset path")
+    record = lookup_asset(test_id, asset_path)
+    if record is not None:
+        if record.pack is not None:
+            unpack_assets(test_id)
+        return record.path
+    return safe_asset_path(assets_dir(test_id), asset_path)
+
+
+def asset_digest(test_id: str, asset_path: str) -> str | None:
+    """Get SHA-256 of an asset stored in the blob store (None for loose files)."""
+    record = lookup_asset(test_id, asset_path)
+    return record.sha256 if record is not None else None
+
+
+def iter_test_assets(test_id: str) -> Iterator[tuple[str, Path]]:
+    """Yield (asset name, file) of every asset of a test, sorted by name.
+
+    A packed test is unpacked first.
+    """
+    unpack_assets(test_id)
+    assets = {
+        name: blob_path(entry["sha256"]) for name, entry in load_manifest(test_id).items()
+    }
+    base = assets_dir(test_id)
+    for path in _loose_files(test_id):
+        assets.setdefault(path.relative_to(base).as_posix(), path)
+    for name in sorted(assets):
+        yield name, assets[name]
+
+
+def count_test_assets(test_id: str) -> int:
+    """Count assets of a test from its manifest and loose files.
+
+    Unlike :func:`iter_test_assets` this never unpacks a packed test.
+    """
+    names = set(load_manifest(test_id))
+    base = assets_dir(test_id)
+    names.update(path.relative_to(base).as_posix() for path in _loose_files(test_id))
+    return len(names)
+
+
+def add_asset_name(test_id: str, name: str, source_name: str) -> bool:
+    """Make ``name`` another name of the blob behind ``source_name``.
+
+    Returns False if ``source_name`` is not in the manifest.
+    """
+    unpack_assets(test_id)
+    with _test_lock(test_id):
+        manifest = load_manifest(test_id)
+        entry = manifest.get(source_name)
+        if entry is None:
+            return False
+        previous = manifest.get(name)
+        if previous is not None and previous["sha256"] == entry["sha256"]:
+            return True
+        with _transaction() as conn:
+            _change_refcounts(conn, {entry["sha256"]: (entry["size"], 1)})
+        manifest[name] = dict(entry, added=int(time.time()), type=_media_type(name))
+        _write_manifest(test_id, manifest)
+        if previous is not None:
+            _release([previous])
+    return True
+
+
+def copy_test_assets(source_id: str, target_id: str) -> dict[str, int]:
+    """Give target test the assets of source test without copying blobs.
+
+    Loose (not yet ingested) files are hardlinked. Returns counts of shared
+    blobs and linked/copied loose files.
+    """
+    unpack_assets(source_id)
+    manifest = load_manifest(source_id)
+    if manifest:
+        acquired: dict[str, tuple[int, int]] = {}
+        for entry in manifest.values():
+            size, delta = acquired.get(entry["sha256"], (entry["size"], 0))
+            acquired[entry["sha256"]] = (size, delta + 1)
+        with _test_lock(target_id):
+            with _transaction() as conn:
+                _change_refcounts(conn, acquired)
+            _write_manifest(target_id, manifest)
+    linked, copied = link_tree(assets_dir(source_id), assets_dir(target_id))
+    return {"shared": len(manifest), "linked": linked, "copied": copied}
+
+
+def remove_assets(
+    test_id: str, names: list[str], quarantine_dir: Path | None = None
+) -> tuple[int, int]:
+    """Remove assets of a test by name.
+
+    With ``quarantine_dir`` the files are kept there (same relative names)
+    instead of being dropped. Blobs are released; call
+    :func:`collect_garbage` to delete the ones left unreferenced. Returns
+    bytes removed from the test and bytes of loose files already freed.
+    """
+    unpack_assets(test_id)
+    removed = freed = 0
+    with _test_lock(test_id):
+        manifest = load_manifest(test_id)
+        released = []
+        base = assets_dir(test_id)
+        for name in names:
+            entry = manifest.get(name)
+            path = blob_path(entry["sha256"]) if entry is not None else base / name
+            if not path.is_file():
+                continue
+            size = path.stat().st_size
+            if quarantine_dir is not None:
+                target = quarantine_dir / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(path, target)
+                except OSError:
+                    shutil.copyfile(path, target)
+            if entry is not None:
+                released.append(manifest.pop(name))
+            else:
+                if path.stat().st_nlink == 1:
+                    freed += size
+                path.unlink()
+            removed += size
+        if released:
+            _write_manifest(test_id, manifest)
+            _release(released)
+    return removed, freed
+
+
+def release_test_assets(test_id: str) -> None:
+    """Drop references of a test being deleted and collect its garbage."""
+    with _test_lock(test_id):
+        entries = list(load_manifest(test_id).values())
+        _release(entries)
+        manifest_path(test_id).unlink(missing_ok=True)
+        _forget_records(test_id)
+    if entries:
+        collect_garbage()
+
+
+def collect_garbage(dry_run: bool = False) -> dict[str, int]:
+    """Delete blobs no test references any more.
+
+    Only local files are deleted: copies in a remote storage backend may
+    still be referenced by tests of other nodes.
+    """
+    stats = {"blobs": 0, "bytes": 0}
+    with _transaction() as conn:
+        rows = conn.execute(
+            "SELECT hash, size FROM blobs WHERE refcount <= 0"
+        ).fetchall()
+        for digest, size in rows:
+            stats["blobs"] += 1
+            stats["bytes"] += size
+            if not dry_run:
+                blob_path(digest).unlink(missing_ok=True)
+        if not dry_run:
+            conn.executemany("DELETE FROM blobs WHERE hash = ?", [(row[0],) for row in rows])
+    return stats
+
+
+def rebuild_refcounts() -> dict[str, int]:
+    """Recount references from all manifests.
+
+    Blob files without any reference get a zero count, so the next
+    :func:`collect_garbage` removes them.
+    """
+    counts: dict[str, tuple[int, int]] = {}
+    for test_directory in iter_test_dirs():
+        for entry in load_manifest(test_directory.name).values():
+            if "pack" in entry:
+                continue
+            size, count = counts.get(entry["sha256"], (entry["size"], 0))
+            counts[entry["sha256"]] = (size, count + 1)
+    if BLOBS_DIR.is_dir():
+        for path in BLOBS_DIR.glob("??/??/*"):
+            if not path.name.startswith("."):
+                counts.setdefault(path.name, (path.stat().st_size, 0))
+
+    with _transaction() as conn:
+        conn.execute("DELETE FROM blobs")
+        conn.executemany(
+            "INSERT INTO blobs (hash, size, refcount) VALUES (?, ?, ?)",
+            [(digest, size, count) for digest, (size, count) in counts.items()],
+        )
+    return {
+        "blobs": len(counts),
+        "unreferenced": sum(1 for _, count in counts.values() if not count),
+    }
+
+
+def _member_offset(pack: BinaryIO, info: zipfile.ZipInfo) -> int:
+    """Get offset of a member's data (the local header has its own extra)."""
+    pack.seek(info.header_offset)
+    header = _ZIP_LOCAL_HEADER.unpack(pack.read(_ZIP_LOCAL_HEADER.size))
+    name_length, extra_length = header[-2], header[-1]
+    return info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length
+
+
+def pack_assets(test_id: str) -> dict[str, int]:
+    """Move blobs used only by this test into the test's asset archive.
+
+    Blobs shared with other tests stay in the store. Returns counts of
+    archived blobs, their bytes and the archive size.
+    """
+    stats = {"files": 0, "bytes": 0, "packed": 0}
+    ingest_assets(test_id)
+    with _test_lock(test_id):
+        path = pack_path(test_id)
+        if path.exists():
+            return stats
+        manifest = load_manifest(test_id)
+        own: dict[str, int] = {}
+        for entry in manifest.values():
+            own[entry["sha256"]] = own.get(entry["sha256"], 0) + 1
+        if not own:
+            return stats
+        with closing(_connect()) as conn:
+            refcounts = dict(conn.execute(
+                f"SELECT hash, refcount FROM blobs WHERE hash IN ({','.join('?' * len(own))})",
+                list(own),
+            ).fetchall())
+        exclusive = {}
+        for name, entry in sorted(manifest.items()):
+            digest = entry["sha256"]
+            if refcounts.get(digest) == own[digest] and blob_path(digest).is_file():
+                exclusive.setdefault(digest, PurePosixPath(name).suffix.lower())
+        if not exclusive:
+            return stats
+
+        # Members are named by hash: names sharing a blob share the member
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with zipfile.ZipFile(tmp_path, "w") as archive:
+            for digest, suffix in exclusive.items():
+                compress_type = (
+                    zipfile.ZIP_STORED if suffix in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                )
+                archive.write(blob_path(digest), digest, compress_type=compress_type)
+        locations = {}
+        with zipfile.ZipFile(tmp_path) as archive, tmp_path.open("rb") as pack:
+            for info in archive.infolist():
+                locations[info.filename] = {
+                    "offset": _member_offset(pack, info),
+                    "length": info.compress_size,
+                    "deflated": info.compress_type == zipfile.ZIP_DEFLATED,
+                }
+        with tmp_path.open("rb") as pack:
+            os.fsync(pack.fileno())
+        os.replace(tmp_path, path)
+
+        released = []
+        for entry in manifest.values():
+            if entry["sha256"] in locations:
+                released.append(dict(entry))
+                entry["pack"] = locations[entry["sha256"]]
+        _write_manifest(test_id, manifest)
+        _release(released)
+        stats["files"] = len(locations)
+        stats["bytes"] = sum(blob_path(digest).stat().st_size for digest in locations)
+        stats["packed"] = path.stat().st_size
+    collect_garbage()
+    return stats
+
+
+def _read_member(pack: BinaryIO, location: dict[str, object]) -> Iterator[bytes]:
+    pack.seek(location["offset"])
+    remaining = location["length"]
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if location["deflated"] else None
+    while remaining > 0:
+        chunk = pack.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise OSError("Asset archive is truncated")
+        remaining -= len(chunk)
+        yield decompressor.decompress(chunk) if decompressor else chunk
+    if decompressor:
+        yield decompressor.flush()
+
+
+def unpack_assets(test_id: str) -> int:
+    """Move a packed test's assets back into the blob store.
+
+    Returns the number of asset names unpacked (0 if not packed).
+    """
+    path = pack_path(test_id)
+    if not path.exists():
+        return 0
+    with _test_lock(test_id):
+        if not path.exists():
+            return 0
+        manifest = load_manifest(test_id)
+        packed = {name: entry for name, entry in manifest.items() if "pack" in entry}
+        acquired: dict[str, tuple[int, int]] = {}
+        # Blobs are placed and counted in one transaction, so garbage
+        # collection cannot delete them in between
+        with _transaction() as conn, path.open("rb") as pack:
+            for entry in packed.values():
+                digest = entry["sha256"]
+                target = blob_path(digest)
+                if digest not in acquired and not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = target.with_name(f".{digest}.tmp")
+                    with tmp_path.open("wb") as blob:
+                        for chunk in _read_member(pack, entry["pack"]):
+                            blob.write(chunk)
+                    os.chmod(tmp_path, 0o444)
+                    os.replace(tmp_path, target)
+                size, delta = acquired.get(digest, (entry["size"], 0))
+                acquired[digest] = (size, delta + 1)
+            _change_refcounts(conn, acquired)
+        for entry in packed.values():
+            del entry["pack"]
+        _write_manifest(test_id, manifest)
+        path.unlink()
+    return len(packed)
+
+
+def open_packed_asset(test_id: str, asset_path: str) -> tuple[AssetRecord, BinaryIO] | None:
+    """Open the archive holding a packed asset.
+
+    Returns (asset record, open archive) or None when the asset is not
+    packed (including a test unpacked meanwhile).
+    """
+    record = lookup_asset(test_id, asset_path)
+    if record is None or record.pack is None:
+        return None
+    try:
+        return record, pack_path(test_id).open("rb")
+    except FileNotFoundError:
+        asset_records(test_id, refresh=True)  # unpacked by another process
+        return None
+
+
+def iter_packed_asset(pack: BinaryIO, record: AssetRecord) -> Iterator[bytes]:
+    """Yield content of a packed asset, closing the archive at the end."""
+    with pack:
+        yield from _read_member(pack, record.pack)
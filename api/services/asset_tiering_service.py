@@ -0,0 +1,153 @@
+"""Cold storage tier for assets of idle tests.
+
+Tests are used for a semester and then sit idle for years. The assets of a
+test nobody opened for ``ASSET_TIER_IDLE_DAYS`` are packed into a single
+archive (see :func:`api.services.asset_store.pack_assets`), which is served
+directly. The first access of a packed test promotes it back to the blob
+store in the background.
+
+Last access is an empty ``.accessed`` marker in the test directory whose
+mtime is bumped at most once an hour per process; payload writes count as
+access as well.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from api.config import ASSET_TIER_IDLE_DAYS, ASSET_TIER_INTERVAL_HOURS
+from api.services.asset_store import pack_assets, pack_path, unpack_assets
+from api.utils import binary_payload_path, iter_test_dirs, payload_path, test_dir
+
+logger = logging.getLogger(__name__)
+
+ACCESS_MARKER = ".accessed"
+# Bump the access marker of a test at most this often
+_TOUCH_INTERVAL = 3600
+# Tests remembered as recently touched (least recently used are dropped)
+_TOUCHED_LIMIT = 10000
+
+_touched: OrderedDict[str, float] = OrderedDict()
+_touched_lock = threading.Lock()
+_promoter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset_promote")
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def last_access(test_id: str) -> float:
+    """Get Unix time a test was last read or written."""
+    return max(
+        _mtime(test_dir(test_id) / ACCESS_MARKER),
+        _mtime(payload_path(test_id)),
+        _mtime(binary_payload_path(test_id)),
+    )
+
+
+def _promote(test_id: str) -> None:
+    try:
+        count = unpack_assets(test_id)
+    except Exception:
+        logger.exception("Failed to promote assets of test %s", test_id)
+        return
+    if count:
+        logger.info("Promoted %d assets of test %s from cold storage", count, test_id)
+
+
+def record_test_access(test_id: str) -> None:
+    """Mark a test as used; promotes a packed test in the background."""
+    now = time.time()
+    with _touched_lock:
+        if now - _touched.get(test_id, 0.0) < _TOUCH_INTERVAL:
+            return
+    # Only existing tests are remembered: any id can come in a URL
+    directory = test_dir(test_id)
+    if not directory.is_dir():
+        return
+    with _touched_lock:
+        _touched[test_id] = now
+        _touched.move_to_end(test_id)
+        while len(_touched) > _TOUCHED_LIMIT:
+            _touched.popitem(last=False)
+    (directory / ACCESS_MARKER).touch()
+    if pack_path(test_id).exists():
+        _promoter.submit(_promote, test_id)
+
+
+def tier_test_assets(
+    test_ids: list[str] | None = None,
+    idle_days: int | None = None,
+    dry_run: bool = False,
+) -> dict[str, object]:
+    """Pack assets of idle tests and promote packed tests used since.
+
+    Returns a report with the packed and promoted test ids and the number
+    of blob files moved into archives.
+    """
+    idle_days = ASSET_TIER_IDLE_DAYS if idle_days is None else idle_days
+    cutoff = time.time() - idle_days * 24 * 3600
+    if test_ids is None:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    report: dict[str, object] = {
+        "dryRun": dry_run,
+        "packed": [],
+        "promoted": [],
+        "files": 0,
+        "bytes": 0,
+    }
+    for test_id in test_ids:
+        accessed = last_access(test_id)
+        packed_at = _mtime(pack_path(test_id))
+        try:
+            if packed_at:
+                if accessed > packed_at:
+                    report["promoted"].append(test_id)
+                    if not dry_run:
+                        unpack_assets(test_id)
+            elif idle_days > 0 and accessed < cutoff:
+                if dry_run:
+                    report["packed"].append(test_id)
+                    continue
+                stats = pack_assets(test_id)
+                if stats["files"]:
+                    report["packed"].append(test_id)
+                    report["files"] += stats["files"]
+                    report["bytes"] += stats["bytes"]
+        except Exception:
+            logger.exception("Asset tiering failed for test %s", test_id)
+    return report
+
+
+def schedule_asset_tiering() -> None:
+    """Schedule periodic packing of idle tests' assets."""
+    if ASSET_TIER_INTERVAL_HOURS <= 0 or ASSET_TIER_IDLE_DAYS <= 0:
+        return
+    interval = ASSET_TIER_INTERVAL_HOURS * 60 * 60
+
+    def _worker() -> None:
+        # Initial delay before the first run
+        time.sleep(10 * 60)
+        while True:
+            try:
+                report = tier_test_assets()
+                logger.info(
+                    "Asset tiering: packed %d tests (%d files), promoted %d",
+                    len(report["packed"]), report["files"], len(report["promoted"]),
+                )
+            except Exception:
+                logger.exception("Asset tiering run failed")
+            time.sleep(interval)
+
+    thread = threading.Thread(
+        target=_worker,
+        name="asset_tiering",
+        daemon=True,
+    )
+    thread.start()
@@ -16,6 +16,7 @@ def get_or_create_attempt(
     client_id: str,
     user_id: int | None = None,
     settings: dict[str, Any] | None = None,
+    test_version: int | None = None,
 ) -> Attempt:
     """
     Get existing attempt or create a new one.
@@ -37,6 +38,7 @@ def get_or_create_attempt(
         test_id=test_id,
         client_id=client_id,
         user_id=user_id,
+        test_version=test_version,
         status=AttemptStatus.IN_PROGRESS.value,
     )
     if settings:
@@ -56,6 +58,7 @@ def start_attempt(
     user_id: int | None = None,
     settings: dict[str, Any] | None = None,
     questions: list[dict[str, Any]] | None = None,
+    test_version: int | None = None,
 ) -> Attempt:
     """
     Start a new attempt with question snapshots.
@@ -68,9 +71,10 @@ def start_attempt(
         user_id: Optional authenticated user ID
         settings: Attempt settings (question count, randomization, etc.)
         questions: List of questions in the attempt (from session)
+        test_version: Test version the questions were taken from
     """
     attempt = get_or_create_attempt(
-        db, attempt_id, test_id, client_id, user_id, settings
+        db, attempt_id, test_id, client_id, user_id, settings, test_version
     )
 
     # Store question snapshots
@@ -140,6 +144,9 @@ def record_answer(
 ) -> AttemptAnswer:
     """
     Record or update an answer for a question in an attempt.
+
+    When the question snapshot knows the correct option, the answer is
+    graded against it and ``is_correct`` from the client is ignored.
     """
     # Get or create answer record
     answer = db.execute(
@@ -159,6 +166,9 @@ def record_answer(
         )
         db.add(answer)
 
+    if answer.correct_option_index is not None and not is_skipped:
+        is_correct = answer_index == answer.correct_option_index
+
     # Update answer data
     answer.answer_index = answer_index
     answer.is_correct = is_correct
@@ -0,0 +1,306 @@
+"""Zip bundles for backing up and moving tests between instances.
+
+Bundle layout::
+
+    tests/<test_id>/test.json        payload (expanded JSON, any storage format)
+    tests/<test_id>/meta.json        metadata sidecar
+    tests/<test_id>/statistics.json  attempt statistics (optional)
+    tests/<test_id>/assets/...       asset files
+    manifest.json                    tests with size and SHA-256 of every file
+
+Export is a generator of zip chunks, so the archive is never held in memory;
+the manifest is written last because hashes are computed while streaming.
+Import copies entries in chunks to a staging directory, verifying size and
+hash against the manifest before anything becomes visible.
+"""
+import hashlib
+import re
+import shutil
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException
+
+from api.config import DATA_DIR
+from api.services.asset_store import ingest_assets, iter_test_assets
+from api.services.test_metadata import load_test_metadata
+from api.services.test_service import load_test_payload, write_stored_payload
+from api.utils import json_dump_bytes, json_load, test_dir
+
+BUNDLE_FORMAT = "testmaster-bundle"
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1024 * 1024
+
+# Already compressed formats are stored as is
+_STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".docx"}
+_TEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_TEST_FILES = {"test.json", "meta.json", "statistics.json"}
+_STAGED_PAYLOAD = "bundle-test.json"
+
+
+class _ChunkSink:
+    """Write-only, non-seekable sink collecting zip output between yields."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _compress_type(name: str) -> int:
+    if PurePosixPath(name).suffix.lower() in _STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _zip_info(name: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = _compress_type(name)
+    return info
+
+
+def _write_data(
+    archive: zipfile.ZipFile, prefix: str, name: str, data: bytes, files: list
+) -> None:
+    archive.writestr(_zip_info(f"{prefix}/{name}"), data)
+    files.append(
+        {"path": name, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+    )
+
+
+def _write_file(
+    archive: zipfile.ZipFile,
+    sink: _ChunkSink,
+    prefix: str,
+    name: str,
+    path: Path,
+    files: list,
+) -> Iterator[bytes]:
+    digest = hashlib.sha256()
+    size = 0
+    info = zipfile.ZipInfo.from_file(path, f"{prefix}/{name}")
+    info.compress_type = _compress_type(name)
+    with path.open("rb") as source, archive.open(info, "w") as target:
+        while chunk := source.read(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            target.write(chunk)
+            data = sink.drain()
+            if data:
+                yield data
+    files.append({"path": name, "size": size, "sha256": digest.hexdigest()})
+
+
+def iter_export_bundle(
+    test_ids: list[str], statistics: dict[str, dict[str, object]] | None = None
+) -> Iterator[bytes]:
+    """Stream a zip bundle of tests chunk by chunk.
+
+    ``statistics`` maps test id to attempt statistics to include.
+    """
+    sink = _ChunkSink()
+    manifest_tests = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for test_id in test_ids:
+            prefix = f"tests/{test_id}"
+            files: list[dict[str, object]] = []
+            payload = load_test_payload(test_id)
+            documents = {
+                "test.json": payload,
+                "meta.json": load_test_metadata(test_id),
+            }
+            if statistics and test_id in statistics:
+                documents["statistics.json"] = statistics[test_id]
+            for name, document in documents.items():
+                _write_data(
+                    archive, prefix, name, json_dump_bytes(document, pretty=False), files
+                )
+            yield sink.drain()
+
+            for asset_name, path in iter_test_assets(test_id):
+                yield from _write_file(
+                    archive, sink, prefix, f"assets/{asset_name}", path, files
+                )
+
+            manifest_tests.append(
+                {
+                    "id": test_id,
+                    "title": payload.get("title"),
+                    "questionCount": len(payload.get("questions") or []),
+                    "files": files,
+                }
+            )
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": BUNDLE_VERSION,
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "tests": manifest_tests,
+        }
+        archive.writestr(_zip_info(MANIFEST_NAME), json_dump_bytes(manifest, pretty=True))
+    yield sink.drain()
+
+
+def _read_manifest(archive: zipfile.ZipFile) -> dict[str, object]:
+    try:
+        manifest = json_load(archive.read(MANIFEST_NAME))
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Bundle has no manifest")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid bundle manifest")
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("format") != BUNDLE_FORMAT
+        or not isinstance(manifest.get("tests"), list)
+    ):
+        raise HTTPException(status_code=400, detail="Not a test bundle")
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported bundle version: {manifest.get('version')}",
+        )
+    return manifest
+
+
+def _checked_file_name(name: object) -> str:
+    """Validate manifest file path (no traversal, known layout only)."""
+    if not isinstance(name, str):
+        raise HTTPException(status_code=400, detail="Invalid file entry in manifest")
+    path = PurePosixPath(name)
+    if (
+        path.is_absolute()
+        or ".." in path.parts
+        or "\\" in name
+        or not (name in _TEST_FILES or (path.parts[0] == "assets" and len(path.parts) > 1))
+    ):
+        raise HTTPException(status_code=400, detail=f"Invalid file path in bundle: {name}")
+    return name
+
+
+def _extract_verified(
+    archive: zipfile.ZipFile, member: str, target: Path, size: int, sha256: str
+) -> None:
+    """Copy zip member to target in chunks, checking size and hash."""
+    digest = hashlib.sha256()
+    written = 0
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with archive.open(member) as source, target.open("wb") as output:
+            while chunk := source.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > size:
+                    break
+                digest.update(chunk)
+                output.write(chunk)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Missing file in bundle: {member}")
+    except (zipfile.BadZipFile, OSError) as exc:
+        raise HTTPException(status_code=400, detail=f"Corrupt bundle entry {member}: {exc}")
+    if written != size or digest.hexdigest() != sha256:
+        raise HTTPException(status_code=400, detail=f"Hash mismatch for {member}")
+
+
+def _stage_test(
+    archive: zipfile.ZipFile, entry: object, keep_ids: bool, staging: Path
+) -> dict[str, object]:
+    """Extract and verify one bundled test into a staging directory."""
+    if not isinstance(entry, dict) or not isinstance(entry.get("files"), list):
+        raise HTTPException(status_code=400, detail="Invalid test entry in manifest")
+    source_id = entry.get("id")
+    if not isinstance(source_id, str) or not _TEST_ID_RE.match(source_id):
+        raise HTTPException(status_code=400, detail="Invalid test id in manifest")
+
+    test_id = source_id if keep_ids else uuid.uuid4().hex
+    if test_dir(test_id).exists():
+        raise HTTPException(status_code=409, detail=f"Test already exists: {test_id}")
+
+    has_payload = False
+    for file_entry in entry["files"]:
+        if not isinstance(file_entry, dict):
+            raise HTTPException(status_code=400, detail="Invalid file entry in manifest")
+        name = _checked_file_name(file_entry.get("path"))
+        if name == "meta.json":
+            # Rebuilt when the payload is stored
+            continue
+        _extract_verified(
+            archive,
+            f"tests/{source_id}/{name}",
+            staging / (_STAGED_PAYLOAD if name == "test.json" else name),
+            int(file_entry.get("size", -1)),
+            str(file_entry.get("sha256", "")),
+        )
+        has_payload = has_payload or name == "test.json"
+    if not has_payload:
+        raise HTTPException(status_code=400, detail=f"Bundle test {source_id} has no payload")
+
+    payload = json_load((staging / _STAGED_PAYLOAD).read_bytes())
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid test payload in bundle")
+    payload["id"] = test_id
+    payload["assetsBaseUrl"] = f"/api/tests/{test_id}/assets"
+    return {"sourceId": source_id, "id": test_id, "payload": payload}
+
+
+def import_bundle(source: BinaryIO, keep_ids: bool = False) -> list[dict[str, object]]:
+    """Import all tests of a bundle read from a seekable binary file.
+
+    Every test is extracted and verified before any of them is stored, so a
+    corrupt bundle imports nothing. Tests get fresh ids unless ``keep_ids``
+    is set (then an existing test with the same id is a conflict).
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Bundle is not a zip file")
+
+    staging_dirs: list[Path] = []
+    staged: list[tuple[Path, dict[str, object]]] = []
+    try:
+        with archive:
+            manifest = _read_manifest(archive)
+            for entry in manifest["tests"]:
+                staging = DATA_DIR / f".import-{uuid.uuid4().hex}"
+                staging_dirs.append(staging)
+                staged.append((staging, _stage_test(archive, entry, keep_ids, staging)))
+
+        ids = [test["id"] for _, test in staged]
+        if len(set(ids)) != len(ids):
+            raise HTTPException(status_code=400, detail="Duplicate test ids in bundle")
+
+        imported = []
+        for staging, test in staged:
+            test_id = test["id"]
+            payload = test["payload"]
+            (staging / "assets").mkdir(parents=True, exist_ok=True)
+            (staging / _STAGED_PAYLOAD).unlink()
+            target = test_dir(test_id)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            staging.rename(target)
+            write_stored_payload(test_id, payload)
+            ingest_assets(test_id)
+            imported.append(
+                {
+                    "sourceId": test["sourceId"],
+                    "id": test_id,
+                    "title": payload.get("title"),
+                    "questionCount": len(payload.get("questions") or []),
+                }
+            )
+        return imported
+    finally:
+        for staging in staging_dirs:
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,307 @@
+"""Near-duplicate question detection (MinHash + LSH over question text).
+
+Every question gets a MinHash signature of its normalized question and
+option text (word bigrams). Signatures are split into LSH bands; questions
+sharing a band bucket are candidates and are confirmed by the estimated
+Jaccard similarity of their signatures. Lookups only touch the buckets of
+the query, so they do not scan the bank.
+
+The index lives in its own SQLite file (``DUPLICATES_DB_PATH``) and, like
+the search index, is updated incrementally on every stored payload.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+
+from api.config import DUPLICATES_DB_PATH
+from api.utils import ndjson_dump
+from core.minhash import (
+    band_keys,
+    estimate_similarity,
+    minhash_signature,
+    pack_signature,
+    text_shingles,
+    unpack_signature,
+)
+from core.serialization import blocks_to_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.7
+# LSH banding (see core.minhash) proposes pairs below ~0.5 too rarely for a
+# lower threshold to mean anything; recall is ~50% at 0.5 and ~97% at 0.7
+MIN_THRESHOLD = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dup_questions (
+    test_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    signature BLOB,
+    PRIMARY KEY (test_id, question_id)
+);
+CREATE TABLE IF NOT EXISTS dup_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    test_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dup_bands_bucket ON dup_bands (band, bucket);
+CREATE INDEX IF NOT EXISTS dup_bands_question ON dup_bands (test_id, question_id);
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    global _schema_ready
+    DUPLICATES_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DUPLICATES_DB_PATH, timeout=10)
+    # Derived data: losing the last commits on power loss is acceptable
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _schema_ready = True
+    return conn
+
+
+def question_signature(question: dict[str, object]) -> tuple[int, ...] | None:
+    """Get MinHash signature of question and option text."""
+    parts = [blocks_to_text((question.get("question") or {}).get("blocks"))]
+    for option in question.get("options") or []:
+        if isinstance(option, dict):
+            parts.append(blocks_to_text((option.get("content") or {}).get("blocks")))
+    return minhash_signature(text_shingles(parts))
+
+
+def _question_digest(question: dict[str, object]) -> str:
+    content = {key: question.get(key) for key in ("question", "options")}
+    return hashlib.sha1(ndjson_dump(content).encode("utf-8")).hexdigest()
+
+
+def _delete_question(conn: sqlite3.Connection, test_id: str, question_id: int) -> None:
+    conn.execute(
+        "DELETE FROM dup_bands WHERE test_id = ? AND question_id = ?",
+        (test_id, question_id),
+    )
+    conn.execute(
+        "DELETE FROM dup_questions WHERE test_id = ? AND question_id = ?",
+        (test_id, question_id),
+    )
+
+
+def _index_questions(
+    conn: sqlite3.Connection, test_id: str, questions: list[object]
+) -> int:
+    existing = dict(
+        conn.execute(
+            "SELECT question_id, digest FROM dup_questions WHERE test_id = ?",
+            (test_id,),
+        )
+    )
+    changed = 0
+    seen: set[int] = set()
+    for question in questions:
+        if not isinstance(question, dict) or not isinstance(question.get("id"), int):
+            continue
+        question_id = question["id"]
+        seen.add(question_id)
+        digest = _question_digest(question)
+        if existing.get(question_id) == digest:
+            continue
+        if question_id in existing:
+            _delete_question(conn, test_id, question_id)
+
+        signature = question_signature(question)
+        conn.execute(
+            "INSERT INTO dup_questions (test_id, question_id, digest, signature) "
+            "VALUES (?, ?, ?, ?)",
+            (test_id, question_id, digest, pack_signature(signature) if signature else None),
+        )
+        if signature is not None:
+            conn.executemany(
+                "INSERT INTO dup_bands (band, bucket, test_id, question_id) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (band, bucket, test_id, question_id)
+                    for band, bucket in enumerate(band_keys(signature))
+                ],
+            )
+        changed += 1
+
+    for question_id in existing:
+        if question_id not in seen:
+            _delete_question(conn, test_id, question_id)
+            changed += 1
+    return changed
+
+
+def index_test_duplicates(test_id: str, payload: dict[str, object]) -> int:
+    """Update duplicate index for a stored payload.
+
+    Returns the number of questions (re)indexed or removed. Index errors
+    are logged and never fail the save itself.
+    """
+    questions = payload.get("questions")
+    try:
+        with closing(_connect()) as conn, conn:
+            return _index_questions(
+                conn, test_id, questions if isinstance(questions, list) else []
+            )
+    except sqlite3.Error:
+        logger.exception("Failed to update duplicate index for test %s", test_id)
+        return 0
+
+
+def remove_test_duplicates(test_id: str) -> None:
+    """Remove all questions of a deleted test."""
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute("DELETE FROM dup_bands WHERE test_id = ?", (test_id,))
+            conn.execute("DELETE FROM dup_questions WHERE test_id = ?", (test_id,))
+    except sqlite3.Error:
+        logger.exception("Failed to remove test %s from duplicate index", test_id)
+
+
+def rebuild_duplicate_index() -> dict[str, int]:
+    """Rebuild the whole index from stored payloads."""
+    from api.services.test_service import load_test_payload
+    from api.utils import iter_test_dirs
+
+    tests = 0
+    questions = 0
+    with closing(_connect()) as conn, conn:
+        conn.execute("DELETE FROM dup_bands")
+        conn.execute("DELETE FROM dup_questions")
+        for test_directory in iter_test_dirs():
+            payload = load_test_payload(test_directory.name)
+            questions += _index_questions(
+                conn, test_directory.name, payload.get("questions") or []
+            )
+            tests += 1
+    return {"tests": tests, "questions": questions}
+
+
+def _signatures(
+    conn: sqlite3.Connection, keys: set[tuple[str, int]]
+) -> dict[tuple[str, int], tuple[int, ...]]:
+    if not keys:
+        return {}
+    rows = conn.execute(
+        "SELECT q.test_id, q.question_id, q.signature FROM dup_questions q "
+        "JOIN json_each(?) k ON q.test_id = json_extract(k.value, '$[0]') "
+        "AND q.question_id = json_extract(k.value, '$[1]') "
+        "WHERE q.signature IS NOT NULL",
+        (ndjson_dump([list(key) for key in keys]),),
+    )
+    return {
+        (test_id, question_id): unpack_signature(data)
+        for test_id, question_id, data in rows
+    }
+
+
+def find_similar_questions(
+    test_id: str,
+    question_id: int,
+    threshold: float = DEFAULT_THRESHOLD,
+    limit: int = 20,
+) -> list[dict[str, object]]:
+    """Find near-duplicates of one indexed question, most similar first."""
+    key = (test_id, question_id)
+    with closing(_connect()) as conn:
+        target = _signatures(conn, {key}).get(key)
+        if target is None:
+            return []
+        candidates = {
+            (row_test_id, row_question_id)
+            for row_test_id, row_question_id in conn.execute(
+                "SELECT DISTINCT b.test_id, b.question_id FROM dup_bands a "
+                "JOIN dup_bands b ON a.band = b.band AND a.bucket = b.bucket "
+                "WHERE a.test_id = ? AND a.question_id = ?",
+                key,
+            )
+        }
+        candidates.discard(key)
+        signatures = _signatures(conn, candidates)
+
+    matches = []
+    for (match_test_id, match_question_id), signature in signatures.items():
+        similarity = estimate_similarity(target, signature)
+        if similarity >= threshold:
+            matches.append(
+                {
+                    "testId": match_test_id,
+                    "questionId": match_question_id,
+                    "similarity": round(similarity, 3),
+                }
+            )
+    matches.sort(key=lambda item: (-item["similarity"], item["testId"], item["questionId"]))
+    return matches[:limit]
+
+
+def report_duplicates(
+    test_ids: list[str], threshold: float = DEFAULT_THRESHOLD
+) -> list[dict[str, object]]:
+    """Group near-duplicate questions across a set of tests.
+
+    Returns groups of two or more questions; within a group every question
+    is connected to another one with similarity >= threshold.
+    """
+    with closing(_connect()) as conn:
+        pairs = conn.execute(
+            "SELECT DISTINCT a.test_id, a.question_id, b.test_id, b.question_id "
+            "FROM dup_bands a JOIN dup_bands b "
+            "ON a.band = b.band AND a.bucket = b.bucket "
+            "AND (a.test_id, a.question_id) < (b.test_id, b.question_id) "
+            "WHERE a.test_id IN (SELECT value FROM json_each(?)) "
+            "AND b.test_id IN (SELECT value FROM json_each(?))",
+            (ndjson_dump(test_ids), ndjson_dump(test_ids)),
+        ).fetchall()
+        keys = {(row[0], row[1]) for row in pairs} | {(row[2], row[3]) for row in pairs}
+        signatures = _signatures(conn, keys)
+
+    parent: dict[tuple[str, int], tuple[str, int]] = {}
+
+    def find(node: tuple[str, int]) -> tuple[str, int]:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    best: dict[tuple[str, int], float] = {}
+    for first_test, first_question, second_test, second_question in pairs:
+        first = (first_test, first_question)
+        second = (second_test, second_question)
+        similarity = estimate_similarity(signatures[first], signatures[second])
+        if similarity < threshold:
+            continue
+        parent[find(first)] = find(second)
+        best[first] = max(best.get(first, 0.0), similarity)
+        best[second] = max(best.get(second, 0.0), similarity)
+
+    groups: dict[tuple[str, int], list[tuple[str, int]]] = {}
+    for node in best:
+        groups.setdefault(find(node), []).append(node)
+
+    report = [
+        {
+            "size": len(members),
+            "questions": [
+                {
+                    "testId": member_test_id,
+                    "questionId": member_question_id,
+                    "similarity": round(best[(member_test_id, member_question_id)], 3),
+                }
+                for member_test_id, member_question_id in sorted(members)
+            ],
+        }
+        for members in groups.values()
+    ]
+    report.sort(key=lambda group: -group["size"])
+    return report
@@ -0,0 +1,206 @@
+"""Resized and converted variants of image assets.
+
+``GET .../assets/{path}?width=640&format=webp`` serves a variant generated
+with Pillow. Widths snap up to ``IMAGE_VARIANT_WIDTHS`` so that the
+entries of a ``srcset`` map to a handful of cache files, and images are
+never upscaled.
+
+Variants are kept in an on-disk cache (``IMAGE_VARIANTS_DIR``) keyed by
+the source content hash, width and format, bounded by
+``IMAGE_VARIANT_CACHE_MB``: least recently used files are evicted first
+(a hit refreshes the file mtime). Generation runs on a small worker pool
+and concurrent requests for the same variant wait for one job.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from fastapi import HTTPException
+
+from api.config import (
+    IMAGE_VARIANT_CACHE_MB,
+    IMAGE_VARIANT_WIDTHS,
+    IMAGE_VARIANT_WORKERS,
+    IMAGE_VARIANTS_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, UnidentifiedImageError
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("PIL not available, image variants are disabled")
+
+# format -> (file suffix, media type)
+VARIANT_FORMATS = {
+    "webp": (".webp", "image/webp"),
+    "png": (".png", "image/png"),
+    "jpeg": (".jpg", "image/jpeg"),
+}
+_FORMAT_ALIASES = {"jpg": "jpeg"}
+
+# Refresh the LRU mark of a cache hit at most this often
+_TOUCH_INTERVAL = 3600
+# Evict down to this share of the limit, so eviction is not run on every write
+_EVICT_TARGET = 0.8
+
+_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_VARIANT_WORKERS, thread_name_prefix="image_variant"
+)
+_inflight: dict[Path, Future] = {}
+_inflight_lock = threading.Lock()
+_cache_lock = threading.Lock()
+_cache_bytes: int | None = None
+
+
+def normalize_format(image_format: str | None) -> str | None:
+    """Validate requested format name."""
+    if image_format is None:
+        return None
+    name = image_format.strip().lower()
+    name = _FORMAT_ALIASES.get(name, name)
+    if name not in VARIANT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format. Allowed: {', '.join(VARIANT_FORMATS)}",
+        )
+    return name
+
+
+def snap_width(width: int | None) -> int | None:
+    """Round requested width up to the nearest configured variant width.
+
+    Wider requests get the largest one, so only the ladder's widths are
+    ever rendered and cached.
+    """
+    if width is None:
+        return width
+    for candidate in IMAGE_VARIANT_WIDTHS:
+        if candidate >= width:
+            return candidate
+    return IMAGE_VARIANT_WIDTHS[-1]
+
+
+def _variant_path(source_key: str, width: int | None, image_format: str) -> Path:
+    suffix = VARIANT_FORMATS[image_format][0]
+    return IMAGE_VARIANTS_DIR / source_key[:2] / f"{source_key}-{width or 'full'}{suffix}"
+
+
+def _render(
+    source: Path | Callable[[], BinaryIO], target: Path, width: int | None, image_format: str
+) -> None:
+    with Image.open(source() if callable(source) else source) as image:
+        image.load()
+        if width is not None and image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        options: dict[str, object] = {}
+        if image_format == "jpeg":
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            options = {"quality": 85, "optimize": True, "progressive": True}
+        elif image_format == "webp":
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            options = {"quality": 80, "method": 4}
+        else:
+            options = {"optimize": True}
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            image.save(tmp_path, format=image_format.upper(), **options)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    _account(target.stat().st_size)
+
+
+def _account(added: int) -> None:
+    """Track cache size and evict least recently used variants over the limit."""
+    global _cache_bytes
+    limit = IMAGE_VARIANT_CACHE_MB * 1024 * 1024
+    with _cache_lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(
+                path.stat().st_size for path in IMAGE_VARIANTS_DIR.glob("*/*") if path.is_file()
+            )
+        else:
+            _cache_bytes += added
+        if _cache_bytes <= limit:
+            return
+
+        files = []
+        for path in IMAGE_VARIANTS_DIR.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in files:
+            if total <= limit * _EVICT_TARGET:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        _cache_bytes = total
+    logger.info("Evicted %d image variants, cache is %d bytes", evicted, total)
+
+
+def get_variant(
+    source: Path | Callable[[], BinaryIO],
+    source_key: str,
+    width: int | None,
+    image_format: str,
+) -> Path:
+    """Get cached variant file, generating it on the worker pool if needed.
+
+    ``source`` is the image file or a callable opening it (called only on
+    a cache miss); ``source_key`` identifies its content (e.g. its hash).
+    ``width`` is snapped to ``IMAGE_VARIANT_WIDTHS`` here as well, so no
+    caller can create a cache entry per arbitrary width.
+    """
+    if not PIL_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Image variants are not available")
+
+    width = snap_width(width)
+
+    target = _variant_path(source_key, width, image_format)
+    try:
+        stat = target.stat()
+    except FileNotFoundError:
+        pass
+    else:
+        if time.time() - stat.st_mtime > _TOUCH_INTERVAL:
+            os.utime(target)
+        return target
+
+    with _inflight_lock:
+        future = _inflight.get(target)
+        if future is None:
+            future = _executor.submit(_render, source, target, width, image_format)
+            _inflight[target] = future
+            future.add_done_callback(lambda _: _inflight.pop(target, None))
+    try:
+        future.result()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as exc:
+        logger.warning("Failed to build variant of %s: %s", source, exc)
+        raise HTTPException(status_code=415, detail="Asset is not a supported image")
+    return target
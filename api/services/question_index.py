@@ -0,0 +1,288 @@
+"""Per-test question index for reading single questions without a full parse.
+
+Alongside ``test.json`` every test keeps two derived files:
+
+* ``questions.ndjson`` - one compact JSON document per question, in order;
+* ``questions.idx.json`` - question ids plus byte offsets/lengths into the
+  NDJSON file and the size/mtime of the ``test.json`` it was built from.
+
+The index is rewritten whenever a payload is saved and rebuilt lazily when it
+is missing or older than ``test.json`` (e.g. tests produced by the CLI).
+Tests stored as binary containers (``test.bin``) carry their own offset
+table, so they are indexed and read straight from the memory-mapped file.
+"""
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from api.services.test_service import flush_test_payload, sync_stored_payload
+from api.utils import (
+    binary_payload_path,
+    json_dump_bytes,
+    json_load,
+    payload_path,
+    test_dir,
+    write_bytes_atomic,
+)
+from api.utils.binary_payload import BinaryPayloadReader
+from core.serialization import expand_payload
+
+INDEX_VERSION = 1
+
+QUESTION_FIELDS = ("id", "question", "options", "correct", "objects")
+OPTION_CONTENT_FIELD = "options.content"
+
+
+@dataclass(frozen=True)
+class QuestionIndex:
+    """Loaded question index for one test."""
+
+    ids: list[int]
+    offsets: list[int]
+    lengths: list[int]
+    source_size: int
+    source_mtime_ns: int
+    binary: bool = False
+    positions: dict[int, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "positions",
+            {question_id: pos for pos, question_id in enumerate(self.ids)},
+        )
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    def position_of(self, question_id: int) -> int | None:
+        """Get ordinal position of question in test, or None if missing."""
+        return self.positions.get(question_id)
+
+
+_cache: dict[str, QuestionIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def questions_data_path(test_id: str) -> Path:
+    """Get path to NDJSON file with one question per line."""
+    return test_dir(test_id) / "questions.ndjson"
+
+
+def question_index_path(test_id: str) -> Path:
+    """Get path to question offset index."""
+    return test_dir(test_id) / "questions.idx.json"
+
+
+def write_question_index(test_id: str, payload: dict[str, object]) -> QuestionIndex:
+    """Write NDJSON question records and their offset index for a payload."""
+    questions = payload.get("questions", [])
+    if not isinstance(questions, list):
+        questions = []
+
+    ids: list[int] = []
+    offsets: list[int] = []
+    lengths: list[int] = []
+    chunks: list[bytes] = []
+    offset = 0
+    for question in questions:
+        record = json_dump_bytes(question, pretty=False)
+        ids.append(question.get("id") if isinstance(question, dict) else None)
+        offsets.append(offset)
+        lengths.append(len(record))
+        chunks.append(record)
+        chunks.append(b"\n")
+        offset += len(record) + 1
+
+    source_stat = payload_path(test_id).stat()
+    write_bytes_atomic(questions_data_path(test_id), b"".join(chunks))
+    index_data = {
+        "version": INDEX_VERSION,
+        "sourceSize": source_stat.st_size,
+        "sourceMtimeNs": source_stat.st_mtime_ns,
+        "ids": ids,
+        "offsets": offsets,
+        "lengths": lengths,
+    }
+    write_bytes_atomic(question_index_path(test_id), json_dump_bytes(index_data, pretty=False))
+
+    index = QuestionIndex(
+        ids=ids,
+        offsets=offsets,
+        lengths=lengths,
+        source_size=source_stat.st_size,
+        source_mtime_ns=source_stat.st_mtime_ns,
+    )
+    with _cache_lock:
+        _cache[test_id] = index
+    return index
+
+
+def _read_index_file(test_id: str) -> QuestionIndex | None:
+    """Read index file from disk, or None if missing/corrupt."""
+    try:
+        data = json_load(question_index_path(test_id).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    return QuestionIndex(
+        ids=list(data.get("ids", [])),
+        offsets=list(data.get("offsets", [])),
+        lengths=list(data.get("lengths", [])),
+        source_size=int(data.get("sourceSize", -1)),
+        source_mtime_ns=int(data.get("sourceMtimeNs", -1)),
+    )
+
+
+def _is_fresh(index: QuestionIndex, source_stat: os.stat_result) -> bool:
+    return (
+        index.source_size == source_stat.st_size
+        and index.source_mtime_ns == source_stat.st_mtime_ns
+    )
+
+
+def remove_question_index(test_id: str) -> None:
+    """Remove JSON-side index files (payload moved to binary container)."""
+    questions_data_path(test_id).unlink(missing_ok=True)
+    question_index_path(test_id).unlink(missing_ok=True)
+    invalidate_question_index(test_id)
+
+
+def _load_binary_index(test_id: str, source_stat: os.stat_result) -> QuestionIndex:
+    with BinaryPayloadReader(binary_payload_path(test_id)) as reader:
+        ids = list(reader.ids)
+    index = QuestionIndex(
+        ids=ids,
+        offsets=[],
+        lengths=[],
+        source_size=source_stat.st_size,
+        source_mtime_ns=source_stat.st_mtime_ns,
+        binary=True,
+    )
+    with _cache_lock:
+        _cache[test_id] = index
+    return index
+
+
+def load_question_index(test_id: str) -> QuestionIndex:
+    """Load question index, rebuilding it if missing or stale.
+
+    A save still pending in the write-behind buffer is flushed first so
+    index reads always see the latest version, and a newer payload
+    published by another node is downloaded.
+    """
+    flush_test_payload(test_id)
+    sync_stored_payload(test_id)
+    binary = binary_payload_path(test_id).exists()
+    source = binary_payload_path(test_id) if binary else payload_path(test_id)
+    try:
+        source_stat = source.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Test not found")
+
+    with _cache_lock:
+        cached = _cache.get(test_id)
+    if (
+        cached is not None
+        and cached.binary == binary
+        and _is_fresh(cached, source_stat)
+    ):
+        return cached
+
+    if binary:
+        return _load_binary_index(test_id, source_stat)
+
+    index = _read_index_file(test_id)
+    if (
+        index is not None
+        and _is_fresh(index, source_stat)
+        and questions_data_path(test_id).exists()
+    ):
+        with _cache_lock:
+            _cache[test_id] = index
+        return index
+
+    payload = expand_payload(json_load(payload_path(test_id).read_bytes()))
+    return write_question_index(test_id, payload)
+
+
+def invalidate_question_index(test_id: str) -> None:
+    """Drop cached index for test (e.g. after deletion)."""
+    with _cache_lock:
+        _cache.pop(test_id, None)
+
+
+def read_questions(
+    test_id: str, index: QuestionIndex, positions: list[int]
+) -> list[dict[str, object]]:
+    """Read questions at given ordinal positions from NDJSON or test.bin."""
+    if not positions:
+        return []
+    if index.binary:
+        with BinaryPayloadReader(binary_payload_path(test_id)) as reader:
+            return [reader.read_question(position) for position in positions]
+    questions = []
+    with questions_data_path(test_id).open("rb") as handle:
+        for position in positions:
+            handle.seek(index.offsets[position])
+            questions.append(json_load(handle.read(index.lengths[position])))
+    return questions
+
+
+def parse_fields(raw: str | None) -> set[str] | None:
+    """Parse ``fields=`` projection parameter; None means all fields."""
+    if raw is None:
+        return None
+    fields = {part.strip() for part in raw.split(",") if part.strip()}
+    allowed = set(QUESTION_FIELDS) | {OPTION_CONTENT_FIELD}
+    unknown = fields - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return fields
+
+
+def answer_free_fields(fields: set[str] | None) -> set[str]:
+    """Narrow a projection to what students may see.
+
+    Drops ``correct`` and replaces ``options`` with ``options.content``
+    (options without their ``isCorrect`` flags).
+    """
+    visible = set(QUESTION_FIELDS) if fields is None else set(fields)
+    visible.discard("correct")
+    if "options" in visible:
+        visible.remove("options")
+        visible.add(OPTION_CONTENT_FIELD)
+    return visible
+
+
+def project_question(
+    question: dict[str, object], fields: set[str] | None
+) -> dict[str, object]:
+    """Keep only requested fields of question.
+
+    ``options.content`` keeps options but strips their ``isCorrect`` flags,
+    which is what students should receive.
+    """
+    if fields is None:
+        return question
+    projected: dict[str, object] = {}
+    for key in QUESTION_FIELDS:
+        if key in fields and key in question:
+            projected[key] = question[key]
+    if OPTION_CONTENT_FIELD in fields and "options" not in fields:
+        options = question.get("options", [])
+        if isinstance(options, list):
+            projected["options"] = [
+                {k: v for k, v in option.items() if k != "isCorrect"}
+                for option in options
+                if isinstance(option, dict)
+            ]
+    return projected
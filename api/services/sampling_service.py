@@ -0,0 +1,82 @@
+"""Server-side question sampling for test sessions."""
+import random
+import secrets
+from typing import Any
+
+from api.services.question_index import load_question_index, read_questions
+
+
+def _allocate(total: int, count: int, strata: int) -> list[tuple[int, int, int]]:
+    """Split positions into contiguous strata and allocate draws to each.
+
+    Returns list of (start, end, draws) with draws proportional to stratum
+    size (largest remainder method), so the sample covers the whole test.
+    """
+    strata = max(1, min(strata, total))
+    bounds = [(total * i) // strata for i in range(strata + 1)]
+    bands = [(bounds[i], bounds[i + 1]) for i in range(strata)]
+
+    quotas = [count * (end - start) / total for start, end in bands]
+    draws = [int(quota) for quota in quotas]
+    remainder = count - sum(draws)
+    by_fraction = sorted(
+        range(strata), key=lambda i: quotas[i] - draws[i], reverse=True
+    )
+    for i in by_fraction[:remainder]:
+        draws[i] += 1
+
+    return [(start, end, n) for (start, end), n in zip(bands, draws)]
+
+
+def sample_positions(
+    total: int, count: int, rng: random.Random, strata: int = 1
+) -> list[int]:
+    """Draw ``count`` distinct question positions out of ``total``.
+
+    Sampling is O(count) per stratum: ``random.sample`` over a range does
+    not materialize the population.
+    """
+    count = min(count, total)
+    if count <= 0:
+        return []
+    positions: list[int] = []
+    for start, end, draws in _allocate(total, count, strata):
+        positions.extend(rng.sample(range(start, end), draws))
+    rng.shuffle(positions)
+    return positions
+
+
+def draw_questions(
+    test_id: str,
+    count: int,
+    seed: int | None = None,
+    strata: int = 1,
+    shuffle_options: bool = True,
+) -> tuple[list[dict[str, Any]], int]:
+    """Sample questions for a session from the question index.
+
+    Args:
+        test_id: Test to draw from
+        count: Number of questions to draw
+        seed: Seed for reproducible draws; generated when omitted
+        strata: Number of contiguous position bands to sample proportionally
+        shuffle_options: Shuffle option order of every drawn question
+
+    Returns:
+        Tuple of (drawn questions, seed used)
+    """
+    if seed is None:
+        seed = secrets.randbits(32)
+    rng = random.Random(seed)
+
+    index = load_question_index(test_id)
+    positions = sample_positions(index.total, count, rng, strata)
+    questions = read_questions(test_id, index, positions)
+
+    if shuffle_options:
+        for question in questions:
+            options = question.get("options")
+            if isinstance(options, list):
+                rng.shuffle(options)
+
+    return questions, seed
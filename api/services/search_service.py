@@ -0,0 +1,265 @@
+"""Full-text search over question and option text (SQLite FTS5).
+
+The index lives in its own SQLite file (``SEARCH_DB_PATH``) so it can be
+dropped and rebuilt from ``DATA_DIR`` at any time. Every stored payload is
+indexed incrementally: only questions whose text digest changed are
+re-inserted, removed questions are deleted.
+"""
+import hashlib
+import html
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import closing
+
+from api.config import SEARCH_DB_PATH
+from api.utils import ndjson_dump
+from core.serialization import blocks_to_text
+
+logger = logging.getLogger(__name__)
+
+# Private-use markers around matches; replaced after HTML-escaping snippets
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+_SNIPPET_TOKENS = 16
+# bm25 column weights: question text ranks above option text
+_QUESTION_WEIGHT = 2.0
+_OPTIONS_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    doc_id INTEGER PRIMARY KEY,
+    test_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    UNIQUE (test_id, question_id)
+);
+CREATE TABLE IF NOT EXISTS search_tests (
+    test_id TEXT PRIMARY KEY,
+    title TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    question,
+    options,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    global _schema_ready
+    SEARCH_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SEARCH_DB_PATH, timeout=10)
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _schema_ready = True
+    return conn
+
+
+def _question_texts(question: dict[str, object]) -> tuple[str, str]:
+    """Get (question text, options text) of a question."""
+    question_text = blocks_to_text((question.get("question") or {}).get("blocks"))
+    option_texts = []
+    for option in question.get("options") or []:
+        if isinstance(option, dict):
+            option_texts.append(blocks_to_text((option.get("content") or {}).get("blocks")))
+    return question_text, "\n".join(text for text in option_texts if text)
+
+
+def _digest(question_text: str, options_text: str) -> str:
+    return hashlib.sha1(
+        f"{question_text}\x00{options_text}".encode("utf-8")
+    ).hexdigest()
+
+
+def _index_payload(
+    conn: sqlite3.Connection, test_id: str, payload: dict[str, object]
+) -> int:
+    existing = {
+        question_id: (doc_id, digest)
+        for doc_id, question_id, digest in conn.execute(
+            "SELECT doc_id, question_id, digest FROM search_docs WHERE test_id = ?",
+            (test_id,),
+        )
+    }
+    changed = 0
+    seen: set[int] = set()
+    for question in payload.get("questions") or []:
+        if not isinstance(question, dict) or not isinstance(question.get("id"), int):
+            continue
+        question_id = question["id"]
+        seen.add(question_id)
+        question_text, options_text = _question_texts(question)
+        digest = _digest(question_text, options_text)
+
+        current = existing.get(question_id)
+        if current is not None and current[1] == digest:
+            continue
+        if current is not None:
+            doc_id = current[0]
+            conn.execute("DELETE FROM search_fts WHERE rowid = ?", (doc_id,))
+            conn.execute(
+                "UPDATE search_docs SET digest = ? WHERE doc_id = ?", (digest, doc_id)
+            )
+        else:
+            doc_id = conn.execute(
+                "INSERT INTO search_docs (test_id, question_id, digest) VALUES (?, ?, ?)",
+                (test_id, question_id, digest),
+            ).lastrowid
+        conn.execute(
+            "INSERT INTO search_fts (rowid, question, options) VALUES (?, ?, ?)",
+            (doc_id, question_text, options_text),
+        )
+        changed += 1
+
+    for question_id, (doc_id, _) in existing.items():
+        if question_id not in seen:
+            conn.execute("DELETE FROM search_fts WHERE rowid = ?", (doc_id,))
+            conn.execute("DELETE FROM search_docs WHERE doc_id = ?", (doc_id,))
+            changed += 1
+
+    conn.execute(
+        "INSERT INTO search_tests (test_id, title) VALUES (?, ?) "
+        "ON CONFLICT (test_id) DO UPDATE SET title = excluded.title",
+        (test_id, payload.get("title")),
+    )
+    return changed
+
+
+def index_test_payload(test_id: str, payload: dict[str, object]) -> int:
+    """Update search index for a stored payload.
+
+    Returns the number of question documents inserted, updated or removed.
+    Index errors are logged and never fail the save itself.
+    """
+    try:
+        with closing(_connect()) as conn, conn:
+            return _index_payload(conn, test_id, payload)
+    except sqlite3.Error:
+        logger.exception("Failed to update search index for test %s", test_id)
+        return 0
+
+
+def remove_test_from_index(test_id: str) -> None:
+    """Remove all documents of a deleted test."""
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM search_fts WHERE rowid IN "
+                "(SELECT doc_id FROM search_docs WHERE test_id = ?)",
+                (test_id,),
+            )
+            conn.execute("DELETE FROM search_docs WHERE test_id = ?", (test_id,))
+            conn.execute("DELETE FROM search_tests WHERE test_id = ?", (test_id,))
+    except sqlite3.Error:
+        logger.exception("Failed to remove test %s from search index", test_id)
+
+
+def rebuild_search_index() -> dict[str, int]:
+    """Rebuild the whole index from stored payloads."""
+    from api.services.test_service import load_test_payload
+    from api.utils import iter_test_dirs
+
+    tests = 0
+    documents = 0
+    with closing(_connect()) as conn, conn:
+        conn.execute("DELETE FROM search_fts")
+        conn.execute("DELETE FROM search_docs")
+        conn.execute("DELETE FROM search_tests")
+        for test_directory in iter_test_dirs():
+            test_id = test_directory.name
+            documents += _index_payload(conn, test_id, load_test_payload(test_id))
+            tests += 1
+        conn.execute("INSERT INTO search_fts (search_fts) VALUES ('optimize')")
+    return {"tests": tests, "documents": documents}
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn free text into an FTS5 query (all words, last one as prefix).
+
+    Words are quoted, so FTS5 operators in user input are matched literally.
+    """
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _highlight(snippet: str | None) -> str:
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+
+
+def search_questions(
+    query: str,
+    visible_test_ids: list[str],
+    controlled_test_ids: list[str],
+    test_id: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> tuple[int, list[dict[str, object]]]:
+    """Search indexed questions, best matches first.
+
+    A test is searchable when it is in ``visible_test_ids`` or has no access
+    control record (not in ``controlled_test_ids``). Snippets are HTML with
+    matches wrapped in ``<mark>``.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return 0, []
+
+    where = (
+        "search_fts MATCH ? AND (d.test_id IN (SELECT value FROM json_each(?)) "
+        "OR d.test_id NOT IN (SELECT value FROM json_each(?)))"
+    )
+    params: list[object] = [match, ndjson_dump(visible_test_ids), ndjson_dump(controlled_test_ids)]
+    if test_id is not None:
+        where += " AND d.test_id = ?"
+        params.append(test_id)
+    source = "search_fts JOIN search_docs d ON d.doc_id = search_fts.rowid"
+
+    with closing(_connect()) as conn:
+        total = conn.execute(f"SELECT count(*) FROM {source} WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"""
+            SELECT d.test_id, d.question_id, t.title,
+                   snippet(search_fts, 0, ?, ?, '…', ?),
+                   snippet(search_fts, 1, ?, ?, '…', ?),
+                   bm25(search_fts, ?, ?) AS score
+            FROM {source} LEFT JOIN search_tests t ON t.test_id = d.test_id
+            WHERE {where}
+            ORDER BY score
+            LIMIT ? OFFSET ?
+            """,
+            [
+                _MATCH_START, _MATCH_END, _SNIPPET_TOKENS,
+                _MATCH_START, _MATCH_END, _SNIPPET_TOKENS,
+                _QUESTION_WEIGHT, _OPTIONS_WEIGHT,
+                *params,
+                limit, offset,
+            ],
+        ).fetchall()
+
+    results = [
+        {
+            "testId": row_test_id,
+            "testTitle": title,
+            "questionId": question_id,
+            "questionSnippet": _highlight(question_snippet),
+            "optionsSnippet": _highlight(options_snippet),
+            # bm25 is lower-is-better; expose higher-is-better
+            "score": round(-score, 4),
+        }
+        for row_test_id, question_id, title, question_snippet, options_snippet, score in rows
+    ]
+    return total, results
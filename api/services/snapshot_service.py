@@ -0,0 +1,324 @@
+"""Immutable numbered snapshots of tests stored as deltas.
+
+Every stored payload version is recorded under ``<test>/history/``:
+
+* ``checkpoints/<version>.json.z`` - full payload, zlib-compressed JSON,
+  written for the first version and then periodically;
+* ``deltas.ndjson`` - append-only log with one record per version: changed
+  or added questions, deleted question ids, changed top-level fields and the
+  question order when it differs from the natural one;
+* ``head.json`` - per-question digests of the latest version (used to
+  compute the next delta without re-reading the old payload) and the list
+  of versions with their delta offsets.
+
+History therefore grows with the size of the edits; any version is
+materialized from the nearest checkpoint plus the deltas after it. Versions
+are the payload ``version`` numbers; saves coalesced in the write-behind
+buffer never reach disk and so are not recorded.
+"""
+import hashlib
+import logging
+import threading
+import zlib
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Iterator
+
+from fastapi import HTTPException
+
+from api.config import SNAPSHOT_CHECKPOINT_INTERVAL
+from api.utils import json_dump_bytes, json_load, test_dir, utc_now, write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+HISTORY_VERSION = 1
+
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def history_dir(test_id: str) -> Path:
+    """Get directory with snapshot history of a test."""
+    return test_dir(test_id) / "history"
+
+
+def _head_path(test_id: str) -> Path:
+    return history_dir(test_id) / "head.json"
+
+
+def _deltas_path(test_id: str) -> Path:
+    return history_dir(test_id) / "deltas.ndjson"
+
+
+def _checkpoint_path(test_id: str, version: int) -> Path:
+    return history_dir(test_id) / "checkpoints" / f"{version}.json.z"
+
+
+def _test_lock(test_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(test_id, threading.Lock())
+
+
+def _payload_version(payload: dict[str, object]) -> int:
+    version = payload.get("version")
+    return version if isinstance(version, int) else 0
+
+
+def _split_payload(
+    payload: dict[str, object],
+) -> tuple[dict[str, object], list[int], dict[int, dict[str, object]]]:
+    """Split payload into top-level fields, question order and questions by id."""
+    meta = {
+        key: value
+        for key, value in payload.items()
+        if key not in ("questions", "version")
+    }
+    order: list[int] = []
+    questions: dict[int, dict[str, object]] = {}
+    for question in payload.get("questions") or []:
+        if isinstance(question, dict) and isinstance(question.get("id"), int):
+            order.append(question["id"])
+            questions[question["id"]] = question
+    return meta, order, questions
+
+
+def _digest(value: object) -> str:
+    return hashlib.sha1(json_dump_bytes(value, pretty=False)).hexdigest()
+
+
+def _load_head(test_id: str) -> dict[str, object] | None:
+    try:
+        head = json_load(_head_path(test_id).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(head, dict) or head.get("historyVersion") != HISTORY_VERSION:
+        return None
+    return head
+
+
+def _write_checkpoint(test_id: str, version: int, payload: dict[str, object]) -> int:
+    data = zlib.compress(json_dump_bytes(payload, pretty=False), 6)
+    write_bytes_atomic(_checkpoint_path(test_id, version), data)
+    return len(data)
+
+
+def record_snapshot(test_id: str, payload: dict[str, object]) -> None:
+    """Record stored payload as a new version (no-op if already recorded).
+
+    Errors are logged and never fail the save itself.
+    """
+    try:
+        with _test_lock(test_id):
+            _record_snapshot(test_id, payload)
+    except (OSError, ValueError):
+        logger.exception("Failed to record snapshot of test %s", test_id)
+
+
+def _record_snapshot(test_id: str, payload: dict[str, object]) -> None:
+    version = _payload_version(payload)
+    meta, order, questions = _split_payload(payload)
+    digests = {str(question_id): _digest(q) for question_id, q in questions.items()}
+    head = _load_head(test_id)
+
+    if head is not None and version <= head["version"]:
+        if version < head["version"]:
+            logger.warning(
+                "Test %s saved with version %s below recorded %s; not recorded",
+                test_id, version, head["version"],
+            )
+        return
+
+    entry: dict[str, object] = {"version": version, "createdAt": utc_now()}
+    since_checkpoint = 0 if head is None else head.get("sinceCheckpoint", 0) + 1
+    if head is None or since_checkpoint >= SNAPSHOT_CHECKPOINT_INTERVAL:
+        entry["checkpoint"] = True
+        entry["size"] = _write_checkpoint(test_id, version, payload)
+        versions = [] if head is None else head["versions"]
+        since_checkpoint = 0
+    else:
+        previous_digests: dict[str, str] = head["digests"]
+        previous_order: list[int] = head["order"]
+        upserts = [
+            questions[question_id]
+            for question_id in order
+            if previous_digests.get(str(question_id)) != digests[str(question_id)]
+        ]
+        deleted = [
+            question_id for question_id in previous_order if str(question_id) not in digests
+        ]
+        delta: dict[str, object] = {"version": version, "base": head["version"]}
+        if upserts:
+            delta["upsert"] = upserts
+        if deleted:
+            delta["delete"] = deleted
+        deleted_set = set(deleted)
+        added = [question_id for question_id in order if str(question_id) not in previous_digests]
+        natural_order = [q for q in previous_order if q not in deleted_set] + added
+        if order != natural_order:
+            delta["order"] = order
+        previous_meta_digests: dict[str, str] = head["metaDigests"]
+        changed_meta = {
+            key: value
+            for key, value in meta.items()
+            if previous_meta_digests.get(key) != _digest(value)
+        }
+        if changed_meta:
+            delta["meta"] = changed_meta
+        removed_meta = [key for key in previous_meta_digests if key not in meta]
+        if removed_meta:
+            delta["removeMeta"] = removed_meta
+
+        record = json_dump_bytes(delta, pretty=False) + b"\n"
+        deltas_path = _deltas_path(test_id)
+        deltas_path.parent.mkdir(parents=True, exist_ok=True)
+        with deltas_path.open("ab") as handle:
+            offset = handle.tell()
+            handle.write(record)
+        entry.update(
+            {
+                "offset": offset,
+                "length": len(record),
+                "size": len(record),
+                "upserted": len(upserts),
+                "deleted": len(deleted),
+            }
+        )
+        versions = head["versions"]
+
+    versions.append(entry)
+    new_head = {
+        "historyVersion": HISTORY_VERSION,
+        "version": version,
+        "sinceCheckpoint": since_checkpoint,
+        "order": order,
+        "digests": digests,
+        "metaDigests": {key: _digest(value) for key, value in meta.items()},
+        "versions": versions,
+    }
+    write_bytes_atomic(_head_path(test_id), json_dump_bytes(new_head, pretty=False))
+
+
+def list_versions(test_id: str) -> list[dict[str, object]]:
+    """List recorded versions, oldest first."""
+    head = _load_head(test_id)
+    if head is None:
+        return []
+    return [
+        {key: value for key, value in entry.items() if key not in ("offset", "length")}
+        for entry in head["versions"]
+    ]
+
+
+def iter_history_records(test_id: str, since: str) -> Iterator[dict[str, object]]:
+    """Yield stored records covering every version created at or after ``since``.
+
+    These are the nearest checkpoint before the first such version and all
+    deltas and checkpoints after it: together they contain every question
+    any of those versions has (plus possibly some older ones).
+    """
+    head = _load_head(test_id)
+    if head is None:
+        return
+    entries = head["versions"]
+    first = next(
+        (index for index, entry in enumerate(entries) if entry["createdAt"] >= since),
+        None,
+    )
+    if first is None:
+        return
+    start = max(index for index in range(first + 1) if entries[index].get("checkpoint"))
+    records = entries[start:]
+    has_deltas = any(not entry.get("checkpoint") for entry in records)
+    with _deltas_path(test_id).open("rb") if has_deltas else nullcontext() as handle:
+        for entry in records:
+            if entry.get("checkpoint"):
+                yield json_load(
+                    zlib.decompress(_checkpoint_path(test_id, entry["version"]).read_bytes())
+                )
+            else:
+                handle.seek(entry["offset"])
+                yield json_load(handle.read(entry["length"]))
+
+
+def _apply_delta(
+    meta: dict[str, object],
+    order: list[int],
+    questions: dict[int, dict[str, object]],
+    delta: dict[str, object],
+) -> list[int]:
+    """Apply delta record in place; returns the new question order."""
+    deleted = set(delta.get("delete") or [])
+    for question_id in deleted:
+        questions.pop(question_id, None)
+    added = []
+    for question in delta.get("upsert") or []:
+        if question["id"] not in questions:
+            added.append(question["id"])
+        questions[question["id"]] = question
+    for key in delta.get("removeMeta") or []:
+        meta.pop(key, None)
+    meta.update(delta.get("meta") or {})
+    if "order" in delta:
+        return list(delta["order"])
+    return [q for q in order if q not in deleted] + added
+
+
+def materialize_version(test_id: str, version: int) -> dict[str, object]:
+    """Rebuild payload of a recorded version."""
+    head = _load_head(test_id)
+    entries = head["versions"] if head is not None else []
+    position = next(
+        (index for index, entry in enumerate(entries) if entry["version"] == version),
+        None,
+    )
+    if position is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    start = max(
+        index for index in range(position + 1) if entries[index].get("checkpoint")
+    )
+    checkpoint = json_load(
+        zlib.decompress(_checkpoint_path(test_id, entries[start]["version"]).read_bytes())
+    )
+    meta, order, questions = _split_payload(checkpoint)
+
+    replay = entries[start + 1 : position + 1]
+    if replay:
+        with _deltas_path(test_id).open("rb") as handle:
+            for entry in replay:
+                handle.seek(entry["offset"])
+                order = _apply_delta(
+                    meta, order, questions, json_load(handle.read(entry["length"]))
+                )
+
+    payload = dict(meta)
+    payload["version"] = version
+    payload["questions"] = [questions[question_id] for question_id in order]
+    return payload
+
+
+def diff_versions(test_id: str, from_version: int, to_version: int) -> dict[str, object]:
+    """Compare two recorded versions question by question."""
+    before_meta, before_order, before = _split_payload(materialize_version(test_id, from_version))
+    after_meta, after_order, after = _split_payload(materialize_version(test_id, to_version))
+
+    changed = [
+        {"id": question_id, "before": before[question_id], "after": after[question_id]}
+        for question_id in after_order
+        if question_id in before and before[question_id] != after[question_id]
+    ]
+    meta_keys = sorted(set(before_meta) | set(after_meta))
+    return {
+        "from": from_version,
+        "to": to_version,
+        "added": [after[question_id] for question_id in after_order if question_id not in before],
+        "removed": [question_id for question_id in before_order if question_id not in after],
+        "changed": changed,
+        "meta": {
+            key: {"before": before_meta.get(key), "after": after_meta.get(key)}
+            for key in meta_keys
+            if before_meta.get(key) != after_meta.get(key)
+        },
+        "orderChanged": [q for q in before_order if q in after]
+        != [q for q in after_order if q in before],
+    }
@@ -77,6 +77,7 @@ def format_attempt_stats(
     return {
         "attemptId": attempt.id,
         "testId": attempt.test_id,
+        "testVersion": attempt.test_version,
         "clientId": attempt.client_id,
         "userId": attempt.user_id,
         "status": attempt.status,
@@ -150,6 +151,7 @@ def get_attempts_list(
         results.append({
             "attemptId": attempt.id,
             "testId": attempt.test_id,
+            "testVersion": attempt.test_version,
             "clientId": attempt.client_id,
             "userId": attempt.user_id,
             "status": attempt.status,
@@ -0,0 +1,472 @@
+"""Storage backends for blobs and payload files.
+
+The local disk stays the working copy of every node: indexes, history and
+metadata are derived from it. A backend is where payload files and asset
+blobs are published and fetched from, so several API nodes can serve the
+same tests. ``STORAGE_BACKEND`` selects it:
+
+- ``local`` - the data directories themselves; publishing is a no-op;
+- ``s3`` - an S3-compatible bucket (AWS, MinIO, ...) through ``boto3``.
+  Payloads are uploaded on every write; nodes compare their copy with the
+  bucket's ETag before using it and download newer ones. Uploads are
+  conditional on the ETag the node last saw, so a node cannot overwrite
+  another node's newer write. Assets missing on a node are streamed from
+  the bucket (with range requests) instead of being read from disk.
+
+Keys are ``/``-separated: ``ab/cd/<sha256>`` for blobs and
+``<test_id>/test.json`` for payloads.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterator
+
+from fastapi import HTTPException
+
+from api.config import (
+    BLOBS_DIR,
+    DATA_DIR,
+    S3_BUCKET,
+    S3_ENDPOINT_URL,
+    S3_PREFIX,
+    S3_REGION,
+    STORAGE_BACKEND,
+    STORAGE_REVALIDATE_SECONDS,
+)
+from api.utils import read_json_file, test_dir, write_bytes_atomic, write_json_file
+
+logger = logging.getLogger(__name__)
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+CHUNK_SIZE = 1024 * 1024
+# Per test: ETags of the published files this node's copies correspond to
+REMOTE_ETAGS_NAME = ".remote-etags.json"
+
+
+class PreconditionFailed(Exception):
+    """The object changed since the ETag a conditional write expected."""
+
+
+@dataclass
+class ObjectInfo:
+    key: str
+    size: int
+    etag: str  # quoted, ready for the ETag header
+    modified: float  # Unix time
+
+
+class LocalStorageBackend:
+    """Backend keeping objects as files under a root directory.
+
+    ``resolve`` maps a key to its file when the on-disk layout is not
+    simply ``root/key`` (e.g. sharded test directories).
+    """
+
+    name = "local"
+    remote = False
+
+    def __init__(self, root: Path, resolve: Callable[[str], Path] | None = None):
+        self.root = Path(root)
+        self._resolve = resolve
+
+    def path(self, key: str) -> Path:
+        """Get file of an object."""
+        parts = PurePosixPath(key).parts
+        if not parts or PurePosixPath(key).is_absolute() or ".." in parts:
+            raise ValueError(f"Invalid storage key: {key}")
+        return self._resolve(key) if self._resolve else self.root.joinpath(*parts)
+
+    def _info(self, key: str, path: Path) -> ObjectInfo:
+        stat = path.stat()
+        return ObjectInfo(
+            key, stat.st_size, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', stat.st_mtime
+        )
+
+    def head(self, key: str) -> ObjectInfo | None:
+        path = self.path(key)
+        try:
+            return self._info(key, path)
+        except FileNotFoundError:
+            return None
+
+    def get(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def stream(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Yield object bytes ``start..end`` (inclusive), like an HTTP range."""
+        handle = self.path(key).open("rb")
+
+        def _chunks() -> Iterator[bytes]:
+            with handle:
+                handle.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    size = CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE)
+                    chunk = handle.read(size)
+                    if not chunk:
+                        return
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+        return _chunks()
+
+    def put(
+        self,
+        key: str,
+        source: bytes | BinaryIO,
+        content_type: str | None = None,
+        if_match: str | None = None,
+    ) -> str:
+        path = self.path(key)
+        if if_match is not None:
+            info = self.head(key)
+            if info is None or info.etag != if_match:
+                raise PreconditionFailed(key)
+        write_bytes_atomic(path, source)
+        return self._info(key, path).etag
+
+    def put_file(
+        self,
+        key: str,
+        path: Path,
+        content_type: str | None = None,
+        if_match: str | None = None,
+    ) -> str:
+        """Publish a local file (a no-op when it already is the object)."""
+        target = self.path(key)
+        if target == Path(path):
+            return self._info(key, target).etag
+        with Path(path).open("rb") as source:
+            return self.put(key, source, content_type, if_match)
+
+    def fetch_file(self, key: str, path: Path) -> bool:
+        """Make sure ``path`` holds the object; returns False if it is missing."""
+        source = self.path(key)
+        if source == Path(path):
+            return source.exists()
+        try:
+            with source.open("rb") as handle:
+                write_bytes_atomic(Path(path), handle)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def list(self, prefix: str = "") -> Iterator[ObjectInfo]:
+        if not self.root.is_dir():
+            return
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            key = path.relative_to(self.root).as_posix()
+            if key.startswith(prefix):
+                yield self._info(key, path)
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+
+class S3StorageBackend:
+    """Backend keeping objects in an S3-compatible bucket."""
+
+    name = "s3"
+    remote = True
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+    ):
+        # Credentials come from the usual AWS_* environment / config files
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    @staticmethod
+    def _missing(exc: "ClientError") -> bool:
+        return exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def head(self, key: str) -> ObjectInfo | None:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as exc:
+            if self._missing(exc):
+                return None
+            raise
+        return ObjectInfo(
+            key,
+            response["ContentLength"],
+            response["ETag"],
+            response["LastModified"].timestamp(),
+        )
+
+    def get(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as exc:
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        with response["Body"] as body:
+            return body.read()
+
+    def stream(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Yield object bytes ``start..end`` (inclusive) with a ranged GET."""
+        options = {}
+        if start or end is not None:
+            options["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key), **options)
+        except ClientError as exc:
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        body = response["Body"]
+
+        def _chunks() -> Iterator[bytes]:
+            with body:
+                yield from body.iter_chunks(CHUNK_SIZE)
+
+        return _chunks()
+
+    def put(
+        self,
+        key: str,
+        source: bytes | BinaryIO,
+        content_type: str | None = None,
+        if_match: str | None = None,
+    ) -> str:
+        options = {"ContentType": content_type} if content_type else {}
+        if isinstance(source, bytes) or if_match is not None:
+            if if_match is not None:
+                options["IfMatch"] = if_match
+            try:
+                response = self.client.put_object(
+                    Bucket=self.bucket, Key=self._key(key), Body=source, **options
+                )
+            except ClientError as exc:
+                code = exc.response.get("Error", {}).get("Code")
+                if code in ("PreconditionFailed", "ConditionalRequestConflict"):
+                    raise PreconditionFailed(key) from exc
+                raise
+            return response["ETag"]
+        # upload_fileobj switches to multipart uploads for large files
+        self.client.upload_fileobj(
+            source, self.bucket, self._key(key), ExtraArgs=options or None
+        )
+        return self.head(key).etag
+
+    def put_file(
+        self,
+        key: str,
+        path: Path,
+        content_type: str | None = None,
+        if_match: str | None = None,
+    ) -> str:
+        """Upload a local file."""
+        with Path(path).open("rb") as source:
+            return self.put(key, source, content_type, if_match)
+
+    def fetch_file(self, key: str, path: Path) -> bool:
+        """Download an object to ``path``; returns False if it is missing."""
+        try:
+            write_bytes_atomic(Path(path), self.stream(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def list(self, prefix: str = "") -> Iterator[ObjectInfo]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                yield ObjectInfo(
+                    item["Key"][len(self.prefix):],
+                    item["Size"],
+                    item["ETag"],
+                    item["LastModified"].timestamp(),
+                )
+
+    def delete(self, key: str) -> None:
+        # Deleting a missing key is not an error in S3
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single-range ``Range`` header into inclusive (start, end).
+
+    Returns None when the whole object should be sent (no header, several
+    ranges or another unit); raises 416 for a range outside the object.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _select_backend(namespace: str, root: Path, resolve: Callable[[str], Path] | None = None):
+    if STORAGE_BACKEND == "s3":
+        if not BOTO3_AVAILABLE:
+            logger.warning("boto3 is not installed, using local storage")
+        elif not S3_BUCKET:
+            logger.warning("S3_BUCKET is not set, using local storage")
+        else:
+            return S3StorageBackend(
+                S3_BUCKET, f"{S3_PREFIX}{namespace}/", S3_ENDPOINT_URL, S3_REGION
+            )
+    elif STORAGE_BACKEND != "local":
+        logger.warning("Unknown storage backend %s, using local storage", STORAGE_BACKEND)
+    return LocalStorageBackend(root, resolve)
+
+
+def _payload_file(key: str) -> Path:
+    test_id, _, name = key.partition("/")
+    return test_dir(test_id) / name
+
+
+_blob_storage = None
+_payload_storage = None
+
+
+def get_blob_storage() -> LocalStorageBackend | S3StorageBackend:
+    """Get backend holding asset blobs (keys ``ab/cd/<sha256>``)."""
+    global _blob_storage
+    if _blob_storage is None:
+        _blob_storage = _select_backend("blobs", BLOBS_DIR)
+    return _blob_storage
+
+
+def get_payload_storage() -> LocalStorageBackend | S3StorageBackend:
+    """Get backend holding payload files (keys ``<test_id>/<file name>``)."""
+    global _payload_storage
+    if _payload_storage is None:
+        _payload_storage = _select_backend("tests", DATA_DIR, _payload_file)
+    return _payload_storage
+
+
+# (test id, file name) -> (time of the last ETag check, whether the object existed)
+_checked: OrderedDict[tuple[str, str], tuple[float, bool]] = OrderedDict()
+_checked_lock = threading.Lock()
+_CHECKED_LIMIT = 10000
+
+
+def _recently_checked(test_id: str, name: str, local_exists: bool) -> bool:
+    with _checked_lock:
+        checked = _checked.get((test_id, name))
+    if checked is None or time.monotonic() - checked[0] >= STORAGE_REVALIDATE_SECONDS:
+        return False
+    # A local copy lost since the check is fetched right away
+    return local_exists or not checked[1]
+
+
+def _mark_checked(test_id: str, name: str, exists: bool) -> None:
+    with _checked_lock:
+        _checked[(test_id, name)] = (time.monotonic(), exists)
+        _checked.move_to_end((test_id, name))
+        while len(_checked) > _CHECKED_LIMIT:
+            _checked.popitem(last=False)
+
+
+def _remote_etags(test_id: str) -> dict[str, str]:
+    try:
+        etags = read_json_file(test_dir(test_id) / REMOTE_ETAGS_NAME, {})
+    except (OSError, ValueError):
+        return {}
+    return etags if isinstance(etags, dict) else {}
+
+
+def _set_remote_etag(test_id: str, name: str, etag: str | None) -> None:
+    etags = _remote_etags(test_id)
+    if etag is None:
+        if etags.pop(name, None) is None:
+            return
+    else:
+        etags[name] = etag
+    write_json_file(test_dir(test_id) / REMOTE_ETAGS_NAME, etags)
+
+
+def publish_test_file(test_id: str, name: str) -> bool:
+    """Upload a freshly written file of a test to a remote backend.
+
+    The upload only succeeds if the published object is still the one this
+    node last saw. Returns False when another node replaced it meanwhile
+    (the local file then is out of date, see :func:`sync_test_file`).
+    """
+    storage = get_payload_storage()
+    if not storage.remote:
+        return True
+    try:
+        etag = storage.put_file(
+            f"{test_id}/{name}",
+            test_dir(test_id) / name,
+            if_match=_remote_etags(test_id).get(name),
+        )
+    except PreconditionFailed:
+        return False
+    _set_remote_etag(test_id, name, etag)
+    _mark_checked(test_id, name, True)
+    return True
+
+
+def sync_test_file(test_id: str, name: str, force: bool = False) -> bool:
+    """Download a file of a test when the remote copy differs from this node's.
+
+    The remote ETag is checked at most every ``STORAGE_REVALIDATE_SECONDS``
+    per file (also when the file is missing remotely), or always with
+    ``force``. Returns whether a newer copy was downloaded.
+    """
+    storage = get_payload_storage()
+    if not storage.remote:
+        return False
+    path = test_dir(test_id) / name
+    if not force and _recently_checked(test_id, name, path.exists()):
+        return False
+    info = storage.head(f"{test_id}/{name}")
+    _mark_checked(test_id, name, info is not None)
+    if info is None:
+        return False
+    if path.exists() and _remote_etags(test_id).get(name) == info.etag:
+        return False
+    if not storage.fetch_file(f"{test_id}/{name}", path):
+        return False
+    # Should the object change during the download, the next check fetches it again
+    _set_remote_etag(test_id, name, info.etag)
+    return True
+
+
+def unpublish_test_files(test_id: str, names: tuple[str, ...]) -> None:
+    """Delete files of a test from a remote backend."""
+    storage = get_payload_storage()
+    if storage.remote:
+        for name in names:
+            storage.delete(f"{test_id}/{name}")
+            if test_dir(test_id).is_dir():
+                _set_remote_etag(test_id, name, None)
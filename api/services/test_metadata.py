@@ -0,0 +1,103 @@
+"""Per-test metadata sidecar (``meta.json``) for cheap catalog reads.
+
+The sidecar holds what listings need - title, question count, payload
+size, asset count, content hash and last update time - so they never parse
+the full payload. It is rewritten atomically with every payload save and
+rebuilt lazily when missing or older than the stored payload (e.g. tests
+produced by the CLI or converted by scripts).
+"""
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from api.services.asset_store import count_test_assets
+from api.services.test_service import flush_test_payload, load_test_payload
+from api.utils import (
+    binary_payload_path,
+    json_dump_bytes,
+    json_load,
+    payload_path,
+    test_dir,
+    utc_now,
+    write_bytes_atomic,
+)
+
+METADATA_VERSION = 1
+
+# Bookkeeping fields that are not part of the public metadata
+_SOURCE_FIELDS = ("metaVersion", "sourceSize", "sourceMtimeNs")
+
+
+def metadata_path(test_id: str) -> Path:
+    """Get path to metadata sidecar."""
+    return test_dir(test_id) / "meta.json"
+
+
+def _stored_payload_path(test_id: str) -> Path:
+    binary_path = binary_payload_path(test_id)
+    return binary_path if binary_path.exists() else payload_path(test_id)
+
+
+def _public(metadata: dict[str, object]) -> dict[str, object]:
+    return {key: value for key, value in metadata.items() if key not in _SOURCE_FIELDS}
+
+
+def write_test_metadata(
+    test_id: str, payload: dict[str, object], updated_at: str | None = None
+) -> dict[str, object]:
+    """Write metadata sidecar for a freshly stored payload."""
+    questions = payload.get("questions", [])
+    source_stat = _stored_payload_path(test_id).stat()
+    metadata = {
+        "metaVersion": METADATA_VERSION,
+        "id": payload.get("id", test_id),
+        "title": payload.get("title"),
+        "questionCount": len(questions) if isinstance(questions, list) else 0,
+        "version": payload.get("version"),
+        "size": source_stat.st_size,
+        "assetCount": count_test_assets(test_id),
+        "hash": hashlib.sha256(json_dump_bytes(payload, pretty=False)).hexdigest(),
+        "updatedAt": updated_at or utc_now(),
+        "sourceSize": source_stat.st_size,
+        "sourceMtimeNs": source_stat.st_mtime_ns,
+    }
+    write_bytes_atomic(metadata_path(test_id), json_dump_bytes(metadata, pretty=False))
+    return _public(metadata)
+
+
+def _read_metadata_file(test_id: str) -> dict[str, object] | None:
+    """Read sidecar from disk, or None if missing/corrupt."""
+    try:
+        data = json_load(metadata_path(test_id).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("metaVersion") != METADATA_VERSION:
+        return None
+    return data
+
+
+def load_test_metadata(test_id: str) -> dict[str, object]:
+    """Load test metadata, rebuilding the sidecar if missing or stale.
+
+    A save still pending in the write-behind buffer is flushed first.
+    """
+    flush_test_payload(test_id)
+    try:
+        source_stat = _stored_payload_path(test_id).stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Test not found")
+
+    metadata = _read_metadata_file(test_id)
+    if (
+        metadata is not None
+        and metadata.get("sourceSize") == source_stat.st_size
+        and metadata.get("sourceMtimeNs") == source_stat.st_mtime_ns
+    ):
+        return _public(metadata)
+
+    updated_at = datetime.fromtimestamp(
+        source_stat.st_mtime_ns / 1e9, timezone.utc
+    ).isoformat()
+    return write_test_metadata(test_id, load_test_payload(test_id), updated_at)
@@ -1,28 +1,207 @@
 """Service layer for test operations."""
-from api.utils import json_load, payload_path, read_json_file, write_json_file
+import logging
 
+from fastapi import HTTPException
 
-def load_test_payload(test_id: str) -> dict[str, object]:
-    """Load test payload from file."""
+from api.config import (
+    PAYLOAD_COMPRESS,
+    PAYLOAD_FORMAT,
+    PAYLOAD_NORMALIZED,
+    SAVE_COALESCE_MS,
+)
+from api.services.storage_backend import (
+    publish_test_file,
+    sync_test_file,
+    unpublish_test_files,
+)
+from api.services.write_buffer import WriteBehindBuffer
+from api.utils import (
+    binary_payload_path,
+    json_load,
+    payload_path,
+    read_json_file,
+    test_dir,
+    write_json_file,
+)
+from api.utils.binary_payload import read_binary_payload, write_binary_payload
+from core.serialization import expand_payload, normalize_payload
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_FORMATS = ("json", "binary")
+# Files of a test published to the storage backend
+PUBLISHED_FILES = ("test.json", "test.bin", "assets.json")
+
+
+def write_stored_payload(
+    test_id: str,
+    payload: dict[str, object],
+    payload_format: str | None = None,
+    compress: bool | None = None,
+    normalized: bool | None = None,
+) -> None:
+    """Write payload in the given (default: configured) on-disk format.
+
+    JSON payloads get a question index next to them; binary containers
+    index their own records. The file of the other format is removed and
+    the metadata sidecar, search and duplicate indexes are refreshed and a
+    new version is recorded in the test history.
+    With ``normalized`` the stored form is :func:`normalize_payload`'s.
+    If another node published a newer payload meanwhile, that one is kept
+    and this write is dropped.
+    """
+    payload_format = payload_format or PAYLOAD_FORMAT
+    if payload_format not in PAYLOAD_FORMATS:
+        raise ValueError(f"Unknown payload format: {payload_format}")
+
+    payload = expand_payload(payload)
+    if PAYLOAD_NORMALIZED if normalized is None else normalized:
+        stored = normalize_payload(payload)
+    else:
+        stored = payload
+
+    if payload_format == "binary":
+        write_binary_payload(
+            binary_payload_path(test_id),
+            stored,
+            PAYLOAD_COMPRESS if compress is None else compress,
+        )
+        payload_path(test_id).unlink(missing_ok=True)
+        written, removed = binary_payload_path(test_id), payload_path(test_id)
+    else:
+        write_json_file(payload_path(test_id), stored)
+        binary_payload_path(test_id).unlink(missing_ok=True)
+        written, removed = payload_path(test_id), binary_payload_path(test_id)
+    if not publish_test_file(test_id, written.name):
+        logger.warning("Test %s was changed on another node; local save dropped", test_id)
+        _pull_stored_payload(test_id, force=True)
+        return
+    unpublish_test_files(test_id, (removed.name,))
+    _refresh_derived_state(test_id, payload, payload_format)
+
+
+def _refresh_derived_state(
+    test_id: str, payload: dict[str, object], payload_format: str
+) -> None:
+    """Update indexes, metadata and history after the stored payload changed."""
+    from api.services.question_index import (
+        remove_question_index,
+        write_question_index,
+    )
+    from api.services.duplicate_service import index_test_duplicates
+    from api.services.search_service import index_test_payload
+    from api.services.snapshot_service import record_snapshot
+    from api.services.test_metadata import write_test_metadata
+
+    if payload_format == "binary":
+        remove_question_index(test_id)
+    else:
+        write_question_index(test_id, payload)
+    write_test_metadata(test_id, payload)
+    index_test_payload(test_id, payload)
+    index_test_duplicates(test_id, payload)
+    record_snapshot(test_id, payload)
+
+
+def _write_payload(test_id: str, payload: dict[str, object]) -> None:
+    """Physically write payload (called by the write-behind buffer)."""
+    if not test_dir(test_id).exists():
+        # Test was deleted while the write was pending
+        return
+    write_stored_payload(test_id, payload)
+
+
+payload_buffer = WriteBehindBuffer(SAVE_COALESCE_MS / 1000, _write_payload)
+
+
+def _read_stored_payload(test_id: str) -> dict[str, object] | None:
+    binary_path = binary_payload_path(test_id)
+    if binary_path.exists():
+        return read_binary_payload(binary_path)
     path = payload_path(test_id)
     if not path.exists():
-        from fastapi import HTTPException
+        return None
+    return expand_payload(json_load(path.read_bytes()))
+
+
+def _pull_stored_payload(test_id: str, force: bool = False) -> bool:
+    binary_name, json_name = binary_payload_path(test_id).name, payload_path(test_id).name
+    if sync_test_file(test_id, binary_name, force):
+        payload_path(test_id).unlink(missing_ok=True)
+    elif sync_test_file(test_id, json_name, force):
+        binary_payload_path(test_id).unlink(missing_ok=True)
+    else:
+        return False
+    payload = _read_stored_payload(test_id)
+    if payload is not None:
+        payload_format = "binary" if binary_payload_path(test_id).exists() else "json"
+        _refresh_derived_state(test_id, payload, payload_format)
+    return True
+
+
+def sync_stored_payload(test_id: str, force: bool = False) -> bool:
+    """Bring this node's payload up to date with the storage backend.
 
+    Downloads a payload published by another node (a test this node does
+    not have yet, or a newer version) and rebuilds its indexes, metadata
+    and history. A test with a save pending here is left alone: its write
+    is published only if nobody else published first. Returns whether a
+    payload was downloaded.
+    """
+    if payload_buffer.has_pending(test_id):
+        return False
+    return _pull_stored_payload(test_id, force)
+
+
+def load_test_payload(test_id: str) -> dict[str, object]:
+    """Load test payload, preferring a pending (not yet written) save."""
+    pending = payload_buffer.get(test_id)
+    if pending is not None:
+        return pending
+    sync_stored_payload(test_id)
+    payload = _read_stored_payload(test_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Test not found")
-    return json_load(path.read_text(encoding="utf-8"))
+    return payload
+
+
+def save_test_payload(
+    test_id: str, payload: dict[str, object], coalesce: bool = True
+) -> None:
+    """Save test payload.
+
+    Every save bumps ``payload["version"]`` so clients can tell which
+    revision a delta response belongs to. Saves go through the write-behind
+    buffer; pass ``coalesce=False`` when the file must exist on disk right
+    away (e.g. a freshly created test).
+    """
+    if sync_stored_payload(test_id, force=True):
+        # The payload being saved was based on an older version
+        raise HTTPException(
+            status_code=409, detail="Test was changed on another node, reload it"
+        )
+    version = payload.get("version")
+    payload["version"] = (version if isinstance(version, int) else 0) + 1
+    if coalesce:
+        payload_buffer.put(test_id, payload)
+    else:
+        payload_buffer.write_through(test_id, payload)
 
 
-def save_test_payload(test_id: str, payload: dict[str, object]) -> None:
-    """Save test payload to file."""
-    write_json_file(payload_path(test_id), payload)
+def flush_test_payload(test_id: str) -> None:
+    """Write pending save for test to disk now."""
+    payload_buffer.flush(test_id)
+
+
+def discard_test_payload(test_id: str) -> None:
+    """Drop pending save for a test that is being deleted."""
+    payload_buffer.discard(test_id)
 
 
 def find_question(
     payload: dict[str, object], question_id: int
 ) -> tuple[dict[str, object], int]:
     """Find question in test payload by ID."""
-    from fastapi import HTTPException
-
     questions = payload.get("questions", [])
     if not isinstance(questions, list):
         raise HTTPException(status_code=400, detail="Invalid test payload")
@@ -57,3 +236,121 @@ def extract_blocks(value: object) -> list[dict[str, object]] | None:
         if isinstance(blocks, list):
             return blocks
     return None
+
+
+def next_question_id(questions: list[object]) -> int:
+    """Get next free question ID."""
+    return max((q.get("id", 0) for q in questions if isinstance(q, dict)), default=0) + 1
+
+
+def _build_options(
+    options_payload: list[object], correct_blocks: list[dict[str, object]] | None
+) -> tuple[list[dict[str, object]], list[dict[str, object]]]:
+    """Build options list and correct blocks from request options."""
+    options = []
+    for index, option in enumerate(options_payload, start=1):
+        if not isinstance(option, dict):
+            raise HTTPException(status_code=400, detail="Invalid option format")
+
+        content_blocks = extract_blocks(option.get("content"))
+        if content_blocks is None:
+            option_text = str(option.get("text", ""))
+            content_blocks = text_to_blocks(option_text)
+
+        is_correct = bool(option.get("isCorrect"))
+        if is_correct and correct_blocks is None:
+            correct_blocks = content_blocks
+
+        options.append(
+            {
+                "id": index,
+                "content": {"blocks": content_blocks},
+                "isCorrect": is_correct,
+            }
+        )
+    return options, correct_blocks or text_to_blocks("")
+
+
+def build_question(payload: dict[str, object], question_id: int) -> dict[str, object]:
+    """Build new question from add-question request payload."""
+    question_blocks = extract_blocks(payload.get("question"))
+    question_text = payload.get("questionText")
+    if question_blocks is None:
+        if not isinstance(question_text, str) or not question_text.strip():
+            raise HTTPException(
+                status_code=400, detail="Question text is required"
+            )
+        question_blocks = text_to_blocks(question_text)
+
+    options_payload = payload.get("options")
+    if not isinstance(options_payload, list) or not options_payload:
+        raise HTTPException(status_code=400, detail="Options are required")
+
+    options, correct_blocks = _build_options(
+        options_payload, extract_blocks(payload.get("correct"))
+    )
+    new_question = {
+        "id": question_id,
+        "question": {"blocks": question_blocks},
+        "options": options,
+        "correct": {"blocks": correct_blocks},
+    }
+
+    objects_payload = payload.get("objects")
+    if isinstance(objects_payload, list):
+        new_question["objects"] = objects_payload
+    return new_question
+
+
+def apply_question_update(
+    question: dict[str, object], payload: dict[str, object]
+) -> None:
+    """Apply update-question request payload to question in place."""
+    question_blocks = extract_blocks(payload.get("question"))
+    question_text = payload.get("questionText")
+    if question_blocks is not None:
+        question["question"] = {"blocks": question_blocks}
+    elif question_text is not None:
+        question["question"] = {"blocks": text_to_blocks(str(question_text))}
+
+    options_payload = payload.get("options")
+    if options_payload is not None:
+        if not isinstance(options_payload, list) or not options_payload:
+            raise HTTPException(status_code=400, detail="Options are required")
+        options, correct_blocks = _build_options(
+            options_payload, extract_blocks(payload.get("correct"))
+        )
+        question["options"] = options
+        question["correct"] = {"blocks": correct_blocks}
+
+    objects_payload = payload.get("objects")
+    if objects_payload is not None:
+        if not isinstance(objects_payload, list):
+            raise HTTPException(
+                status_code=400, detail="Invalid objects format"
+            )
+        question["objects"] = objects_payload
+
+
+def validate_question(question: object, question_id: int) -> None:
+    """Validate structure of a question produced by a JSON Patch."""
+    if not isinstance(question, dict):
+        raise HTTPException(status_code=400, detail="Invalid question format")
+    if question.get("id") != question_id:
+        raise HTTPException(status_code=400, detail="Question id cannot be changed")
+    if extract_blocks(question.get("question")) is None:
+        raise HTTPException(status_code=400, detail="Question text is required")
+
+    options = question.get("options")
+    if not isinstance(options, list) or not options:
+        raise HTTPException(status_code=400, detail="Options are required")
+    for option in options:
+        if not isinstance(option, dict) or extract_blocks(option.get("content")) is None:
+            raise HTTPException(status_code=400, detail="Invalid option format")
+
+    if extract_blocks(question.get("correct")) is None:
+        raise HTTPException(status_code=400, detail="Invalid correct answer format")
+
+    objects = question.get("objects")
+    if objects is not None and not isinstance(objects, list):
+        raise HTTPException(status_code=400, detail="Invalid objects format")
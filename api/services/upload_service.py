@@ -0,0 +1,246 @@
+"""Resumable chunked uploads.
+
+An upload is a directory ``UPLOADS_DIR/<upload_id>/`` holding
+``upload.json`` (owner, kind, file name, expected size, SHA-256 and chunk
+size) and one file per received chunk, named by its byte offset. Chunks
+start at multiples of the chunk size and fill it (except the last one), so
+they never overlap and at most ``size`` bytes are staged. They may arrive
+in any order and be sent again; after a failure the client asks which
+ranges the server has and sends only the rest. Finalizing streams the chunks into the
+target file while hashing it, so the file is never held in memory.
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import HTTPException
+
+from api.config import UPLOAD_CHUNK_MB, UPLOAD_EXPIRE_HOURS, UPLOAD_MAX_MB, UPLOADS_DIR
+from api.utils import read_json_file, write_json_file
+from core.asset_names import CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "upload.json"
+CHUNK_SUFFIX = ".chunk"
+MAX_CHUNK_BYTES = UPLOAD_CHUNK_MB * 1024 * 1024
+MAX_UPLOAD_BYTES = UPLOAD_MAX_MB * 1024 * 1024
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _upload_dir(upload_id: str) -> Path:
+    if not _UPLOAD_ID_RE.match(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return UPLOADS_DIR / upload_id
+
+
+def _chunks(directory: Path) -> list[tuple[int, int, Path]]:
+    """Get (offset, size, file) of received chunks, sorted by offset."""
+    chunks = []
+    for path in directory.glob(f"*{CHUNK_SUFFIX}"):
+        offset = path.name[: -len(CHUNK_SUFFIX)]
+        if offset.isdigit():
+            chunks.append((int(offset), path.stat().st_size, path))
+    return sorted(chunks)
+
+
+def _chunk_size(state: dict[str, object]) -> int:
+    return state.get("chunkSize") or min(MAX_CHUNK_BYTES, state["size"])
+
+
+def _received_ranges(chunks: list[tuple[int, int, Path]]) -> list[list[int]]:
+    """Merge chunks into [start, end) ranges."""
+    ranges: list[list[int]] = []
+    for offset, size, _ in chunks:
+        if ranges and offset <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], offset + size)
+        else:
+            ranges.append([offset, offset + size])
+    return ranges
+
+
+def purge_expired_uploads() -> int:
+    """Drop uploads without new chunks for ``UPLOAD_EXPIRE_HOURS``.
+
+    Returns the number of uploads removed.
+    """
+    if UPLOAD_EXPIRE_HOURS <= 0 or not UPLOADS_DIR.is_dir():
+        return 0
+    # Every new chunk updates the directory's mtime
+    cutoff = time.time() - UPLOAD_EXPIRE_HOURS * 3600
+    removed = 0
+    for directory in UPLOADS_DIR.iterdir():
+        try:
+            expired = directory.is_dir() and directory.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if expired:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info("Removed expired uploads: %d", removed)
+    return removed
+
+
+def create_upload(
+    owner_id: int,
+    kind: str,
+    file_name: str,
+    size: int,
+    sha256: str,
+    test_id: str | None = None,
+) -> dict[str, object]:
+    """Start an upload; returns its status."""
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"File is larger than {UPLOAD_MAX_MB} MB"
+        )
+    purge_expired_uploads()
+    upload_id = uuid.uuid4().hex
+    name = Path(file_name).name
+    if name in ("", ".", ".."):
+        name = "upload"
+    state = {
+        "uploadId": upload_id,
+        "kind": kind,
+        "fileName": name,
+        "size": size,
+        "sha256": sha256.lower(),
+        "ownerId": owner_id,
+        "testId": test_id,
+        "chunkSize": min(MAX_CHUNK_BYTES, size),
+        "created": int(time.time()),
+    }
+    directory = UPLOADS_DIR / upload_id
+    directory.mkdir(parents=True)
+    write_json_file(directory / STATE_NAME, state)
+    return upload_status(state)
+
+
+def load_upload(upload_id: str, owner_id: int, kind: str | None = None) -> dict[str, object]:
+    """Load state of an upload of this user (404 for anyone else's)."""
+    try:
+        state = read_json_file(_upload_dir(upload_id) / STATE_NAME, None)
+    except (OSError, ValueError):
+        state = None
+    if not isinstance(state, dict) or state.get("ownerId") != owner_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if kind is not None and state.get("kind") != kind:
+        raise HTTPException(status_code=400, detail=f"Not a {kind} upload")
+    return state
+
+
+def upload_status(state: dict[str, object]) -> dict[str, object]:
+    """Describe received ranges of an upload and where to continue."""
+    ranges = _received_ranges(_chunks(UPLOADS_DIR / state["uploadId"]))
+    received = sum(end - start for start, end in ranges)
+    complete = received == state["size"]
+    if complete:
+        next_offset = None
+    elif ranges and ranges[0][0] == 0:
+        next_offset = ranges[0][1]
+    else:
+        next_offset = 0
+    return {
+        "uploadId": state["uploadId"],
+        "kind": state["kind"],
+        "fileName": state["fileName"],
+        "size": state["size"],
+        "received": received,
+        "ranges": ranges,
+        "nextOffset": next_offset,
+        "complete": complete,
+        "chunkSize": _chunk_size(state),
+    }
+
+
+def write_chunk(
+    state: dict[str, object],
+    offset: int,
+    source: BinaryIO,
+    chunk_sha256: str | None = None,
+) -> dict[str, object]:
+    """Stage a chunk starting at ``offset``; returns the upload status.
+
+    ``offset`` must be a multiple of the upload's ``chunkSize`` and the
+    chunk must fill it (the last one ends at the file size), otherwise 400.
+    With ``chunk_sha256`` the chunk is rejected (422) unless its content
+    matches, so a chunk damaged in transit is sent again, not assembled.
+    """
+    size = state["size"]
+    chunk_size = _chunk_size(state)
+    if offset < 0 or offset >= size:
+        raise HTTPException(status_code=400, detail="Offset is outside the file")
+    if offset % chunk_size:
+        raise HTTPException(
+            status_code=400, detail=f"Offset must be a multiple of {chunk_size}"
+        )
+    expected = min(chunk_size, size - offset)
+    directory = UPLOADS_DIR / state["uploadId"]
+    tmp_path = directory / f".{offset}.{uuid.uuid4().hex[:8]}.tmp"
+    digest = hashlib.sha256()
+    length = 0
+    try:
+        with tmp_path.open("wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                length += len(chunk)
+                if length > expected:
+                    raise HTTPException(
+                        status_code=400, detail=f"Chunk must be {expected} bytes"
+                    )
+                digest.update(chunk)
+                target.write(chunk)
+        if length != expected:
+            raise HTTPException(status_code=400, detail=f"Chunk must be {expected} bytes")
+        if chunk_sha256 and digest.hexdigest() != chunk_sha256.strip().lower():
+            raise HTTPException(status_code=422, detail="Chunk hash mismatch")
+        os.replace(tmp_path, directory / f"{offset}{CHUNK_SUFFIX}")
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return upload_status(state)
+
+
+def assemble_upload(state: dict[str, object], target: Path) -> None:
+    """Write the uploaded file to ``target`` after checking its SHA-256.
+
+    A file not matching the hash given at creation is rejected (422) and
+    its chunks are dropped, so the client uploads it again.
+    """
+    directory = UPLOADS_DIR / state["uploadId"]
+    chunks = _chunks(directory)
+    ranges = _received_ranges(chunks)
+    if ranges != [[0, state["size"]]]:
+        raise HTTPException(status_code=409, detail="Upload is incomplete")
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+    digest = hashlib.sha256()
+    try:
+        with tmp_path.open("wb") as output:
+            # Chunks are aligned to the chunk size, so they never overlap
+            for _, _, path in chunks:
+                with path.open("rb") as chunk_file:
+                    while data := chunk_file.read(CHUNK_SIZE):
+                        digest.update(data)
+                        output.write(data)
+        if digest.hexdigest() != state["sha256"]:
+            for _, _, path in chunks:
+                path.unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=422, detail="File hash mismatch, upload the file again"
+            )
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def discard_upload(upload_id: str) -> None:
+    """Delete an upload and its chunks."""
+    shutil.rmtree(_upload_dir(upload_id), ignore_errors=True)
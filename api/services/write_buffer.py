@@ -0,0 +1,177 @@
+"""Write-behind buffer that coalesces rapid payload saves."""
+import copy
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Keep the latest payload per key in memory and write it out later.
+
+    The first save for a key schedules a flush ``window_seconds`` later; saves
+    arriving before the flush replace the pending payload and are counted as
+    coalesced. A window of 0 disables buffering (every save writes through).
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        writer: Callable[[str, dict[str, object]], None],
+    ):
+        self.window_seconds = window_seconds
+        self._writer = writer
+        self._pending: dict[str, dict[str, object]] = {}
+        # Payloads being written: still served by get() until on disk
+        self._writing: dict[str, dict[str, object]] = {}
+        self._timers: dict[str, threading.Timer] = {}
+        # Guards the dicts and counters only; writes run under per-key locks
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._logical_writes = 0
+        self._physical_writes = 0
+        self._coalesced_writes = 0
+        self._failed_writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    def put(self, key: str, payload: dict[str, object]) -> None:
+        """Save payload, deferring the physical write when buffering is on."""
+        snapshot = copy.deepcopy(payload)
+        if not self.enabled:
+            with self._lock:
+                self._logical_writes += 1
+            with self._key_lock(key):
+                self._write_now(key, snapshot, None)
+            return
+        with self._lock:
+            self._logical_writes += 1
+            if key in self._pending:
+                self._coalesced_writes += 1
+            self._pending[key] = snapshot
+            self._schedule(key)
+
+    def write_through(self, key: str, payload: dict[str, object]) -> None:
+        """Write payload immediately, superseding any pending write.
+
+        If the write fails, the superseded pending payload is kept.
+        """
+        snapshot = copy.deepcopy(payload)
+        with self._key_lock(key):
+            with self._lock:
+                self._logical_writes += 1
+                self._cancel_timer(key)
+                previous = self._pending.pop(key, None)
+            self._write_now(key, snapshot, previous)
+
+    def get(self, key: str) -> dict[str, object] | None:
+        """Get a copy of the pending payload, or None if nothing is pending."""
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._writing.get(key)
+            return copy.deepcopy(pending) if pending is not None else None
+
+    def has_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending or key in self._writing
+
+    def flush(self, key: str) -> None:
+        """Write pending payload for key now.
+
+        A payload that fails to write goes back to the buffer (and is
+        retried after the window) unless a newer save replaced it.
+        """
+        with self._key_lock(key):
+            with self._lock:
+                self._cancel_timer(key)
+                payload = self._pending.pop(key, None)
+            if payload is not None:
+                self._write_now(key, payload, payload)
+
+    def flush_all(self) -> None:
+        """Write all pending payloads (e.g. on shutdown)."""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self.flush(key)
+        if keys:
+            logger.info("Flushed %d pending payload writes", len(keys))
+
+    def discard(self, key: str) -> None:
+        """Drop pending payload without writing it (e.g. test deleted).
+
+        Waits for a write of the key already in progress.
+        """
+        with self._key_lock(key):
+            with self._lock:
+                self._cancel_timer(key)
+                self._pending.pop(key, None)
+
+    def metrics(self) -> dict[str, object]:
+        """Get counters for logical vs physical writes."""
+        with self._lock:
+            return {
+                "windowMs": int(self.window_seconds * 1000),
+                "logicalWrites": self._logical_writes,
+                "physicalWrites": self._physical_writes,
+                "coalescedWrites": self._coalesced_writes,
+                "failedWrites": self._failed_writes,
+                "pending": len(self._pending),
+            }
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _schedule(self, key: str) -> None:
+        """Start the flush timer of a key (call with ``_lock`` held)."""
+        if key not in self._timers:
+            timer = threading.Timer(self.window_seconds, self._flush_later, args=(key,))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def _flush_later(self, key: str) -> None:
+        try:
+            self.flush(key)
+        except Exception:
+            pass  # logged by _write_now; the payload is kept for a retry
+
+    def _cancel_timer(self, key: str) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _write_now(
+        self,
+        key: str,
+        payload: dict[str, object],
+        restore: dict[str, object] | None,
+    ) -> None:
+        """Write payload (call with the key lock held).
+
+        On failure ``restore`` goes back to the buffer unless a newer save
+        arrived meanwhile.
+        """
+        with self._lock:
+            self._writing[key] = payload
+        try:
+            self._writer(key, payload)
+        except Exception:
+            logger.exception("Failed to write payload for %s", key)
+            with self._lock:
+                self._failed_writes += 1
+                if restore is not None and key not in self._pending:
+                    self._pending[key] = restore
+                    if self.enabled:
+                        self._schedule(key)
+            raise
+        finally:
+            with self._lock:
+                self._writing.pop(key, None)
+        with self._lock:
+            self._physical_writes += 1
@@ -1,7 +1,18 @@
 """Utility modules."""
-from api.utils.file_utils import safe_asset_path, save_upload_file
+from api.utils.file_utils import (
+    link_tree,
+    safe_asset_path,
+    save_upload_file,
+    write_bytes_atomic,
+)
+from api.utils.json_patch import (
+    JsonPatchError,
+    JsonPatchTestFailed,
+    apply_json_patch,
+)
 from api.utils.json_utils import (
     json_dump,
+    json_dump_bytes,
     json_load,
     ndjson_dump,
     read_json_file,
@@ -9,6 +20,9 @@ from api.utils.json_utils import (
 )
 from api.utils.paths import (
     assets_dir,
+    binary_payload_path,
+    iter_test_dirs,
+    payload_exists,
     payload_path,
     test_dir,
 )
@@ -16,14 +30,23 @@ from api.utils.time_utils import parse_iso_timestamp, utc_now
 from api.utils.validation import validate_id, validate_test_exists
 
 __all__ = [
+    "link_tree",
     "safe_asset_path",
     "save_upload_file",
+    "write_bytes_atomic",
+    "JsonPatchError",
+    "JsonPatchTestFailed",
+    "apply_json_patch",
     "json_dump",
+    "json_dump_bytes",
     "json_load",
     "ndjson_dump",
     "read_json_file",
     "write_json_file",
     "assets_dir",
+    "binary_payload_path",
+    "iter_test_dirs",
+    "payload_exists",
     "payload_path",
     "test_dir",
     "parse_iso_timestamp",
@@ -0,0 +1,189 @@
+"""Binary container format for stored test payloads.
+
+Layout (little-endian)::
+
+    header   magic "TMBP", format version (u16), flags (u16),
+             question count (u32), meta offset (u64), meta length (u32),
+             table offset (u64)
+    meta     JSON object: the payload without "questions"
+    table    per question: id (i64), record offset (u64), record length (u32)
+    records  one JSON document per question, zlib-compressed if flagged
+
+Readers map the file into memory and decode only the records they need.
+Normalized payloads keep their shared node table in meta; readers expand
+each record with it, so callers always see the regular form.
+"""
+import mmap
+import struct
+import zlib
+from pathlib import Path
+
+from api.utils.file_utils import write_bytes_atomic
+from api.utils.json_utils import json_dump_bytes, json_load
+from core.serialization import (
+    NORMALIZED_FLAG,
+    SHARED_NODES_KEY,
+    expand_question,
+)
+
+MAGIC = b"TMBP"
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x1
+
+_HEADER = struct.Struct("<4sHHIQIQ")
+_TABLE_ENTRY = struct.Struct("<qQI")
+_MISSING_ID = -(2**63)
+
+
+class BinaryPayloadError(ValueError):
+    """Raised when a container file is malformed."""
+
+
+def encode_binary_payload(payload: dict[str, object], compress: bool = False) -> bytes:
+    """Encode payload dict into container bytes."""
+    questions = payload.get("questions", [])
+    if not isinstance(questions, list):
+        questions = []
+    meta = {key: value for key, value in payload.items() if key != "questions"}
+    meta_bytes = json_dump_bytes(meta, pretty=False)
+
+    records = []
+    for question in questions:
+        record = json_dump_bytes(question, pretty=False)
+        if compress:
+            record = zlib.compress(record, 6)
+        records.append(record)
+
+    meta_offset = _HEADER.size
+    table_offset = meta_offset + len(meta_bytes)
+    offset = table_offset + _TABLE_ENTRY.size * len(records)
+
+    table = bytearray()
+    for question, record in zip(questions, records):
+        question_id = question.get("id") if isinstance(question, dict) else None
+        if not isinstance(question_id, int):
+            question_id = _MISSING_ID
+        table += _TABLE_ENTRY.pack(question_id, offset, len(record))
+        offset += len(record)
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        FLAG_ZLIB if compress else 0,
+        len(records),
+        meta_offset,
+        len(meta_bytes),
+        table_offset,
+    )
+    return b"".join([header, meta_bytes, bytes(table), *records])
+
+
+def write_binary_payload(path: Path, payload: dict[str, object], compress: bool = False) -> None:
+    """Write payload as container file, atomically replacing the old one."""
+    write_bytes_atomic(path, encode_binary_payload(payload, compress))
+
+
+class BinaryPayloadReader:
+    """Memory-mapped reader for container files.
+
+    Use as a context manager; records are decoded on demand.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._map: mmap.mmap | None = None
+        self.compressed = False
+        self.ids: list[int | None] = []
+        self._offsets: list[int] = []
+        self._lengths: list[int] = []
+        self._meta_range = (0, 0)
+        self._meta: dict[str, object] | None = None
+
+    def __enter__(self) -> "BinaryPayloadReader":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        self._file = self.path.open("rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._read_header()
+        except (ValueError, struct.error) as exc:
+            self.close()
+            raise BinaryPayloadError(f"Invalid payload container {self.path}: {exc}")
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_header(self) -> None:
+        (
+            magic,
+            version,
+            flags,
+            count,
+            meta_offset,
+            meta_length,
+            table_offset,
+        ) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise BinaryPayloadError("unsupported header")
+        self.compressed = bool(flags & FLAG_ZLIB)
+        self._meta_range = (meta_offset, meta_offset + meta_length)
+        for position in range(count):
+            question_id, offset, length = _TABLE_ENTRY.unpack_from(
+                self._map, table_offset + position * _TABLE_ENTRY.size
+            )
+            self.ids.append(None if question_id == _MISSING_ID else question_id)
+            self._offsets.append(offset)
+            self._lengths.append(length)
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    def _raw_meta(self) -> dict[str, object]:
+        if self._meta is None:
+            start, end = self._meta_range
+            self._meta = json_load(self._map[start:end])
+        return self._meta
+
+    def read_meta(self) -> dict[str, object]:
+        """Decode payload fields other than questions."""
+        return {
+            key: value
+            for key, value in self._raw_meta().items()
+            if key not in (NORMALIZED_FLAG, SHARED_NODES_KEY)
+        }
+
+    def read_question(self, position: int) -> dict[str, object]:
+        """Decode a single question record by ordinal position."""
+        start = self._offsets[position]
+        record = self._map[start : start + self._lengths[position]]
+        if self.compressed:
+            record = zlib.decompress(record)
+        question = json_load(record)
+        meta = self._raw_meta()
+        if meta.get(NORMALIZED_FLAG):
+            question = expand_question(question, meta.get(SHARED_NODES_KEY) or [])
+        return question
+
+    def read_payload(self) -> dict[str, object]:
+        """Decode the whole payload into the regular dict form."""
+        payload = self.read_meta()
+        payload["questions"] = [self.read_question(i) for i in range(self.total)]
+        return payload
+
+
+def read_binary_payload(path: Path) -> dict[str, object]:
+    """Read whole payload from container file."""
+    with BinaryPayloadReader(path) as reader:
+        return reader.read_payload()
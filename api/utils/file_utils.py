@@ -1,9 +1,15 @@
 """File handling utilities."""
+import hashlib
+import os
+import shutil
 import uuid
 from pathlib import Path
+from typing import BinaryIO, Iterable
 
 from fastapi import HTTPException, UploadFile
 
+from core.asset_names import CHUNK_SIZE, content_hash_name
+
 
 def safe_asset_path(base_dir: Path, asset_path: str) -> Path:
     """Resolve asset path safely (prevent path traversal)."""
@@ -14,12 +20,71 @@ def safe_asset_path(base_dir: Path, asset_path: str) -> Path:
 
 
 def save_upload_file(upload: UploadFile, target_dir: Path) -> Path:
-    """Save uploaded file to target directory."""
+    """Save uploaded file to target directory under its content-hashed name.
+
+    The same content uploaded twice maps to one file.
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+    suffix = Path(upload.filename or "asset").suffix
+    digest = hashlib.sha256()
+    tmp_path = target_dir / f".upload-{uuid.uuid4().hex}.tmp"
+    try:
+        with tmp_path.open("wb") as target:
+            while chunk := upload.file.read(CHUNK_SIZE):
+                digest.update(chunk)
+                target.write(chunk)
+        candidate = target_dir / content_hash_name(digest.hexdigest(), suffix)
+        if not candidate.exists():
+            os.replace(tmp_path, candidate)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return candidate
+
+
+def write_bytes_atomic(path: Path, data: bytes | BinaryIO | Iterable[bytes]) -> None:
+    """Write a file through a temporary sibling and atomically replace it.
+
+    ``data`` is bytes, a binary file or an iterable of chunks (streamed).
+    The temporary name is unique, so concurrent writers of one path never
+    share it, and a failed write leaves the old file in place.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with tmp_path.open("wb") as target:
+            if isinstance(data, bytes):
+                target.write(data)
+            elif hasattr(data, "read"):
+                shutil.copyfileobj(data, target, CHUNK_SIZE)
+            else:
+                for chunk in data:
+                    target.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def link_tree(source_dir: Path, target_dir: Path) -> tuple[int, int]:
+    """Hardlink every file of source_dir into target_dir.
+
+    Falls back to copying where hardlinks are not possible (other file
+    system, unsupported platform). Returns (linked, copied) counts.
+    """
+    linked = 0
+    copied = 0
     target_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = Path(upload.filename or "asset").name
-    candidate = target_dir / safe_name
-    if candidate.exists():
-        suffix = candidate.suffix
-        candidate = target_dir / f"{candidate.stem}_{uuid.uuid4().hex[:8]}{suffix}"
-    candidate.write_bytes(upload.file.read())
-    return candidate
\ No newline at end of file
+    if not source_dir.is_dir():
+        return linked, copied
+    for path in source_dir.rglob("*"):
+        target = target_dir / path.relative_to(source_dir)
+        if path.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, target)
+            linked += 1
+        except OSError:
+            shutil.copy2(path, target)
+            copied += 1
+    return linked, copied
@@ -0,0 +1,132 @@
+"""Minimal RFC 6902 JSON Patch implementation."""
+import copy
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """Raised when a ``test`` operation does not match."""
+
+
+def _parse_pointer(pointer: object) -> list[str]:
+    """Split RFC 6901 JSON pointer into unescaped reference tokens."""
+    if not isinstance(pointer, str):
+        raise JsonPatchError("Path must be a string")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer}")
+    return [
+        token.replace("~1", "/").replace("~0", "~")
+        for token in pointer[1:].split("/")
+    ]
+
+
+def _array_index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token}")
+    index = int(token)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise JsonPatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _resolve_parent(document: object, tokens: list[str]) -> tuple[object, str]:
+    """Walk to the container holding the last token."""
+    if not tokens:
+        raise JsonPatchError("Operation on document root is not supported")
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise JsonPatchError(f"Path not found: {token}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_array_index(target, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: {token}")
+    return target, tokens[-1]
+
+
+def _get(document: object, tokens: list[str]) -> object:
+    if not tokens:
+        return document
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {token}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_array_index(parent, token, allow_end=False)]
+    raise JsonPatchError(f"Path not found: {token}")
+
+
+def _add(document: object, tokens: list[str], value: object) -> None:
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Path not found: {token}")
+
+
+def _remove(document: object, tokens: list[str]) -> object:
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {token}")
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_array_index(parent, token, allow_end=False))
+    raise JsonPatchError(f"Path not found: {token}")
+
+
+def apply_json_patch(document: object, operations: list[object]) -> object:
+    """Apply JSON Patch operations to a copy of document and return it.
+
+    The original document is never modified, so a failing patch leaves no
+    partial changes behind.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("Patch must be a list of operations")
+
+    result = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise JsonPatchError("Patch operation must be an object")
+        op = operation.get("op")
+        tokens = _parse_pointer(operation.get("path"))
+
+        if op in {"add", "replace", "test"} and "value" not in operation:
+            raise JsonPatchError(f"Operation '{op}' requires a value")
+
+        if op == "add":
+            _add(result, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(result, tokens)
+        elif op == "replace":
+            _remove(result, tokens)
+            _add(result, tokens, copy.deepcopy(operation["value"]))
+        elif op in {"move", "copy"}:
+            from_tokens = _parse_pointer(operation.get("from"))
+            if op == "move":
+                if tokens[: len(from_tokens)] == from_tokens and tokens != from_tokens:
+                    raise JsonPatchError("Cannot move a value into its own child")
+                value = _remove(result, from_tokens)
+            else:
+                value = copy.deepcopy(_get(result, from_tokens))
+            _add(result, tokens, value)
+        elif op == "test":
+            if _get(result, tokens) != operation["value"]:
+                raise JsonPatchTestFailed(
+                    f"Test failed at {operation.get('path')}"
+                )
+        else:
+            raise JsonPatchError(f"Unknown patch operation: {op}")
+    return result
@@ -1,31 +1,120 @@
-"""JSON serialization utilities."""
+"""JSON serialization utilities.
+
+Serialization goes through a pluggable backend: the stdlib ``json`` module,
+or ``orjson`` (C-accelerated) when it is installed. ``JSON_BACKEND`` selects
+it explicitly ("stdlib", "orjson"); the default "auto" prefers orjson.
+Payload files are written compactly unless ``PAYLOAD_JSON_INDENT`` is set.
+"""
 import json
+import logging
 from pathlib import Path
 
+from api.config import JSON_BACKEND, PAYLOAD_JSON_INDENT
+from api.utils.file_utils import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class StdlibJsonBackend:
+    """Backend using the standard library ``json`` module."""
+
+    name = "stdlib"
+
+    def dumps(self, payload: object, pretty: bool = False) -> bytes:
+        if pretty:
+            text = json.dumps(payload, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return text.encode("utf-8")
+
+    def loads(self, data: bytes | str) -> object:
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    """Backend using ``orjson``."""
+
+    name = "orjson"
+
+    def dumps(self, payload: object, pretty: bool = False) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    def loads(self, data: bytes | str) -> object:
+        return orjson.loads(data)
+
+
+def available_json_backends() -> dict[str, object]:
+    """Get installed JSON backends by name."""
+    backends: dict[str, object] = {"stdlib": StdlibJsonBackend()}
+    if ORJSON_AVAILABLE:
+        backends["orjson"] = OrjsonBackend()
+    return backends
+
+
+def _select_backend(name: str) -> object:
+    backends = available_json_backends()
+    if name == "auto":
+        return backends.get("orjson", backends["stdlib"])
+    if name not in backends:
+        logger.warning("JSON backend %s is not available, using stdlib", name)
+        return backends["stdlib"]
+    return backends[name]
+
+
+_backend = _select_backend(JSON_BACKEND)
+
+
+def get_json_backend() -> object:
+    """Get active JSON backend."""
+    return _backend
+
+
+def set_json_backend(name: str) -> None:
+    """Switch active JSON backend (used by tools and benchmarks)."""
+    global _backend
+    _backend = _select_backend(name)
+
+
+def json_dump_bytes(payload: object, pretty: bool | None = None) -> bytes:
+    """Serialize object to UTF-8 JSON bytes (compact unless pretty)."""
+    if pretty is None:
+        pretty = PAYLOAD_JSON_INDENT
+    return _backend.dumps(payload, pretty)
+
 
 def json_dump(payload: object) -> str:
-    """Serialize object to pretty JSON string."""
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    """Serialize object to JSON string using payload formatting settings."""
+    return json_dump_bytes(payload).decode("utf-8")
 
 
 def ndjson_dump(payload: object) -> str:
     """Serialize object to compact JSON string (for NDJSON)."""
-    return json.dumps(payload, ensure_ascii=False)
+    return json_dump_bytes(payload, pretty=False).decode("utf-8")
+
 
+def json_load(data: bytes | str) -> object:
+    """Deserialize JSON bytes or string to object.
 
-def json_load(data: str) -> object:
-    """Deserialize JSON string to object."""
-    return json.loads(data)
+    Prefer passing bytes (``Path.read_bytes()``): it skips building an
+    intermediate decoded string.
+    """
+    return _backend.loads(data)
 
 
 def read_json_file(path: Path, default: object) -> object:
     """Read and parse JSON file, return default if not exists."""
     if not path.exists():
         return default
-    return json_load(path.read_text(encoding="utf-8"))
+    return json_load(path.read_bytes())
 
 
 def write_json_file(path: Path, payload: object) -> None:
-    """Write object as JSON file."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json_dump(payload), encoding="utf-8")
\ No newline at end of file
+    """Write object as JSON file, atomically replacing the old one."""
+    write_bytes_atomic(path, json_dump_bytes(payload))
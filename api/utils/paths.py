@@ -1,12 +1,43 @@
-"""Path utilities for tests."""
+"""Path utilities for tests.
+
+Tests live in ``DATA_DIR/ab/cd/<test_id>`` (sharded by the first digits of
+the id) so that no directory holds hundreds of thousands of entries. Tests
+still in the legacy flat ``DATA_DIR/<test_id>`` are found as well until
+``scripts/shard_data_dir.py`` moves them; it leaves a symlink behind, so a
+path resolved just before the move keeps working.
+"""
 from pathlib import Path
+from typing import Iterator
+
+from api.config import DATA_DIR, DATA_DIR_LAYOUT
+
+# Sharded directories never move again, so their resolution is cached
+_sharded_dirs: dict[str, Path] = {}
+
 
-from api.config import DATA_DIR
+def sharded_test_dir(test_id: str) -> Path:
+    """Get sharded directory for test (whether it exists or not)."""
+    return DATA_DIR / test_id[:2] / test_id[2:4] / test_id
+
+
+def legacy_test_dir(test_id: str) -> Path:
+    """Get flat (pre-sharding) directory for test."""
+    return DATA_DIR / test_id
 
 
 def test_dir(test_id: str) -> Path:
     """Get directory for test."""
-    return DATA_DIR / test_id
+    cached = _sharded_dirs.get(test_id)
+    if cached is not None:
+        return cached
+    sharded = sharded_test_dir(test_id)
+    if sharded.is_dir():
+        _sharded_dirs[test_id] = sharded
+        return sharded
+    legacy = legacy_test_dir(test_id)
+    if legacy.is_dir() or DATA_DIR_LAYOUT == "flat":
+        return legacy
+    return sharded
 
 
 def payload_path(test_id: str) -> Path:
@@ -14,6 +45,41 @@ def payload_path(test_id: str) -> Path:
     return test_dir(test_id) / "test.json"
 
 
+def binary_payload_path(test_id: str) -> Path:
+    """Get path to binary test payload container."""
+    return test_dir(test_id) / "test.bin"
+
+
+def payload_exists(test_id: str) -> bool:
+    """Check whether test has a stored payload in any format."""
+    return payload_path(test_id).exists() or binary_payload_path(test_id).exists()
+
+
 def assets_dir(test_id: str) -> Path:
     """Get directory for test assets."""
     return test_dir(test_id) / "assets"
+
+
+def _is_test_dir(path: Path) -> bool:
+    return (path / "test.json").exists() or (path / "test.bin").exists()
+
+
+def iter_test_dirs() -> Iterator[Path]:
+    """Iterate directories of all stored tests (those with a payload), by id."""
+    if not DATA_DIR.exists():
+        return
+    directories = []
+    for entry in DATA_DIR.iterdir():
+        # Hidden entries are stores and staging areas (.blobs, .import-*);
+        # symlinks are legacy names of already sharded tests
+        if entry.name.startswith(".") or entry.is_symlink() or not entry.is_dir():
+            continue
+        if len(entry.name) == 2:
+            directories.extend(
+                test_directory
+                for test_directory in entry.glob("??/*")
+                if test_directory.is_dir() and _is_test_dir(test_directory)
+            )
+        elif _is_test_dir(entry):
+            directories.append(entry)
+    yield from sorted(directories, key=lambda directory: directory.name)
@@ -3,7 +3,7 @@ from pathlib import Path
 
 from fastapi import HTTPException
 
-from api.utils.paths import payload_path
+from api.utils.paths import payload_exists
 
 
 def validate_id(name: str, value: str) -> str:
@@ -20,5 +20,5 @@ def validate_id(name: str, value: str) -> str:
 
 def validate_test_exists(test_id: str) -> None:
     """Validate that test exists."""
-    if not payload_path(test_id).exists():
+    if not payload_exists(test_id):
         raise HTTPException(status_code=404, detail="Test not found")
\ No newline at end of file
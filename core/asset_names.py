@@ -0,0 +1,53 @@
+"""Content-hashed asset file names.
+
+An asset stored as ``<first 16 hex digits of SHA-256><suffix>`` never
+changes under its name, so its URL can be cached forever; new content
+always gets a new name.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from pathlib import Path
+
+HASH_LENGTH = 16
+CHUNK_SIZE = 1024 * 1024
+
+_HASH_NAME_RE = re.compile(rf"^[0-9a-f]{{{HASH_LENGTH}}}(\.[A-Za-z0-9]+)?$")
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash_name(digest: str, suffix: str) -> str:
+    """Build asset name from a SHA-256 hex digest and file suffix."""
+    return f"{digest[:HASH_LENGTH]}{suffix.lower()}"
+
+
+def is_content_hash_name(name: str) -> bool:
+    """Check whether a file name is a content hash (immutable asset)."""
+    return bool(_HASH_NAME_RE.match(name))
+
+
+def rename_to_content_hash(path: Path) -> Path:
+    """Rename file to its content-hashed name in the same directory.
+
+    Identical content already stored under that name is reused and the
+    duplicate removed.
+    """
+    path = Path(path)
+    target = path.with_name(content_hash_name(file_digest(path), path.suffix))
+    if target == path:
+        return path
+    if target.exists():
+        path.unlink()
+    else:
+        os.replace(path, target)
+    return target
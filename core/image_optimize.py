@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, UnidentifiedImageError
+
+log = logging.getLogger(__name__)
+
+
+# Formats Word stores uncompressed (or browsers cannot show): converted to PNG
+CONVERT_EXTENSIONS = {".bmp", ".dib", ".tif", ".tiff"}
+# Browsers cannot show TIFF, so the PNG is kept even when it is larger
+_UNSUPPORTED_EXTENSIONS = {".tif", ".tiff"}
+PNG_MODES = {"1", "L", "LA", "P", "RGB", "RGBA", "I", "I;16"}
+
+
+@dataclass
+class ImageOptimization:
+    path: Path  # resulting file (may differ from the source after conversion)
+    original_size: int
+    size: int
+
+
+def _save_options(target_format: str) -> dict[str, object]:
+    if target_format == "JPEG":
+        return {"quality": 90, "optimize": True, "progressive": True}
+    # No pnginfo/exif passed: text chunks and EXIF are dropped
+    return {"optimize": True}
+
+
+def optimize_image(image_path: Path, max_dimension: int = 0) -> ImageOptimization:
+    """
+    Convert, recompress and (optionally) downsample one image in place.
+    Metadata is stripped. The original is kept when the result is not smaller.
+    """
+    image_path = Path(image_path)
+    suffix = image_path.suffix.lower()
+    original_size = image_path.stat().st_size
+    unchanged = ImageOptimization(image_path, original_size, original_size)
+    tmp_path = None
+
+    try:
+        with Image.open(image_path) as img:
+            if getattr(img, "n_frames", 1) > 1:
+                return unchanged  # animations are left as they are
+            source_format = img.format
+            resize = max_dimension > 0 and max(img.size) > max_dimension
+            if suffix in CONVERT_EXTENSIONS:
+                target_format = "PNG"
+            elif source_format == "PNG":
+                target_format = "PNG"
+            elif source_format == "JPEG" and resize:
+                # Re-encoding JPEG is lossy: only worth it when downsampling
+                target_format = "JPEG"
+            else:
+                return unchanged
+
+            img.load()
+            image = img
+            if resize:
+                image = image.copy()
+                image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            if target_format == "PNG" and image.mode not in PNG_MODES:
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            elif target_format == "JPEG" and image.mode not in ("L", "RGB"):
+                image = image.convert("RGB")
+
+            target_path = image_path
+            if target_format == "PNG" and suffix != ".png":
+                target_path = image_path.with_suffix(".png")
+            tmp_path = target_path.with_name(f".{target_path.name}.tmp")
+            image.save(tmp_path, format=target_format, **_save_options(target_format))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as exc:
+        log.warning("Failed to optimize image %s: %s", image_path.name, exc)
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        return unchanged
+
+    size = tmp_path.stat().st_size
+    if size >= original_size and suffix not in _UNSUPPORTED_EXTENSIONS:
+        tmp_path.unlink()
+        return unchanged
+    os.replace(tmp_path, target_path)
+    if target_path != image_path:
+        image_path.unlink()
+    log.debug("Optimized image %s: %d -> %d bytes", target_path.name, original_size, size)
+    return ImageOptimization(target_path, original_size, size)
+
+
+def optimize_images(
+        image_paths: list[Path],
+        max_dimension: int = 0,
+        workers: int = 4,
+) -> list[ImageOptimization]:
+    """Optimize images in a worker pool (Pillow releases the GIL while coding)."""
+    if not image_paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="image_optimize") as pool:
+        return list(pool.map(lambda path: optimize_image(path, max_dimension), image_paths))
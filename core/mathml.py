@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import re
+
+from lxml import etree
+
+log = logging.getLogger(__name__)
+
+MATHML_NS = "http://www.w3.org/1998/Math/MathML"
+
+# Token elements: their text is content, everything else is layout
+TOKEN_ELEMENTS = {"mi", "mn", "mo", "mtext", "ms"}
+# Children of these are positional arguments, so wrappers cannot be spliced
+ARITY_ELEMENTS = {
+    "mfrac",
+    "mroot",
+    "msub",
+    "msup",
+    "msubsup",
+    "munder",
+    "mover",
+    "munderover",
+    "mmultiscripts",
+    "mfenced",
+    "semantics",
+    "maction",
+    "mlabeledtr",
+}
+WRAPPER_ELEMENTS = {"mrow", "mstyle"}
+
+_XML_DECLARATION_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]+")
+
+
+def _local_name(element: etree._Element) -> str:
+    return etree.QName(element).localname
+
+
+def _copy_tree(source: etree._Element, parent: etree._Element | None) -> etree._Element:
+    """Copy element tree into the default MathML namespace.
+
+    Comments and processing instructions are dropped, whitespace between
+    layout elements is removed, token text is collapsed. Other text (e.g.
+    the TeX source in ``<semantics><annotation>``) is kept as is.
+    """
+    name = _local_name(source)
+    namespace = etree.QName(source).namespace
+    tag = f"{{{MATHML_NS}}}{name}" if namespace in (None, MATHML_NS) else source.tag
+    if parent is None:
+        element = etree.Element(tag, nsmap={None: MATHML_NS})
+    else:
+        element = etree.SubElement(parent, tag)
+    for key, value in source.attrib.items():
+        element.set(key, value)
+
+    if name in TOKEN_ELEMENTS:
+        text = "".join(source.itertext())
+        collapsed = _WHITESPACE_RE.sub(" ", text)
+        # Whitespace-only tokens are kept as a single space
+        element.text = collapsed.strip() or collapsed or None
+        return element
+
+    if source.text and source.text.strip():
+        element.text = source.text
+    for child in source:
+        if isinstance(child.tag, str):
+            copied = _copy_tree(child, element)
+            if child.tail and child.tail.strip():
+                copied.tail = child.tail
+        elif child.tail and child.tail.strip():
+            # Text after a dropped comment still belongs to the parent
+            if len(element):
+                element[-1].tail = (element[-1].tail or "") + child.tail
+            else:
+                element.text = (element.text or "") + child.tail
+    return element
+
+
+def _drop_default_attributes(element: etree._Element) -> None:
+    name = _local_name(element)
+    if name == "mi":
+        variant = element.get("mathvariant")
+        text = element.text or ""
+        if (variant == "italic" and len(text) == 1) or (variant == "normal" and len(text) > 1):
+            del element.attrib["mathvariant"]
+    elif name == "mtd" and element.get("columnalign") == "center":
+        del element.attrib["columnalign"]
+
+
+def _is_plain_wrapper(element: etree._Element) -> bool:
+    # Text outside tokens (kept since it is not whitespace) pins the wrapper
+    return (
+        _local_name(element) in WRAPPER_ELEMENTS
+        and not element.attrib
+        and not element.text
+        and not element.tail
+    )
+
+
+def _simplify(element: etree._Element) -> None:
+    """Strip no-op mrow/mstyle wrappers below element (bottom-up)."""
+    for child in list(element):
+        _simplify(child)
+        _drop_default_attributes(child)
+
+    positional = _local_name(element) in ARITY_ELEMENTS
+    for child in list(element):
+        if not _is_plain_wrapper(child):
+            continue
+        grandchildren = list(child)
+        if len(grandchildren) == 1 and (
+            positional or _local_name(grandchildren[0]) != "mo"
+        ):
+            # A single-child row renders exactly like its child; a lone
+            # operator keeps its row, or it would turn from infix to prefix
+            child.addprevious(grandchildren[0])
+            element.remove(child)
+        elif positional or len(grandchildren) == 1:
+            continue
+        elif not grandchildren:
+            element.remove(child)
+        elif not any(_local_name(node) == "mo" for node in grandchildren):
+            # Operators take their form (prefix/infix) and stretch size from
+            # the enclosing row, so only operator-free rows are spliced
+            for node in grandchildren:
+                child.addprevious(node)
+            element.remove(child)
+
+
+def minify_mathml(mathml: str) -> str:
+    """Canonicalize and minify MathML markup.
+
+    Returns the original string if it cannot be parsed.
+    """
+    if not mathml:
+        return mathml
+    source = _XML_DECLARATION_RE.sub("", mathml, count=1)
+    try:
+        parsed = etree.fromstring(source)
+    except (etree.XMLSyntaxError, ValueError):
+        log.debug("Skipping unparsable MathML")
+        return mathml
+
+    root = _copy_tree(parsed, None)
+    _simplify(root)
+    _drop_default_attributes(root)
+    minified = etree.tostring(root, encoding="unicode")
+    return minified if len(minified) <= len(mathml) else mathml
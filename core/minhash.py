@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+from typing import Iterable, Sequence
+
+# 64 hash functions split into 16 LSH bands of 4 rows: pairs with Jaccard
+# similarity s share at least one band with probability 1 - (1 - s^4)^16,
+# i.e. ~0.5 at s=0.5, ~0.97 at s=0.7 and ~0.02 at s=0.25.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+_BAND = struct.Struct(f"<{ROWS}I")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """Split text into lowercase word tokens (punctuation dropped, ё -> е)."""
+    return _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+def shingles(tokens: Sequence[str], size: int = SHINGLE_SIZE) -> set[str]:
+    """Get word n-gram shingles of tokens (short texts give one shingle)."""
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def text_shingles(parts: Iterable[str]) -> set[str]:
+    """Get shingles of several texts (e.g. question and each option)."""
+    result: set[str] = set()
+    for part in parts:
+        result |= shingles(normalize_tokens(part))
+    return result
+
+
+def minhash_signature(shingle_set: Iterable[str]) -> tuple[int, ...] | None:
+    """Get MinHash signature of a shingle set, or None if it is empty.
+
+    Each shingle is hashed once with SHAKE-128 and the output is split into
+    NUM_PERM independent 32-bit hash values; the signature is their
+    element-wise minimum.
+    """
+    size = _SIGNATURE.size
+    rows = [
+        _SIGNATURE.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(size))
+        for shingle in shingle_set
+    ]
+    if not rows:
+        return None
+    return tuple(map(min, zip(*rows)))
+
+
+def pack_signature(signature: Sequence[int]) -> bytes:
+    return _SIGNATURE.pack(*signature)
+
+
+def unpack_signature(data: bytes) -> tuple[int, ...]:
+    return _SIGNATURE.unpack(data)
+
+
+def band_keys(signature: Sequence[int]) -> list[int]:
+    """Get one signed 64-bit bucket key per LSH band."""
+    keys = []
+    for band in range(BANDS):
+        chunk = _BAND.pack(*signature[band * ROWS : (band + 1) * ROWS])
+        digest = hashlib.blake2b(chunk, digest_size=8, person=bytes([band])).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def estimate_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimate Jaccard similarity from two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
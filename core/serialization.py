@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
+import json
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 from core.models import ContentItem, TestQuestion
 
@@ -13,6 +15,12 @@ INLINE_LINE_BREAK_TYPE = "line_break"
 
 BLOCK_PARAGRAPH_TYPE = "paragraph"
 
+NORMALIZED_FLAG = "normalized"
+SHARED_NODES_KEY = "sharedNodes"
+REF_KEY = "$ref"
+# Interning a node smaller than this does not pay for the reference itself
+MIN_INTERN_SIZE = 24
+
 
 def _is_mathml(value: str) -> bool:
     stripped = value.lstrip()
@@ -88,6 +96,7 @@ def serialize_test_payload(
     title: str,
     questions: list[TestQuestion],
     assets_dir: Path | None = None,
+    normalized: bool = False,
 ) -> dict[str, Any]:
     payload_questions = []
     for index, question in enumerate(questions, start=1):
@@ -120,12 +129,198 @@ def serialize_test_payload(
         "assetsBaseUrl": f"/api/tests/{test_id}/assets",
         "questions": payload_questions,
     }
+    if normalized:
+        return normalize_payload(payload)
     return payload
 
 
+def _node_key(node: Any) -> str:
+    return json.dumps(node, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _question_block_lists(question: dict[str, Any]) -> list[list[Any]]:
+    lists = []
+    for container in (question.get("question"), question.get("correct")):
+        if isinstance(container, dict) and isinstance(container.get("blocks"), list):
+            lists.append(container["blocks"])
+    for option in question.get("options") or []:
+        content = option.get("content") if isinstance(option, dict) else None
+        if isinstance(content, dict) and isinstance(content.get("blocks"), list):
+            lists.append(content["blocks"])
+    return lists
+
+
+def _correct_option_id(question: dict[str, Any]) -> int | None:
+    """Find option whose content matches the stored correct answer."""
+    correct = question.get("correct")
+    if not isinstance(correct, dict) or "blocks" not in correct:
+        return None
+    candidates = [
+        option
+        for option in question.get("options") or []
+        if isinstance(option, dict) and isinstance(option.get("content"), dict)
+    ]
+    candidates.sort(key=lambda option: not option.get("isCorrect"))
+    for option in candidates:
+        if option["content"].get("blocks") == correct["blocks"]:
+            return option.get("id")
+    return None
+
+
+def normalize_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    """Build the normalized (compact) form of a test payload.
+
+    * ``correct`` becomes ``{"optionId": n}`` when it duplicates an option;
+    * blocks and inlines that occur more than once are moved to a shared
+      ``sharedNodes`` table and replaced by ``{"$ref": index}``.
+
+    Use :func:`expand_payload` to get back the regular form.
+    """
+    if payload.get(NORMALIZED_FLAG):
+        return payload
+    result = copy.deepcopy(payload)
+    questions = [q for q in result.get("questions") or [] if isinstance(q, dict)]
+
+    for question in questions:
+        option_id = _correct_option_id(question)
+        if option_id is not None:
+            question["correct"] = {"optionId": option_id}
+
+    block_lists = [blocks for q in questions for blocks in _question_block_lists(q)]
+
+    block_counts: dict[str, int] = {}
+    for blocks in block_lists:
+        for block in blocks:
+            key = _node_key(block)
+            block_counts[key] = block_counts.get(key, 0) + 1
+    shared_blocks = {
+        key for key, count in block_counts.items()
+        if count > 1 and len(key) >= MIN_INTERN_SIZE
+    }
+
+    inline_counts: dict[str, int] = {}
+    for blocks in block_lists:
+        for block in blocks:
+            if _node_key(block) in shared_blocks or not isinstance(block, dict):
+                continue
+            for inline in block.get("inlines") or []:
+                key = _node_key(inline)
+                inline_counts[key] = inline_counts.get(key, 0) + 1
+    shared_inlines = {
+        key for key, count in inline_counts.items()
+        if count > 1 and len(key) >= MIN_INTERN_SIZE
+    }
+
+    table: list[Any] = []
+    refs: dict[str, int] = {}
+
+    def intern(node: Any, key: str) -> dict[str, int]:
+        if key not in refs:
+            refs[key] = len(table)
+            table.append(node)
+        return {REF_KEY: refs[key]}
+
+    for blocks in block_lists:
+        for index, block in enumerate(blocks):
+            key = _node_key(block)
+            if key in shared_blocks:
+                blocks[index] = intern(block, key)
+                continue
+            inlines = block.get("inlines") if isinstance(block, dict) else None
+            if not isinstance(inlines, list):
+                continue
+            for inline_index, inline in enumerate(inlines):
+                inline_key = _node_key(inline)
+                if inline_key in shared_inlines:
+                    inlines[inline_index] = intern(inline, inline_key)
+
+    result[NORMALIZED_FLAG] = True
+    result[SHARED_NODES_KEY] = table
+    return result
+
+
+def _expand_refs(node: Any, table: list[Any]) -> Any:
+    if isinstance(node, dict):
+        if len(node) == 1 and REF_KEY in node:
+            return copy.deepcopy(table[node[REF_KEY]])
+        return {key: _expand_refs(value, table) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_expand_refs(item, table) for item in node]
+    return node
+
+
+def expand_question(question: dict[str, Any], shared_nodes: list[Any]) -> dict[str, Any]:
+    """Expand a single normalized question using the payload's shared table."""
+    expanded = _expand_refs(question, shared_nodes)
+    correct = expanded.get("correct")
+    if isinstance(correct, dict) and "optionId" in correct and "blocks" not in correct:
+        for option in expanded.get("options") or []:
+            if isinstance(option, dict) and option.get("id") == correct["optionId"]:
+                expanded["correct"] = {
+                    "blocks": copy.deepcopy(option.get("content", {}).get("blocks", []))
+                }
+                break
+        else:
+            expanded["correct"] = {"blocks": []}
+    return expanded
+
+
+def expand_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    """Return the regular form of a payload; regular payloads pass through."""
+    if not payload.get(NORMALIZED_FLAG):
+        return payload
+    shared_nodes = payload.get(SHARED_NODES_KEY) or []
+    result = {
+        key: value
+        for key, value in payload.items()
+        if key not in (NORMALIZED_FLAG, SHARED_NODES_KEY, "questions")
+    }
+    result["questions"] = [
+        expand_question(question, shared_nodes)
+        for question in payload.get("questions") or []
+        if isinstance(question, dict)
+    ]
+    return result
+
+
 def serialize_metadata(payload: dict[str, Any]) -> dict[str, Any]:
     return {
         "id": payload.get("id"),
         "title": payload.get("title"),
         "questionCount": len(payload.get("questions", [])),
     }
+
+
+def iter_image_inlines(node: Any) -> Iterator[dict[str, Any]]:
+    """Yield every image inline found anywhere inside node."""
+    if isinstance(node, dict):
+        if node.get("type") == INLINE_IMAGE_TYPE:
+            yield node
+        for value in node.values():
+            yield from iter_image_inlines(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_image_inlines(item)
+
+
+def blocks_to_text(blocks: Any) -> str:
+    """Get plain text of blocks (paragraphs joined by newlines).
+
+    Formulas and images carry no text and are skipped.
+    """
+    if not isinstance(blocks, list):
+        return ""
+    lines: list[str] = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        parts: list[str] = []
+        for inline in block.get("inlines") or []:
+            if not isinstance(inline, dict):
+                continue
+            if inline.get("type") == INLINE_TEXT_TYPE:
+                parts.append(str(inline.get("text") or ""))
+            elif inline.get("type") == INLINE_LINE_BREAK_TYPE:
+                parts.append("\n")
+        lines.append("".join(parts))
+    return "\n".join(lines).strip()
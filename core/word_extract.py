@@ -7,7 +7,10 @@ from pathlib import Path
 from docx import Document
 from lxml import etree
 
+from core.asset_names import rename_to_content_hash
 from core.image_convert import convert_metafile_to_png
+from core.image_optimize import optimize_images
+from core.mathml import minify_mathml
 from core.models import ContentItem, TestOption, TestQuestion
 
 log = logging.getLogger(__name__)
@@ -29,12 +32,18 @@ class WordTestExtractor:
             symbol: str,
             log_small_tables: bool,
             image_output_dir: Path,
+            image_optimization: bool = True,
+            max_image_dimension: int = 0,
+            image_workers: int = 4,
     ):
         self.file_path = Path(file_path)
         self.symbol = symbol
         self.log_small_tables = log_small_tables
         self.extract_dir = Path(image_output_dir)
         self.extract_dir.mkdir(parents=True, exist_ok=True)
+        self.image_optimization = image_optimization
+        self.max_image_dimension = max_image_dimension
+        self.image_workers = image_workers
         self.logs: list[str] = []  # short TK logs
         self._omml_xslt = self._load_omml_xslt()
         self._omml_xslt_missing_logged = False
@@ -50,7 +59,6 @@ class WordTestExtractor:
     # ---- Extract embedded images from docx media ----
     def _extract_images(self, doc: Document) -> dict[str, Path]:
         image_map: dict[str, Path] = {}
-        count = 0
         for rel_id, part in doc.part.related_parts.items():
             if "image" not in part.content_type:
                 continue
@@ -59,10 +67,35 @@ class WordTestExtractor:
             image_path.write_bytes(part.blob)
             converted_path = convert_metafile_to_png(image_path, self.extract_dir)
             image_map[rel_id] = converted_path or image_path
-            count += 1
-        log.info("Extracted embedded images: %d", count)
-        self.logs.append(f"Изображений извлечено: {count}")
-        return image_map
+        log.info("Extracted embedded images: %d", len(image_map))
+        self.logs.append(f"Изображений извлечено: {len(image_map)}")
+
+        if self.image_optimization:
+            self._optimize_images(image_map)
+        # Content-hashed names make asset URLs immutable (cacheable forever);
+        # renamed last, so the hash is of the optimized file
+        return {rel_id: rename_to_content_hash(path) for rel_id, path in image_map.items()}
+
+    def _optimize_images(self, image_map: dict[str, Path]) -> None:
+        rel_ids = list(image_map)
+        results = optimize_images(
+            [image_map[rel_id] for rel_id in rel_ids],
+            self.max_image_dimension,
+            self.image_workers,
+        )
+        for rel_id, result in zip(rel_ids, results):
+            image_map[rel_id] = result.path
+        optimized = [result for result in results if result.size < result.original_size]
+        if not optimized:
+            return
+        before = sum(result.original_size for result in results)
+        after = sum(result.size for result in results)
+        log.info("Optimized images: %d, %d -> %d bytes", len(optimized), before, after)
+        self.logs.append(
+            f"Изображений оптимизировано: {len(optimized)}, "
+            f"{before / 1024:.0f} КБ → {after / 1024:.0f} КБ "
+            f"(−{(before - after) * 100 / before:.0f}%)"
+        )
 
     def _load_omml_xslt(self) -> etree.XSLT | None:
         xslt_path = Path(__file__).with_name("omml2mml.xsl")
@@ -111,7 +144,7 @@ class WordTestExtractor:
             return None
         omml_xml = etree.fromstring(etree.tostring(omml_element))
         mathml = self._omml_xslt(omml_xml)
-        return str(mathml)
+        return minify_mathml(str(mathml))
 
     # ---- Parse cell content (text + images + formulas) ----
     def _content_from_cell(
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark near-duplicate detection on a synthetic question bank.
+
+Generates a bank where a share of questions are edited copies of others
+(word replaced/dropped, options reordered), indexes it into a throwaway
+duplicates database and reports build time, query latency, recall of the
+planted duplicates and the cost of a brute-force scan for comparison.
+
+Usage:
+    python scripts/bench_duplicates.py [--questions 100000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ["DUPLICATES_DB_PATH"] = str(Path(_tmp_dir.name) / "duplicates.sqlite3")
+
+from contextlib import closing
+
+from api.services import duplicate_service
+from api.services.test_service import text_to_blocks
+from core.minhash import estimate_similarity
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate detection")
+    parser.add_argument("--questions", type=int, default=100_000, help="Bank size")
+    parser.add_argument("--queries", type=int, default=200, help="Lookups to time")
+    parser.add_argument("--per-test", type=int, default=100, help="Questions per test")
+    parser.add_argument("--dup-share", type=float, default=0.2, help="Share of edited copies")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def _question(question_id: int, words: list[str], options: list[list[str]]) -> dict[str, object]:
+    return {
+        "id": question_id,
+        "question": {"blocks": text_to_blocks(" ".join(words))},
+        "options": [
+            {"id": index, "content": {"blocks": text_to_blocks(" ".join(option))}}
+            for index, option in enumerate(options, start=1)
+        ],
+    }
+
+
+def generate_bank(
+    args: argparse.Namespace,
+) -> tuple[dict[str, list[dict[str, object]]], dict[tuple[str, int], tuple[str, int]]]:
+    """Generate tests and the map copy -> original of planted duplicates."""
+    rng = random.Random(args.seed)
+    vocabulary = [f"w{index}" for index in range(20_000)]
+    tests: dict[str, list[dict[str, object]]] = {}
+    texts: list[tuple[tuple[str, int], list[str], list[list[str]]]] = []
+    planted: dict[tuple[str, int], tuple[str, int]] = {}
+
+    for number in range(args.questions):
+        test_id = f"t{number // args.per_test:05d}"
+        question_id = number % args.per_test + 1
+        key = (test_id, question_id)
+        if texts and rng.random() < args.dup_share:
+            original_key, words, options = rng.choice(texts)
+            words = list(words)
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            if len(words) > 10 and rng.random() < 0.5:
+                del words[rng.randrange(len(words))]
+            options = rng.sample(options, len(options))
+            planted[key] = original_key
+        else:
+            words = rng.choices(vocabulary, k=rng.randint(12, 24))
+            options = [rng.choices(vocabulary, k=rng.randint(2, 5)) for _ in range(4)]
+            texts.append((key, words, options))
+        tests.setdefault(test_id, []).append(_question(question_id, words, options))
+    return tests, planted
+
+
+def bench(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    tests, planted = generate_bank(args)
+    print(f"Generated {args.questions} questions in {len(tests)} tests "
+          f"({len(planted)} planted duplicates) in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    for test_id, questions in tests.items():
+        duplicate_service.index_test_duplicates(test_id, {"questions": questions})
+    build = time.perf_counter() - started
+    print(f"Index build: {build:.1f}s ({build / args.questions * 1e6:.0f} us/question)")
+
+    started = time.perf_counter()
+    duplicate_service.index_test_duplicates("t00000", {"questions": tests["t00000"]})
+    print(f"Re-save of unchanged test: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(args.seed + 1)
+    sample = rng.sample(sorted(planted), min(args.queries, len(planted)))
+    found = 0
+    started = time.perf_counter()
+    for copy_key in sample:
+        matches = duplicate_service.find_similar_questions(*copy_key, limit=100)
+        original = planted[copy_key]
+        if any((match["testId"], match["questionId"]) == original for match in matches):
+            found += 1
+    lookup = (time.perf_counter() - started) / len(sample)
+    print(f"Lookup: {lookup * 1000:.2f} ms/query, "
+          f"recall of planted duplicates {found / len(sample):.1%}")
+
+    with closing(duplicate_service._connect()) as conn:
+        signatures = [
+            duplicate_service.unpack_signature(row[0])
+            for row in conn.execute(
+                "SELECT signature FROM dup_questions WHERE signature IS NOT NULL"
+            )
+        ]
+    target = signatures[0]
+    started = time.perf_counter()
+    for signature in signatures:
+        estimate_similarity(target, signature)
+    scan = time.perf_counter() - started
+    print(f"Brute-force scan (signatures already in memory): {scan * 1000:.0f} ms/query, "
+          f"{scan / lookup:.0f}x slower")
+
+    report_tests = sorted(tests)[:50]
+    started = time.perf_counter()
+    groups = duplicate_service.report_duplicates(report_tests)
+    print(f"Report across {len(report_tests)} tests: {len(groups)} groups "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    print("=== Near-Duplicate Detection Benchmark ===\n")
+    bench(parse_args())
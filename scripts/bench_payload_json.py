@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON parse/serialize time and file size on the largest tests.
+
+Compares every installed JSON backend in pretty (indent=2) and compact
+form. Nothing is written to disk.
+
+Usage:
+    python scripts/bench_payload_json.py [--top 5] [--repeat 5] [files ...]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.utils import iter_test_dirs
+from api.utils.json_utils import available_json_backends
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark payload JSON backends")
+    parser.add_argument("files", nargs="*", type=Path, help="Payload files (default: largest tests)")
+    parser.add_argument("--top", type=int, default=5, help="Number of largest tests to use")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    return parser.parse_args()
+
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def largest_payloads(top: int) -> list[Path]:
+    """Get test.json files of the largest stored tests."""
+    files = [
+        test_directory / "test.json"
+        for test_directory in iter_test_dirs()
+        if (test_directory / "test.json").exists()
+    ]
+    files.sort(key=lambda path: path.stat().st_size, reverse=True)
+    return files[:top]
+
+
+def bench_file(path: Path, repeat: int) -> None:
+    backends = available_json_backends()
+    payload = backends["stdlib"].loads(path.read_bytes())
+    print(f"\n{path.parent.name} ({len(payload.get('questions', []))} questions)")
+    print(f"  {'backend':<8} {'format':<8} {'size, B':>10} {'dump, ms':>9} {'load, ms':>9}")
+
+    for backend in backends.values():
+        for pretty in (True, False):
+            data = backend.dumps(payload, pretty)
+            dump_time = _best_time(lambda: backend.dumps(payload, pretty), repeat)
+            load_time = _best_time(lambda: backend.loads(data), repeat)
+            label = "pretty" if pretty else "compact"
+            print(
+                f"  {backend.name:<8} {label:<8} {len(data):>10} "
+                f"{dump_time * 1000:>9.2f} {load_time * 1000:>9.2f}"
+            )
+
+
+def main() -> None:
+    args = parse_args()
+    files = args.files or largest_payloads(args.top)
+    if not files:
+        print("No payloads found")
+        return
+    print(f"Backends: {', '.join(available_json_backends())}")
+    for path in files:
+        bench_file(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
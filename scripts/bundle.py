@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Export tests to a zip bundle or import a bundle (backup and migration).
+
+Usage:
+    python scripts/bundle.py export backup.zip [--statistics] [test_id ...]
+    python scripts/bundle.py import backup.zip [--keep-ids] [--owner USERNAME]
+                                               [--access-level private]
+
+Without test ids every stored test is exported. Imported tests are owned
+by --owner; without it they have no owner record (visible to everyone,
+see scripts/migrate_test_ownership.py).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from api.database import SessionLocal
+from api.models.db.test_collection import AccessLevel
+from api.models.db.user import User
+from api.services import access_service
+from api.services.bundle_service import import_bundle, iter_export_bundle
+from api.services.stats_service import get_test_owner_stats
+from api.utils import iter_test_dirs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export/import test bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write tests to a bundle")
+    export_parser.add_argument("bundle", type=Path, help="Output .zip file")
+    export_parser.add_argument("test_ids", nargs="*", help="Tests to export (default: all)")
+    export_parser.add_argument(
+        "--statistics", action="store_true", help="Include attempt statistics"
+    )
+
+    import_parser = commands.add_parser("import", help="Import tests from a bundle")
+    import_parser.add_argument("bundle", type=Path, help="Bundle .zip file")
+    import_parser.add_argument(
+        "--keep-ids", action="store_true", help="Keep original test ids"
+    )
+    import_parser.add_argument("--owner", help="Username of the new owner")
+    import_parser.add_argument(
+        "--access-level",
+        choices=[level.value for level in AccessLevel],
+        default=AccessLevel.PRIVATE.value,
+        help="Access level for imported tests (with --owner)",
+    )
+    return parser.parse_args()
+
+
+def export_tests(bundle: Path, test_ids: list[str], include_statistics: bool) -> None:
+    """Stream tests into bundle file."""
+    if not test_ids:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    statistics = {}
+    if include_statistics:
+        db = SessionLocal()
+        try:
+            for test_id in test_ids:
+                statistics[test_id] = get_test_owner_stats(db, test_id, limit=100000)
+        finally:
+            db.close()
+
+    with bundle.open("wb") as output:
+        for chunk in iter_export_bundle(test_ids, statistics):
+            output.write(chunk)
+    print(f"Exported {len(test_ids)} tests to {bundle} ({bundle.stat().st_size} bytes)")
+
+
+def import_tests(bundle: Path, keep_ids: bool, owner: str | None, access_level: str) -> bool:
+    """Import bundle and optionally assign an owner."""
+    db = SessionLocal()
+    try:
+        user = None
+        if owner:
+            user = db.execute(select(User).where(User.username == owner)).scalar_one_or_none()
+            if user is None:
+                print(f"ERROR: User '{owner}' not found")
+                return False
+
+        with bundle.open("rb") as source:
+            try:
+                imported = import_bundle(source, keep_ids=keep_ids)
+            except HTTPException as exc:
+                print(f"ERROR: {exc.detail}")
+                return False
+
+        for test in imported:
+            if user is not None:
+                access_service.get_or_create_collection(
+                    db, test["id"], user.id, AccessLevel(access_level)
+                )
+            print(f"  {test['sourceId']} -> {test['id']}: {test['title']} "
+                  f"({test['questionCount']} questions)")
+        print(f"\nImported {len(imported)} tests")
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("=== Test Bundles ===\n")
+    args = parse_args()
+    if args.command == "export":
+        export_tests(args.bundle, args.test_ids, args.statistics)
+    elif not import_tests(args.bundle, args.keep_ids, args.owner, args.access_level):
+        sys.exit(1)
@@ -29,6 +29,22 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Log tables with fewer than 3 rows",
     )
+    parser.add_argument(
+        "--no-optimize-images",
+        action="store_true",
+        help="Keep extracted images exactly as stored in the document",
+    )
+    parser.add_argument(
+        "--max-image-dimension",
+        type=int,
+        default=0,
+        help="Downsample images larger than this many pixels (0 = keep size)",
+    )
+    parser.add_argument(
+        "--normalized",
+        action="store_true",
+        help="Write normalized payload (shared blocks, correct as option id)",
+    )
     return parser.parse_args()
 
 
@@ -46,10 +62,14 @@ def main() -> None:
         args.symbol,
         args.log_small_tables,
         assets_dir,
+        image_optimization=not args.no_optimize_images,
+        max_image_dimension=args.max_image_dimension,
     )
     try:
         tests = extractor.extract()
-        payload = serialize_test_payload(test_id, args.file.stem, tests, assets_dir)
+        payload = serialize_test_payload(
+            test_id, args.file.stem, tests, assets_dir, normalized=args.normalized
+        )
         (test_dir / "test.json").write_text(
             json_dump(payload), encoding="utf-8"
         )
@@ -62,7 +82,7 @@ def main() -> None:
 def json_dump(payload: dict[str, object]) -> str:
     import json
 
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
 
 
 if __name__ == "__main__":
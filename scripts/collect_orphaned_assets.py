@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Find and remove assets no question references any more.
+
+Orphans older than ASSET_GC_GRACE_HOURS that are not used by the current
+payload or by versions from the last ASSET_GC_HISTORY_DAYS are moved to
+``<test>/quarantine/<timestamp>/`` (or deleted with --mode delete);
+quarantine folders older than ASSET_GC_QUARANTINE_DAYS are deleted. The
+same job runs in the background of the API every ASSET_GC_INTERVAL_HOURS.
+
+Usage:
+    python scripts/collect_orphaned_assets.py --dry-run [--full] [test_id ...]
+    python scripts/collect_orphaned_assets.py [--mode delete] [test_id ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.asset_gc_service import collect_orphaned_assets
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collect orphaned test assets")
+    parser.add_argument("test_ids", nargs="*", help="Tests to process (default: all)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report orphans, do not touch files",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Scan every test, not only those changed since the last run",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["quarantine", "delete"],
+        help="What to do with orphans (default: ASSET_GC_MODE)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print("=== Collect Orphaned Assets ===\n")
+    args = parse_args()
+    report = collect_orphaned_assets(
+        args.test_ids or None, dry_run=args.dry_run, full=args.full, mode=args.mode
+    )
+    for orphan in report["orphans"]:
+        print(f"  {orphan['testId']}: {orphan['name']} ({orphan['size']} bytes)")
+
+    total = sum(orphan["size"] for orphan in report["orphans"])
+    action = "Would " + report["mode"] if args.dry_run else report["mode"].capitalize() + "d"
+    print(f"\nScanned {report['scanned']} tests ({report['skipped']} unchanged skipped)")
+    print(f"{action} {len(report['orphans'])} orphaned assets, {total} bytes")
+    if not args.dry_run:
+        print(f"Quarantined: {report['quarantinedBytes']} bytes")
+        print(f"Freed: {report['freedBytes']} bytes")
+    purge = "Would purge" if args.dry_run else "Purged"
+    print(f"{purge} {report['purgedQuarantines']} old quarantine folders")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Rewrite stored test payloads with the current JSON serializer settings.
+
+By default payloads are written compactly (no indentation), which shrinks
+pretty-printed test.json files by roughly a third.
+
+Usage:
+    python scripts/compact_payloads.py [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.utils import iter_test_dirs, json_dump_bytes, json_load, write_json_file
+from api.utils.json_utils import get_json_backend
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rewrite test payloads compactly")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report size changes, do not rewrite files",
+    )
+    return parser.parse_args()
+
+
+def compact_payloads(dry_run: bool) -> None:
+    """Rewrite every test.json and report bytes saved."""
+    print(f"JSON backend: {get_json_backend().name}")
+    total_before = 0
+    total_after = 0
+    rewritten = 0
+
+    for test_directory in iter_test_dirs():
+        payload_file = test_directory / "test.json"
+        if not payload_file.exists():
+            # Stored as binary container
+            continue
+        raw = payload_file.read_bytes()
+        payload = json_load(raw)
+        data = json_dump_bytes(payload)
+
+        total_before += len(raw)
+        total_after += len(data)
+        if data == raw:
+            continue
+
+        saved = len(raw) - len(data)
+        print(f"  {test_directory.name}: {len(raw)} -> {len(data)} bytes ({saved} saved)")
+        if not dry_run:
+            write_json_file(payload_file, payload)
+        rewritten += 1
+
+    saved_total = total_before - total_after
+    action = "Would rewrite" if dry_run else "Rewrote"
+    print(f"\n{action} {rewritten} payloads, {saved_total} bytes saved "
+          f"({total_before} -> {total_after})")
+
+
+if __name__ == "__main__":
+    print("=== Compact Test Payloads ===\n")
+    args = parse_args()
+    compact_payloads(args.dry_run)
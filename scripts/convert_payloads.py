@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Convert stored test payloads between test.json and the binary container.
+
+Usage:
+    python scripts/convert_payloads.py --to binary [--compress] [test_id ...]
+    python scripts/convert_payloads.py --to json [--normalized] [test_id ...]
+
+Without test ids every stored test is converted. Converting to json also
+serves as the export path for tests kept in binary form.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.test_service import (
+    PAYLOAD_FORMATS,
+    load_test_payload,
+    write_stored_payload,
+)
+from api.utils import binary_payload_path, iter_test_dirs, payload_path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert test payload storage format")
+    parser.add_argument("test_ids", nargs="*", help="Tests to convert (default: all)")
+    parser.add_argument("--to", choices=PAYLOAD_FORMATS, required=True, help="Target format")
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="zlib-compress question records (binary only)",
+    )
+    parser.add_argument(
+        "--normalized",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Store normalized payloads (default: PAYLOAD_NORMALIZED setting)",
+    )
+    return parser.parse_args()
+
+
+def _stored_size(test_id: str) -> int:
+    return sum(
+        path.stat().st_size
+        for path in (payload_path(test_id), binary_payload_path(test_id))
+        if path.exists()
+    )
+
+
+def convert_payloads(
+    test_ids: list[str], target: str, compress: bool, normalized: bool | None
+) -> None:
+    """Convert payloads and report size before/after."""
+    if not test_ids:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    for test_id in test_ids:
+        before = _stored_size(test_id)
+        payload = load_test_payload(test_id)
+        write_stored_payload(test_id, payload, target, compress, normalized)
+        after = _stored_size(test_id)
+        print(f"  {test_id}: {before} -> {after} bytes")
+
+    print(f"\nConverted {len(test_ids)} tests to {target}")
+
+
+if __name__ == "__main__":
+    print("=== Convert Test Payloads ===\n")
+    args = parse_args()
+    convert_payloads(args.test_ids, args.to, args.compress, args.normalized)
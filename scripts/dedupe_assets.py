@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Move test assets into the shared content-addressed blob store.
+
+Every file under ``<test>/assets/`` is stored once in ``.blobs/`` and
+referenced from the test's asset manifest; identical files of different
+tests (or of one test) become one blob. Reports the disk space reclaimed.
+
+Usage:
+    python scripts/dedupe_assets.py [--dry-run] [test_id ...]
+    python scripts/dedupe_assets.py --rebuild-refcounts [--gc]
+
+--rebuild-refcounts recounts references from all manifests (run it with
+the API stopped); --gc deletes blobs that are no longer referenced.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.asset_store import (
+    blob_path,
+    collect_garbage,
+    ingest_assets,
+    rebuild_refcounts,
+)
+from api.utils import assets_dir, iter_test_dirs
+from core.asset_names import file_digest
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Deduplicate test assets")
+    parser.add_argument("test_ids", nargs="*", help="Tests to process (default: all)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how much space would be reclaimed",
+    )
+    parser.add_argument(
+        "--rebuild-refcounts",
+        action="store_true",
+        help="Recount blob references from all manifests",
+    )
+    parser.add_argument("--gc", action="store_true", help="Delete unreferenced blobs")
+    return parser.parse_args()
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def estimate_test(test_id: str, seen_digests: set[str], seen_inodes: set[int]) -> dict[str, int]:
+    """Estimate ingest of one test without changing anything."""
+    stats = {"files": 0, "bytes": 0, "reclaimed": 0}
+    directory = assets_dir(test_id)
+    if not directory.is_dir():
+        return stats
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        stat = path.stat()
+        digest = file_digest(path)
+        stats["files"] += 1
+        stats["bytes"] += stat.st_size
+        duplicate = digest in seen_digests or blob_path(digest).exists()
+        if duplicate and stat.st_ino not in seen_inodes and stat.st_nlink == 1:
+            stats["reclaimed"] += stat.st_size
+        seen_digests.add(digest)
+        seen_inodes.add(stat.st_ino)
+    return stats
+
+
+def dedupe_assets(test_ids: list[str], dry_run: bool) -> None:
+    """Ingest assets of every given test and report reclaimed space."""
+    if not test_ids:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    seen_digests: set[str] = set()
+    seen_inodes: set[int] = set()
+    totals = {"files": 0, "bytes": 0, "reclaimed": 0}
+    for test_id in test_ids:
+        if dry_run:
+            stats = estimate_test(test_id, seen_digests, seen_inodes)
+        else:
+            stats = ingest_assets(test_id)
+        if not stats["files"]:
+            continue
+        print(f"  {test_id}: {stats['files']} files, {_format_size(stats['bytes'])}, "
+              f"reclaimed {_format_size(stats['reclaimed'])}")
+        for key in totals:
+            totals[key] += stats[key]
+
+    action = "Would move" if dry_run else "Moved"
+    print(f"\n{action} {totals['files']} files ({_format_size(totals['bytes'])}) "
+          f"from {len(test_ids)} tests, reclaimed {_format_size(totals['reclaimed'])}")
+
+
+if __name__ == "__main__":
+    print("=== Deduplicate Test Assets ===\n")
+    args = parse_args()
+    if args.rebuild_refcounts:
+        result = rebuild_refcounts()
+        print(f"Blobs: {result['blobs']}, unreferenced: {result['unreferenced']}")
+    elif not args.gc:
+        dedupe_assets(args.test_ids, args.dry_run)
+    if args.gc:
+        result = collect_garbage(dry_run=args.dry_run)
+        action = "Would delete" if args.dry_run else "Deleted"
+        print(f"{action} {result['blobs']} unreferenced blobs ({_format_size(result['bytes'])})")
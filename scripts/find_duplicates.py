@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Report near-duplicate questions across stored tests.
+
+The duplicate index is kept up to date on every save; pass --rebuild to
+build it from DATA_DIR first (after a restore or CLI imports).
+
+Usage:
+    python scripts/find_duplicates.py [--rebuild] [--threshold 0.7] [test_id ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.duplicate_service import (
+    DEFAULT_THRESHOLD,
+    MIN_THRESHOLD,
+    rebuild_duplicate_index,
+    report_duplicates,
+)
+from api.utils import iter_test_dirs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report near-duplicate questions")
+    parser.add_argument("test_ids", nargs="*", help="Tests to compare (default: all)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild index first")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Minimum estimated Jaccard similarity (at least {MIN_THRESHOLD})",
+    )
+    args = parser.parse_args()
+    if not MIN_THRESHOLD <= args.threshold <= 1.0:
+        parser.error(f"--threshold must be between {MIN_THRESHOLD} and 1.0")
+    return args
+
+
+def find_duplicates(test_ids: list[str], rebuild: bool, threshold: float) -> None:
+    """Print duplicate groups, largest first."""
+    if rebuild:
+        stats = rebuild_duplicate_index()
+        print(f"Indexed {stats['questions']} questions from {stats['tests']} tests\n")
+    if not test_ids:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    groups = report_duplicates(test_ids, threshold)
+    for group in groups:
+        print(f"Group of {group['size']}:")
+        for question in group["questions"]:
+            print(f"  {question['testId']} #{question['questionId']} "
+                  f"(similarity {question['similarity']})")
+
+    total = sum(group["size"] for group in groups)
+    print(f"\n{len(groups)} groups, {total} questions in {len(test_ids)} tests")
+
+
+if __name__ == "__main__":
+    print("=== Find Duplicate Questions ===\n")
+    args = parse_args()
+    find_duplicates(args.test_ids, args.rebuild, args.threshold)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Give existing test assets content-hashed names.
+
+Assets imported before content hashing keep names like ``rId5.png`` and are
+served with revalidation on every view. This moves loose assets into the
+blob store, gives every referenced asset its ``<sha256 prefix><suffix>``
+name as well, switches the image references of the payload to it and
+records a new test version. Old names stay in the asset manifest (older
+versions in the test history still point to them).
+
+Usage:
+    python scripts/hash_asset_names.py [--dry-run] [test_id ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path, PurePosixPath
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import HTTPException
+
+from api.services.asset_store import add_asset_name, ingest_assets, resolve_asset
+from api.services.test_service import load_test_payload, write_stored_payload
+from api.utils import binary_payload_path, iter_test_dirs
+from core.asset_names import content_hash_name, file_digest, is_content_hash_name
+from core.serialization import iter_image_inlines
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rename test assets to content hashes")
+    parser.add_argument("test_ids", nargs="*", help="Tests to process (default: all)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would change",
+    )
+    return parser.parse_args()
+
+
+def hashed_src(test_id: str, src: str, dry_run: bool) -> str | None:
+    """Get content-hashed src for an asset, adding the name unless dry run."""
+    name = PurePosixPath(src)
+    if is_content_hash_name(name.name):
+        return None
+    try:
+        file_path = resolve_asset(test_id, src)
+    except HTTPException:
+        return None
+    if not file_path.is_file():
+        return None
+
+    target = name.with_name(content_hash_name(file_digest(file_path), name.suffix)).as_posix()
+    if not dry_run and not add_asset_name(test_id, target, name.as_posix()):
+        return None
+    return target
+
+
+def hash_asset_names(test_ids: list[str], dry_run: bool) -> None:
+    """Switch image references of every given test to hashed names."""
+    if not test_ids:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    rewritten = 0
+    total_assets = 0
+    for test_id in test_ids:
+        if not dry_run:
+            ingest_assets(test_id)
+        payload = load_test_payload(test_id)
+        renamed: dict[str, str | None] = {}
+        references = 0
+        for inline in iter_image_inlines(payload.get("questions")):
+            src = inline.get("src")
+            if not isinstance(src, str):
+                continue
+            if src not in renamed:
+                renamed[src] = hashed_src(test_id, src, dry_run)
+            if renamed[src]:
+                inline["src"] = renamed[src]
+                references += 1
+        if not references:
+            continue
+
+        assets = sum(1 for name in renamed.values() if name)
+        print(f"  {test_id}: {assets} assets, {references} references")
+        total_assets += assets
+        rewritten += 1
+        if not dry_run:
+            payload["version"] = (payload.get("version") or 0) + 1
+            payload_format = "binary" if binary_payload_path(test_id).exists() else "json"
+            write_stored_payload(test_id, payload, payload_format)
+
+    action = "Would rewrite" if dry_run else "Rewrote"
+    print(f"\n{action} {rewritten} of {len(test_ids)} tests, {total_assets} assets hashed")
+
+
+if __name__ == "__main__":
+    print("=== Hash Test Asset Names ===\n")
+    args = parse_args()
+    hash_asset_names(args.test_ids, args.dry_run)
@@ -22,10 +22,10 @@ from datetime import datetime, timezone
 
 from sqlalchemy import select
 
-from api.config import DATA_DIR
 from api.database import SessionLocal
 from api.models.db.user import User
 from api.models.db.test_collection import TestCollection, AccessLevel
+from api.utils import iter_test_dirs
 
 
 def get_first_user(db):
@@ -43,19 +43,7 @@ def get_existing_test_ids(db):
 
 def get_file_based_test_ids():
     """Get list of test IDs from filesystem."""
-    test_ids = []
-    if not DATA_DIR.exists():
-        return test_ids
-
-    for test_directory in DATA_DIR.iterdir():
-        if not test_directory.is_dir():
-            continue
-        payload_file = test_directory / "test.json"
-        if not payload_file.exists():
-            continue
-        test_ids.append(test_directory.name)
-
-    return test_ids
+    return [test_directory.name for test_directory in iter_test_dirs()]
 
 
 def migrate_tests():
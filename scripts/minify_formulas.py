@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Minify MathML formulas in stored test payloads.
+
+Applies the same canonicalization as the Word importer to tests imported
+before it existed and reports the bytes saved per test. Payloads keep
+their storage format.
+
+Usage:
+    python scripts/minify_formulas.py [--dry-run] [test_id ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.test_service import load_test_payload, write_stored_payload
+from api.utils import binary_payload_path, iter_test_dirs
+from core.mathml import minify_mathml
+from core.serialization import INLINE_FORMULA_TYPE
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Minify MathML in test payloads")
+    parser.add_argument("test_ids", nargs="*", help="Tests to process (default: all)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report savings, do not rewrite payloads",
+    )
+    return parser.parse_args()
+
+
+def minify_node(node: object) -> tuple[int, int]:
+    """Minify formula inlines under node in place.
+
+    Returns (formulas changed, bytes saved).
+    """
+    changed = 0
+    saved = 0
+    if isinstance(node, dict):
+        mathml = node.get("mathml")
+        if node.get("type") == INLINE_FORMULA_TYPE and isinstance(mathml, str):
+            minified = minify_mathml(mathml)
+            if minified != mathml:
+                node["mathml"] = minified
+                changed += 1
+                saved += len(mathml.encode("utf-8")) - len(minified.encode("utf-8"))
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return changed, saved
+
+    for child in children:
+        child_changed, child_saved = minify_node(child)
+        changed += child_changed
+        saved += child_saved
+    return changed, saved
+
+
+def minify_formulas(test_ids: list[str], dry_run: bool) -> None:
+    """Minify formulas in every given test and report bytes saved."""
+    if not test_ids:
+        test_ids = [test_directory.name for test_directory in iter_test_dirs()]
+
+    total_saved = 0
+    rewritten = 0
+    for test_id in test_ids:
+        payload = load_test_payload(test_id)
+        changed, saved = minify_node(payload.get("questions", []))
+        if not changed:
+            continue
+
+        print(f"  {test_id}: {changed} formulas, {saved} bytes saved")
+        total_saved += saved
+        rewritten += 1
+        if not dry_run:
+            payload_format = "binary" if binary_payload_path(test_id).exists() else "json"
+            write_stored_payload(test_id, payload, payload_format)
+
+    action = "Would rewrite" if dry_run else "Rewrote"
+    print(f"\n{action} {rewritten} of {len(test_ids)} tests, {total_saved} bytes saved")
+
+
+if __name__ == "__main__":
+    print("=== Minify Test Formulas ===\n")
+    args = parse_args()
+    minify_formulas(args.test_ids, args.dry_run)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Rebuild the full-text question search index from stored tests.
+
+The index is kept up to date on every save; run this after restoring
+DATA_DIR from a backup, after importing tests with the CLI, or when the
+search database was deleted.
+
+Usage:
+    python scripts/rebuild_search_index.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.config import SEARCH_DB_PATH
+from api.services.search_service import rebuild_search_index
+
+
+def rebuild() -> None:
+    """Rebuild the index and report its size."""
+    print(f"Index: {SEARCH_DB_PATH}")
+    started = time.perf_counter()
+    stats = rebuild_search_index()
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {stats['documents']} questions from {stats['tests']} tests "
+          f"in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    print("=== Rebuild Search Index ===\n")
+    rebuild()
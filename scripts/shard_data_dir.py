@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Move tests from the flat DATA_DIR/<test_id> layout to DATA_DIR/ab/cd/<test_id>.
+
+Safe to run while the API is serving: every test is moved with one atomic
+rename and its old path is replaced by a relative symlink to the new one,
+so requests that resolved the old path just before the move still read
+the same files. The API finds tests in both layouts, so the migration can
+be stopped and resumed at any time. Once it is done and all API processes
+have been restarted, --cleanup removes the symlinks.
+
+Usage:
+    python scripts/shard_data_dir.py --dry-run
+    python scripts/shard_data_dir.py [--pause-ms 10] [test_id ...]
+    python scripts/shard_data_dir.py --cleanup
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.config import DATA_DIR
+from api.utils.paths import legacy_test_dir, sharded_test_dir
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shard the tests data directory")
+    parser.add_argument("test_ids", nargs="*", help="Tests to move (default: all flat ones)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would be moved",
+    )
+    parser.add_argument(
+        "--pause-ms",
+        type=int,
+        default=0,
+        help="Pause between tests to limit disk load on a live server",
+    )
+    parser.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Remove symlinks left at the old paths",
+    )
+    return parser.parse_args()
+
+
+def flat_test_ids() -> list[str]:
+    """Get ids of tests still stored in the flat layout."""
+    return sorted(
+        entry.name
+        for entry in DATA_DIR.iterdir()
+        if not entry.name.startswith(".")
+        and len(entry.name) > 2
+        and entry.is_dir()
+        and not entry.is_symlink()
+    )
+
+
+def move_test(test_id: str, dry_run: bool) -> bool:
+    """Move one test into its shard; returns whether it was (would be) moved."""
+    legacy = legacy_test_dir(test_id)
+    sharded = sharded_test_dir(test_id)
+    if legacy.is_symlink() or not legacy.is_dir():
+        return False
+    if sharded.exists():
+        print(f"  {test_id}: already exists at {sharded}, skipped")
+        return False
+    if dry_run:
+        return True
+    sharded.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(legacy, sharded)
+    legacy.symlink_to(sharded.relative_to(DATA_DIR), target_is_directory=True)
+    return True
+
+
+def cleanup_links() -> int:
+    """Remove symlinks at the old flat paths."""
+    removed = 0
+    for entry in DATA_DIR.iterdir():
+        if entry.is_symlink() and not entry.name.startswith("."):
+            entry.unlink()
+            removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    print("=== Shard Tests Data Directory ===\n")
+    args = parse_args()
+    if args.cleanup:
+        print(f"Removed {cleanup_links()} legacy symlinks")
+        sys.exit(0)
+
+    test_ids = args.test_ids or flat_test_ids()
+    moved = 0
+    for test_id in test_ids:
+        if move_test(test_id, args.dry_run):
+            moved += 1
+            if args.pause_ms:
+                time.sleep(args.pause_ms / 1000)
+    action = "Would move" if args.dry_run else "Moved"
+    print(f"{action} {moved} of {len(test_ids)} tests to {DATA_DIR}/ab/cd/<test_id>")
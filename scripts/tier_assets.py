@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Move assets of idle tests into cold storage (one archive per test).
+
+Tests not opened for ASSET_TIER_IDLE_DAYS get the blobs only they use
+packed into ``<test>/assets.pack``; packed tests opened since are promoted
+back to the blob store. The same job runs in the background of the API
+every ASSET_TIER_INTERVAL_HOURS.
+
+Usage:
+    python scripts/tier_assets.py --dry-run [--idle-days N] [test_id ...]
+    python scripts/tier_assets.py [--idle-days N] [test_id ...]
+    python scripts/tier_assets.py --promote test_id [test_id ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.asset_store import unpack_assets
+from api.services.asset_tiering_service import tier_test_assets
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pack assets of idle tests")
+    parser.add_argument("test_ids", nargs="*", help="Tests to process (default: all)")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would be packed or promoted",
+    )
+    parser.add_argument(
+        "--idle-days",
+        type=int,
+        help="Pack tests not accessed for this many days (default: ASSET_TIER_IDLE_DAYS)",
+    )
+    parser.add_argument(
+        "--promote",
+        action="store_true",
+        help="Unpack the given tests back into the blob store",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print("=== Tier Test Assets ===\n")
+    args = parse_args()
+    if args.promote:
+        for test_id in args.test_ids:
+            print(f"  {test_id}: {unpack_assets(test_id)} assets unpacked")
+        sys.exit(0)
+
+    report = tier_test_assets(args.test_ids or None, args.idle_days, args.dry_run)
+    for test_id in report["packed"]:
+        print(f"  packed: {test_id}")
+    for test_id in report["promoted"]:
+        print(f"  promoted: {test_id}")
+    prefix = "Would pack" if args.dry_run else "Packed"
+    print(f"\n{prefix} {len(report['packed'])} tests "
+          f"({report['files']} files, {report['bytes']} bytes), "
+          f"promoted {len(report['promoted'])}")
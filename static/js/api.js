@@ -61,7 +61,8 @@ export async function fetchTest(testId) {
 }
 
 export async function updateQuestion(testId, questionId, payload) {
-  const response = await fetch(`/api/tests/${testId}/questions/${questionId}`,
+  const response = await fetch(
+    `/api/tests/${testId}/questions/${questionId}?mode=delta`,
     {
       method: "PATCH",
       headers: { "Content-Type": "application/json", ...getAuthHeaders() },
@@ -76,7 +77,7 @@ export async function updateQuestion(testId, questionId, payload) {
 }
 
 export async function addQuestion(testId, payload) {
-  const response = await fetch(`/api/tests/${testId}/questions`, {
+  const response = await fetch(`/api/tests/${testId}/questions?mode=delta`, {
     method: "POST",
     headers: { "Content-Type": "application/json", ...getAuthHeaders() },
     body: JSON.stringify(payload),
@@ -90,7 +91,7 @@ export async function addQuestion(testId, payload) {
 
 export async function deleteQuestion(testId, questionId) {
   const response = await fetch(
-    `/api/tests/${testId}/questions/${questionId}`,
+    `/api/tests/${testId}/questions/${questionId}?mode=delta`,
     {
       method: "DELETE",
       headers: { ...getAuthHeaders() },
@@ -100,6 +101,7 @@ export async function deleteQuestion(testId, questionId) {
     const data = await response.json().catch(() => ({}));
     throw new Error(data.detail || t("errorDeleteQuestion"));
   }
+  return response.json();
 }
 
 export async function renameTest(testId, title) {
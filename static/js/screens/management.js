@@ -111,11 +111,50 @@ export async function refreshCurrentTest(testId = state.currentTest?.id) {
     return;
   }
 
-  const { updateTestingPanelsStatus, setActiveTestingPanel } = await import("./testing.js");
-
   state.currentTest = await fetchTest(testId);
   const { tests } = await fetchTests();
   state.testsCache = tests;
+  await resetTestingView();
+}
+
+/**
+ * Apply a question delta (?mode=delta response) to the current test
+ * without refetching the whole payload
+ */
+export async function applyQuestionDelta(delta) {
+  if (!state.currentTest) {
+    return;
+  }
+
+  const questions = state.currentTest.questions || [];
+  const questionId = delta.question ? delta.question.id : delta.deletedId;
+  const existingIndex = questions.findIndex(
+    (question) => question.id === questionId
+  );
+  if (existingIndex !== -1) {
+    questions.splice(existingIndex, 1);
+  }
+  if (delta.question) {
+    questions.splice(delta.index, 0, delta.question);
+  }
+  state.currentTest.questions = questions;
+  state.currentTest.version = delta.version;
+
+  const cachedTest = state.testsCache?.find(
+    (test) => test.id === state.currentTest.id
+  );
+  if (cachedTest) {
+    cachedTest.questionCount = delta.total;
+  }
+  await resetTestingView();
+}
+
+/**
+ * Reset testing panels after the current test changed
+ */
+async function resetTestingView() {
+  const { updateTestingPanelsStatus, setActiveTestingPanel } = await import("./testing.js");
+
   renderTestCardsWithHandlers(state.testsCache, state.currentTest.id);
   state.session = null;
   updateProgressHint();
@@ -191,8 +230,8 @@ export async function handleDeleteQuestion(questionId) {
 
   if (isOwner) {
     // Owner can directly delete
-    await deleteQuestionApi(state.currentTest.id, questionId);
-    await refreshCurrentTest(state.currentTest.id);
+    const delta = await deleteQuestionApi(state.currentTest.id, questionId);
+    await applyQuestionDelta(delta);
     renderEditorQuestionList({ onDeleteQuestion: handleDeleteQuestion });
     resetEditorForm();
   } else {
@@ -415,8 +454,12 @@ export function initializeManagementScreenEvents() {
 
         if (isOwner) {
           // Owner can directly edit
-          await updateQuestion(state.currentTest.id, editedId, payload);
-          await refreshCurrentTest(state.currentTest.id);
+          const delta = await updateQuestion(
+            state.currentTest.id,
+            editedId,
+            payload
+          );
+          await applyQuestionDelta(delta);
           renderEditorQuestionList({ onDeleteQuestion: handleDeleteQuestion });
           const updatedQuestion = state.currentTest?.questions?.find(
             (question) => question.id === editedId
@@ -442,8 +485,8 @@ export function initializeManagementScreenEvents() {
       } else {
         if (isOwner) {
           // Owner can directly add
-          await addQuestion(state.currentTest.id, payload);
-          await refreshCurrentTest(state.currentTest.id);
+          const delta = await addQuestion(state.currentTest.id, payload);
+          await applyQuestionDelta(delta);
           renderEditorQuestionList({ onDeleteQuestion: handleDeleteQuestion });
           resetEditorForm();
         } else {